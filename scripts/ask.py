@@ -3,6 +3,14 @@ Script de perguntas e respostas — COM MEMÓRIA DE CONVERSA.
 
 Roda no terminal: python scripts/ask.py
 
+MODO LOTE (regressão):
+    python scripts/ask.py --batch perguntas.jsonl --output respostas.jsonl
+
+    Cada linha do arquivo é {"question": "...", "id": "..."} (id opcional)
+    ou só a pergunta como string JSON. As respostas saem em JSONL, uma
+    linha por pergunta assim que fica pronta, com fontes e tempos
+    (ver src/langchain_rag/batch.py).
+
 MODOS DE USO:
     - Modo normal: faz pergunta, recebe resposta com fontes
     - Modo simples: prefixar com "simple:" para chain sem memória
@@ -10,33 +18,142 @@ MODOS DE USO:
     - Comando "historico": mostra o histórico da conversa
     - Comando "limpar": limpa a memória
 
+STREAMING:
+    A busca acontece uma vez, as fontes aparecem primeiro e a resposta
+    é impressa token a token, conforme o Groq gera (sem esperar o fim).
+
 EXPERIMENTE A MEMÓRIA:
     ❓ Quais são os benefícios da empresa?
     📝 Plano de saúde, vale-refeição, Gympass...
     ❓ E como funciona o plano de saúde?     ← O "o plano" refere ao anterior!
     📝 O plano de saúde cobre...             ← Funciona por causa da memória
+
+    Em conversas longas, os turnos antigos viram um resumo e o histórico
+    enviado ao Groq fica dentro de HISTORY_MAX_TOKENS (ver history.py).
 """
 
+import argparse
+import asyncio
+import json
 import sys
+import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from langchain_core.messages import AIMessage, HumanMessage
-
-from src.langchain_rag.chain import create_conversational_rag_chain, create_rag_chain
-from src.langchain_rag.retrieval import get_retriever, load_vector_store
+from src.langchain_rag.batch import aanswer_batch
+from src.langchain_rag.chain import RagStreamer
+from src.langchain_rag.history import ConversationMemory
+from src.langchain_rag.retrieval import load_shard_stores
+
+
+def _print_sources(docs) -> None:
+    """Mostra as fontes recuperadas (antes da resposta começar)."""
+    sources = dict.fromkeys(Path(doc.metadata.get("source", "?")).name for doc in docs)
+    print(f"   📚 Fontes: {', '.join(sources) or 'nenhuma'}")
+
+
+def _stream_answer(streamer: RagStreamer, question: str, chat_history=None) -> str:
+    """Busca uma vez, mostra as fontes e imprime a resposta token a token."""
+    query = streamer.search_query(question, chat_history)
+    if query != question:
+        print(f"   🔁 Busca reformulada: {query}")
+    docs = streamer.retrieve(question, chat_history)  # reformulação memorizada: sem nova chamada
+    _print_sources(docs)
+    print("\n📝 Resposta:")
+    tokens = []
+    for token in streamer.stream(question, docs, chat_history):
+        print(token, end="", flush=True)
+        tokens.append(token)
+    print()
+    return "".join(tokens)
+
+
+def _read_questions(path: Path) -> list[dict]:
+    """
+    Lê o JSONL de perguntas (objetos com "question" ou strings).
+
+    Raises:
+        ValueError: Linha inválida, com a mensagem "arquivo:linha: erro".
+    """
+    records = []
+    for line_number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"{path}:{line_number}: JSON inválido ({error.msg})") from None
+        if isinstance(record, str):
+            record = {"question": record}
+        if not isinstance(record, dict) or not record.get("question"):
+            raise ValueError(f"{path}:{line_number}: esperado {{\"question\": ...}}")
+        records.append(record)
+    return records
+
+
+async def _run_batch(args, records: list[dict]) -> None:
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    print(f"📦 {len(records)} pergunta(s) de {args.batch}", file=sys.stderr)
+
+    start = time.perf_counter()
+    errors = 0
+    try:
+        async for result in aanswer_batch(
+            [record["question"] for record in records],
+            top_k=args.top_k,
+            search_type=args.search_type,
+        ):
+            if "id" in records[result["index"]]:
+                result = {"id": records[result["index"]]["id"], **result}
+            errors += result["error"] is not None
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ {len(records)} respondida(s) em {elapsed:.1f}s "
+        f"({len(records) / elapsed:.2f} perguntas/s), {errors} erro(s)",
+        file=sys.stderr,
+    )
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Perguntas e respostas sobre os documentos.")
+    parser.add_argument(
+        "--batch", type=Path, help="Responde as perguntas de um JSONL (sem REPL)."
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Arquivo JSONL de saída do lote (padrão: stdout)."
+    )
+    parser.add_argument("--top-k", type=int, default=5, help="Chunks por pergunta no lote.")
+    parser.add_argument(
+        "--search-type", help="similarity, hybrid ou mmr (padrão: RETRIEVAL_MODE)."
+    )
+    args = parser.parse_args()
+
+    if args.batch:
+        try:
+            records = _read_questions(args.batch)
+        except OSError as error:
+            print(f"{args.batch}: {error.strerror}", file=sys.stderr)
+            sys.exit(1)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            sys.exit(1)
+        asyncio.run(_run_batch(args, records))
+        return
+
     print("=" * 60)
     print("  RAG Project — Q&A com Memória de Conversa")
     print("=" * 60)
 
     # Verificar se há documentos indexados
     try:
-        store = load_vector_store()
-        count = store._collection.count()
+        count = sum(store._collection.count() for _, store in load_shard_stores())
     except Exception:
         count = 0
 
@@ -49,15 +166,16 @@ def main():
 
     print(f"\n📚 Vector store: {count} chunks indexados")
 
-    # Criar chain COM memória (principal)
+    # Criar RAG COM memória (principal)
     print("🔗 Criando chain RAG conversacional...")
-    conv_chain, chat_history = create_conversational_rag_chain()
+    conv_streamer = RagStreamer(conversational=True)
+    memory = ConversationMemory()
 
-    # Criar chain simples (sem memória, para comparação)
-    simple_chain = create_rag_chain()
+    # RAG simples (sem memória, para comparação)
+    simple_streamer = RagStreamer()
 
     # Retriever para modo debug
-    retriever = get_retriever()
+    retriever = simple_streamer.retriever
 
     print("\n💬 Chat com memória de conversa ativo!")
     print("   Comandos: 'historico', 'limpar', 'sair'")
@@ -81,21 +199,23 @@ def main():
 
         # Comando: mostrar histórico
         if lower == "historico":
-            if not chat_history:
+            if not memory.turns:
                 print("\n📝 Histórico vazio.\n")
             else:
-                print(f"\n📝 Histórico ({len(chat_history)} mensagens):")
-                for msg in chat_history:
-                    role = "👤" if isinstance(msg, HumanMessage) else "🤖"
-                    preview = msg.content[:100]
-                    suffix = "..." if len(msg.content) > 100 else ""
-                    print(f"   {role} {preview}{suffix}")
+                print(f"\n📝 Histórico ({len(memory)} turnos):")
+                if memory.summary:
+                    print(f"   🗜️  Resumo dos {memory.summarized_turns} primeiro(s): "
+                          f"{memory.summary[:200]}")
+                for question_text, answer_text in memory.turns[memory.summarized_turns:]:
+                    for role, text in (("👤", question_text), ("🤖", answer_text)):
+                        suffix = "..." if len(text) > 100 else ""
+                        print(f"   {role} {text[:100]}{suffix}")
                 print()
             continue
 
         # Comando: limpar memória
         if lower == "limpar":
-            chat_history.clear()
+            memory.clear()
             print("\n🧹 Memória limpa!\n")
             continue
 
@@ -121,8 +241,7 @@ def main():
             query = question[7:].strip()
             print("\n🔍 [Chain simples — sem memória]")
             try:
-                answer = simple_chain.invoke(query)
-                print(f"\n📝 Resposta:\n{answer}")
+                _stream_answer(simple_streamer, query)
             except Exception as e:
                 print(f"\n❌ Erro: {e}")
             print()
@@ -132,17 +251,16 @@ def main():
         try:
             print("\n🔍 Buscando nos documentos (com contexto da conversa)...", flush=True)
 
-            answer = conv_chain.invoke({
-                "question": question,
-                "chat_history": chat_history,
-            })
+            answer = _stream_answer(conv_streamer, question, memory)
 
-            # Adicionar ao histórico
-            chat_history.append(HumanMessage(content=question))
-            chat_history.append(AIMessage(content=answer))
+            # Adicionar ao histórico (resume os turnos antigos, se preciso)
+            memory.add_turn(question, answer)
 
-            print(f"\n📝 Resposta:\n{answer}")
-            print(f"\n   💭 Memória: {len(chat_history) // 2} turno(s) no histórico")
+            print(
+                f"\n   💭 Memória: {len(memory)} turno(s), "
+                f"{memory.summarized_turns} resumido(s), "
+                f"{memory.prompt_tokens()} tokens no prompt"
+            )
 
         except Exception as e:
             print(f"\n❌ Erro: {e}")
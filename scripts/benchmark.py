@@ -0,0 +1,162 @@
+"""
+Script de benchmark — Mede ingestão, busca e RAG num corpus sintético.
+
+Roda no terminal:
+    python scripts/benchmark.py                        (200 arquivos, padrões)
+    python scripts/benchmark.py --files 2000 --concurrency 16
+    python scripts/benchmark.py --output antes.json
+    python scripts/benchmark.py --compare antes.json depois.json
+
+O QUE FAZ:
+    1. Gera um corpus Markdown sintético (+ os documentos de data/)
+    2. Indexa num vector store TEMPORÁRIO (o índice real não é tocado)
+    3. Mede latência p50/p95/p99, QPS sob concorrência e pico de memória
+    4. Grava tudo em JSON, para comparar versões
+
+O Groq é substituído por um LLM falso com latência configurável:
+roda offline, sem chave de API e sem custo.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def _compare(old_path: Path, new_path: Path) -> None:
+    from src.benchmark.runner import compare_results
+
+    old = json.loads(old_path.read_text(encoding="utf-8"))
+    new = json.loads(new_path.read_text(encoding="utf-8"))
+    print(f"📊 {old_path.name} ({old['meta'].get('git_commit')}) → "
+          f"{new_path.name} ({new['meta'].get('git_commit')})\n")
+    for line in compare_results(old, new):
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ingestão, busca e RAG.")
+    parser.add_argument("--files", type=int, default=200, help="Nº de documentos sintéticos.")
+    parser.add_argument("--sections", type=int, default=6, help="Seções por documento.")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do corpus.")
+    parser.add_argument("--queries", type=int, default=100, help="Consultas por fase de busca.")
+    parser.add_argument("--top-k", type=int, default=5, help="Chunks por busca.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Chamadas simultâneas.")
+    parser.add_argument("--rag-queries", type=int, default=20, help="Perguntas na fase RAG.")
+    parser.add_argument(
+        "--search-types", default="similarity,hybrid,mmr", help="Tipos de busca (vírgula)."
+    )
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.2, help="Latência do 1º token do LLM falso (s)."
+    )
+    parser.add_argument(
+        "--llm-tps", type=float, default=200.0, help="Tokens/s do LLM falso."
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Processos de ingestão.")
+    parser.add_argument("--no-data", action="store_true", help="Não inclui os arquivos de data/.")
+    parser.add_argument(
+        "--workdir", type=Path, default=None,
+        help="Diretório de trabalho (corpus + índice). Padrão: temporário, apagado ao final.",
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Arquivo JSON de saída.")
+    parser.add_argument(
+        "--compare", nargs=2, type=Path, metavar=("ANTES", "DEPOIS"),
+        help="Compara dois resultados JSON e sai.",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        _compare(*args.compare)
+        return
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="rag-benchmark-"))
+    # settings lê o ambiente no import: isolar o índice e os caches ANTES de importar
+    os.environ["VECTOR_STORE_DIR"] = str(workdir / "vector_store")
+    os.environ["CACHE_DIR"] = str(workdir / "cache")
+    os.environ["ANSWER_CACHE"] = "false"
+
+    from src.benchmark.runner import BenchmarkConfig, run_benchmark
+
+    config = BenchmarkConfig(
+        num_files=args.files,
+        sections=args.sections,
+        seed=args.seed,
+        include_data=not args.no_data,
+        workers=args.workers,
+        queries=args.queries,
+        top_k=args.top_k,
+        search_types=[s.strip() for s in args.search_types.split(",") if s.strip()],
+        concurrency=args.concurrency,
+        rag_queries=args.rag_queries,
+        llm_latency=args.llm_latency,
+        llm_tokens_per_second=args.llm_tps,
+    )
+
+    print("=" * 60)
+    print("  RAG Project — Benchmark")
+    print("=" * 60)
+    print(f"\n📁 Diretório de trabalho: {workdir}\n")
+
+    try:
+        results = run_benchmark(config, workdir / "data")
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or Path(
+        "benchmark-results", f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    ingest = results["ingest"]
+    print(
+        f"\n✅ Ingestão: {ingest['files']} arquivos, {ingest['chunks']} chunks em "
+        f"{ingest['seconds']:.1f}s ({ingest['chunks_per_second']} chunks/s)"
+    )
+    for search_type, stats in results["retrieval"].items():
+        cold, warm = stats["cold"], stats["warm"]
+        qps = results["concurrency"][search_type]["qps"]
+        print(
+            f"   Busca {search_type}: p50 {cold['p50_ms']:.1f}ms, p95 {cold['p95_ms']:.1f}ms, "
+            f"p99 {cold['p99_ms']:.1f}ms (cache: p50 {warm['p50_ms']:.2f}ms), {qps} QPS, "
+            f"redundância {stats['redundancy']:.3f}"
+        )
+    filtered = results["filtered"]
+    if filtered.get("filtered"):
+        print(
+            "   Filtro por documento: p50 "
+            f"{filtered['unfiltered']['latency']['p50_ms']:.1f}ms → "
+            f"{filtered['filtered']['latency']['p50_ms']:.1f}ms, precisão "
+            f"{filtered['unfiltered']['precision']:.0%} → {filtered['filtered']['precision']:.0%}"
+        )
+    flat = results["flat_index"]
+    print(
+        f"   Índice int8: recall@{args.top_k} {flat['int8']['recall']}, p50 "
+        f"{flat['int8']['latency']['p50_ms']:.2f}ms (Chroma "
+        f"{flat['chroma']['latency']['p50_ms']:.2f}ms), varre {flat['int8']['scan_mb']} MB "
+        f"(float32: {flat['numpy']['float32_mb']} MB, HNSW em disco: "
+        f"{flat['chroma']['hnsw_disk_mb']} MB)"
+    )
+    print(
+        f"   Força bruta (numpy): recall@{args.top_k} {flat['numpy']['recall']}, p50 "
+        f"{flat['numpy']['latency']['p50_ms']:.2f}ms, em lote "
+        f"{flat['numpy']['batch_ms_per_query']:.3f}ms por consulta"
+    )
+    rag = results["rag"]
+    print(
+        f"   RAG: p50 {rag['sequential']['p50_ms']:.0f}ms sequencial, "
+        f"{rag['async']['qps']} QPS assíncrono"
+    )
+    print(f"   Pico de memória: {results['memory_peak_mb']}")
+    print(f"\n💾 Resultados em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,88 @@
 """
 Script de ingestão de documentos.
 
-Roda no terminal: python scripts/ingest.py
+Roda no terminal:
+    python scripts/ingest.py          (incremental: só o que mudou)
+    python scripts/ingest.py --full   (reconstrói o índice do zero)
+    python scripts/ingest.py --shard rh --full
+                                      (com SHARD_BY: reconstrói só um shard)
 
 O QUE FAZ:
-    1. Carrega documentos Markdown do diretório data/
-    2. Divide em chunks (RecursiveCharacterTextSplitter)
-    3. Gera embeddings + armazena no ChromaDB (via LangChain)
+    1. Compara os arquivos Markdown de data/ com o manifesto da última ingestão
+    2. Divide em chunks SÓ os arquivos novos ou alterados
+    3. Gera embeddings dos chunks novos + armazena no ChromaDB (via LangChain)
+    4. Remove os chunks de trechos e arquivos que deixaram de existir
 """
 
+import argparse
 import sys
 import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.langchain_rag.ingestion import load_documents, split_documents
-from src.langchain_rag.retrieval import create_vector_store
+from src.langchain_rag.embeddings import get_embedding_cache_stats, get_embedding_throughput
+from src.langchain_rag.indexing import index_documents
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Indexa os documentos de data/.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignora o manifesto e re-embeda todos os documentos.",
+    )
+    parser.add_argument(
+        "--shard",
+        help="Sincroniza só este shard (SHARD_BY=hash: h00, h01...; directory: "
+             "o diretório sob data/). Com --full, reconstrói só ele.",
+    )
+    args = parser.parse_args()
+
     print("=" * 60)
     print("  RAG Project — Ingestão de Documentos")
     print("=" * 60)
 
     start = time.time()
 
-    # Etapa 1: Carregar documentos
-    print("\n📄 Carregando documentos...")
-    documents = load_documents()
-    print(f"   → {len(documents)} documento(s) carregado(s)")
-    for doc in documents:
-        source = Path(doc.metadata.get("source", "?")).name
-        print(f"     • {source} ({len(doc.page_content)} chars)")
-
-    # Etapa 2: Dividir em chunks
-    print("\n🔪 Dividindo em chunks...")
-    chunks = split_documents(documents)
-    print(f"   → {len(chunks)} chunk(s) gerado(s)")
-
-    # Etapa 3: Embeddar + armazenar (tudo de uma vez!)
-    # Chroma.from_documents() gera embeddings e armazena automaticamente.
-    print("\n🔢💾 Gerando embeddings e armazenando...")
-    vector_store = create_vector_store(chunks)
+    print("\n🔍 Comparando data/ com o manifesto da última ingestão...")
+    try:
+        report = index_documents(full=args.full, shard=args.shard)
+    except ValueError as error:
+        print(f"\n❌ {error}")
+        sys.exit(1)
 
     elapsed = time.time() - start
 
     # Estatísticas
-    collection = vector_store._collection
-    total_stored = collection.count()
-
-    print(f"\n✅ Ingestão concluída em {elapsed:.1f}s!")
-    print(f"   Chunks indexados: {total_stored}")
+    mode = "completa" if report.full_rebuild else "incremental"
+    scope = f" do shard {args.shard!r}" if args.shard else ""
+    print(f"\n✅ Ingestão {mode}{scope} concluída em {elapsed:.1f}s!")
+    print(
+        f"   Arquivos: {report.files_added} novo(s), {report.files_changed} alterado(s), "
+        f"{report.files_deleted} removido(s), {report.files_unchanged} sem mudança"
+    )
+    print(
+        f"   Chunks: {report.chunks_embedded} embeddado(s), "
+        f"{report.chunks_deleted} removido(s)"
+    )
+    print(f"   Chunks indexados: {report.chunks_total}")
+    if report.shards:
+        print("   Por shard: " + ", ".join(
+            f"{shard}={chunks}" for shard, chunks in report.shards.items()
+        ))
+    for model_name, throughput in get_embedding_throughput().items():
+        if throughput.texts:
+            print(
+                f"   Embedding ({model_name}): {throughput.texts} chunk(s) em "
+                f"{throughput.seconds:.1f}s ({throughput.texts_per_second:.0f} chunks/s, "
+                f"{throughput.padding_ratio:.0%} de padding)"
+            )
+    for model_name, stats in get_embedding_cache_stats().items():
+        print(
+            f"   Cache de embeddings ({model_name}): "
+            f"{stats['memory_hits'] + stats['disk_hits']} hit(s), {stats['misses']} miss(es)"
+        )
     print("   Agora consulte com: python scripts/ask.py")
 
 
@@ -0,0 +1,19 @@
+"""
+Benchmark — Medição de desempenho da ingestão, da busca e do RAG.
+
+O PROBLEMA:
+    Otimizações sem medição são palpites. Para saber se uma mudança
+    deixou a busca mais rápida (ou mais lenta!), precisamos de números
+    reproduzíveis: o mesmo corpus, as mesmas consultas, o mesmo "LLM".
+
+A SOLUÇÃO:
+    - corpus.py   → gera corpora Markdown sintéticos de tamanho configurável
+                    (determinísticos: mesma semente = mesmos arquivos)
+    - fake_llm.py → um BaseChatModel falso com latência configurável, no
+                    lugar do Groq: roda offline e sem custo
+    - runner.py   → executa as fases e mede latência (p50/p95/p99), vazão
+                    (QPS) sob concorrência e pico de memória
+
+    Os resultados são gravados em JSON: rode antes e depois de uma mudança
+    e compare com `python scripts/benchmark.py --compare antes.json depois.json`.
+"""
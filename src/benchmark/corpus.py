@@ -0,0 +1,141 @@
+"""
+Corpus sintético — Documentos Markdown gerados para o benchmark.
+
+Os documentos imitam os de data/: títulos, seções (##), listas e
+parágrafos sobre políticas internas, com códigos como "POL-0421"
+(exercitam a busca por termos exatos do BM25).
+
+A geração é determinística (random.Random(seed)): o mesmo tamanho e a
+mesma semente produzem sempre os mesmos arquivos e as mesmas consultas,
+então resultados de versões diferentes são comparáveis.
+"""
+
+import random
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.langchain_rag.ingestion import iter_source_files
+
+_TOPICS = [
+    "férias", "benefícios", "trabalho remoto", "reembolso", "viagens", "segurança",
+    "equipamentos", "treinamentos", "avaliação de desempenho", "horário flexível",
+    "plano de saúde", "vale-refeição", "home office", "licença parental", "onboarding",
+]
+
+_SUBJECTS = [
+    "O colaborador", "A equipe de RH", "O gestor direto", "A área financeira",
+    "O time de TI", "Cada departamento", "O comitê de pessoas", "A liderança",
+]
+
+_VERBS = [
+    "deve solicitar", "pode aprovar", "precisa registrar", "é responsável por revisar",
+    "deve comunicar", "pode reembolsar", "precisa validar", "deve arquivar",
+]
+
+_OBJECTS = [
+    "o pedido no portal interno", "os comprovantes de despesa", "o período de descanso",
+    "a política vigente", "o equipamento recebido", "a escala da equipe",
+    "o formulário de adesão", "as horas trabalhadas", "o plano de desenvolvimento",
+]
+
+_CONDITIONS = [
+    "com pelo menos 30 dias de antecedência", "até o quinto dia útil do mês",
+    "sempre que houver mudança de função", "antes do início do período",
+    "em até 48 horas", "conforme o calendário anual", "mediante aprovação prévia",
+]
+
+
+@dataclass
+class SyntheticCorpus:
+    """Corpus gerado: diretório, arquivos e consultas de exemplo."""
+
+    directory: Path
+    files: int
+    bytes: int
+    queries: list[str]
+
+
+def _sentence(rng: random.Random) -> str:
+    return (
+        f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} "
+        f"{rng.choice(_CONDITIONS)}."
+    )
+
+
+def _document(rng: random.Random, index: int, sections: int) -> tuple[str, list[str]]:
+    """Gera um documento e as consultas que ele responde."""
+    topic = rng.choice(_TOPICS)
+    code = f"POL-{index:04d}"
+    lines = [f"# Política de {topic.title()} — {code}", ""]
+    queries = [f"Qual é a regra de {topic}?", f"O que diz a {code}?"]
+
+    for section in range(1, sections + 1):
+        subtopic = rng.choice(_TOPICS)
+        lines += [f"## {section}. {subtopic.capitalize()}", ""]
+        lines.append(" ".join(_sentence(rng) for _ in range(rng.randint(3, 6))))
+        lines.append("")
+        for _ in range(rng.randint(2, 4)):
+            lines.append(f"- {_sentence(rng)}")
+        lines.append("")
+        queries.append(f"Como funciona {subtopic} segundo a {code}?")
+
+    return "\n".join(lines), queries
+
+
+def generate_corpus(
+    target_dir: Path,
+    num_files: int = 200,
+    sections: int = 6,
+    seed: int = 42,
+    include_data_dir: Path | None = None,
+    max_queries: int = 500,
+) -> SyntheticCorpus:
+    """
+    Gera um corpus sintético em target_dir (apagado e recriado).
+
+    Args:
+        target_dir: Diretório de saída.
+        num_files: Nº de documentos sintéticos.
+        sections: Seções (##) por documento (~1 KB cada).
+        seed: Semente do gerador (mesma semente = mesmo corpus).
+        include_data_dir: Copia também os .md deste diretório (ex: data/),
+                          para o corpus conter os documentos reais.
+        max_queries: Máximo de consultas de exemplo retornadas.
+
+    Returns:
+        SyntheticCorpus com o diretório e consultas embaralhadas
+        (deterministicamente) para usar nas medições.
+    """
+    rng = random.Random(seed)
+    if target_dir.exists():
+        shutil.rmtree(target_dir)
+    (target_dir / "synthetic").mkdir(parents=True)
+
+    queries: list[str] = []
+    total_bytes = 0
+    files = 0
+
+    if include_data_dir is not None:
+        for path in iter_source_files(include_data_dir):
+            destination = target_dir / path.relative_to(include_data_dir)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, destination)
+            total_bytes += destination.stat().st_size
+            files += 1
+
+    for index in range(num_files):
+        text, doc_queries = _document(rng, index, sections)
+        path = target_dir / "synthetic" / f"doc-{index:05d}.md"
+        path.write_text(text, encoding="utf-8")
+        total_bytes += len(text.encode("utf-8"))
+        files += 1
+        queries.extend(doc_queries)
+
+    rng.shuffle(queries)
+    return SyntheticCorpus(
+        directory=target_dir,
+        files=files,
+        bytes=total_bytes,
+        queries=list(dict.fromkeys(queries))[:max_queries],
+    )
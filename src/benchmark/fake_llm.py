@@ -0,0 +1,116 @@
+"""
+LLM falso — Substituto determinístico do Groq para o benchmark.
+
+Implementa a interface BaseChatModel (a mesma do ChatGroq), então entra
+nas chains sem nenhuma mudança: create_rag_chain(llm=FakeChatModel()).
+
+Simula o perfil de latência de uma API real:
+    - first_token_latency: tempo até o primeiro token (rede + fila + prefill)
+    - tokens_per_second: velocidade de geração
+
+A resposta é determinística (derivada da pergunta), então o trabalho
+de parsing/streaming é sempre o mesmo entre execuções.
+"""
+
+import asyncio
+import re
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model falso com latência configurável.
+
+    Uso:
+        llm = FakeChatModel(first_token_latency=0.3, tokens_per_second=200)
+        chain = create_rag_chain(llm=llm, use_cache=False)
+
+    Attributes:
+        first_token_latency: Segundos até o primeiro token.
+        tokens_per_second: Tokens gerados por segundo (0 = instantâneo).
+        answer_tokens: Nº de tokens (palavras) da resposta.
+    """
+
+    first_token_latency: float = 0.2
+    tokens_per_second: float = 200.0
+    answer_tokens: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _answer(self, messages: list[BaseMessage]) -> list[str]:
+        """Resposta determinística: repete palavras da última mensagem."""
+        words = re.findall(r"\w+", str(messages[-1].content)) or ["resposta"]
+        tokens = [words[i % len(words)] for i in range(self.answer_tokens)]
+        return [token if i == 0 else f" {token}" for i, token in enumerate(tokens)]
+
+    @property
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    # ─── Síncrono ────────────────────────────────────────────────────────────
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._answer(messages)
+        time.sleep(self.first_token_latency + self._token_delay * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_latency)
+        for token in self._answer(messages):
+            time.sleep(self._token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    # ─── Assíncrono (não ocupa threads enquanto "espera a rede") ─────────────
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._answer(messages)
+        await asyncio.sleep(self.first_token_latency + self._token_delay * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_latency)
+        for token in self._answer(messages):
+            await asyncio.sleep(self._token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
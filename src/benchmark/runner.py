@@ -0,0 +1,489 @@
+"""
+Runner — Executa as fases do benchmark e monta o relatório JSON.
+
+FASES:
+    1. ingest      → indexação completa do corpus sintético (tempo, chunks/s)
+    2. retrieval   → latência de search() por tipo de busca:
+                     "cold" (consultas inéditas) e "warm" (as mesmas de novo,
+                     servidas pelo cache de resultados), e a diversidade
+                     do top k (redundância média entre os resultados)
+    3. concurrency → QPS de search() com N threads simultâneas
+    3b. filtered   → busca restrita a um documento (`where`) × busca no
+                     corpus inteiro: latência e precisão (fração do top k
+                     vinda do documento certo)
+    3c. flat_index → índices planos (flat_store.py) × HNSW do Chroma:
+                     int8 e força bruta exata (numpy) — recall@k,
+                     latência da busca vetorial (também em lote) e memória
+    4. rag         → latência da chain RAG (LLM falso) e QPS do caminho
+                     assíncrono (o mesmo das tools MCP), mais a tool
+                     search_documents do servidor MCP
+
+LATÊNCIA EM PERCENTIS:
+    A média esconde a cauda. p50 é a experiência típica; p95/p99 são os
+    usuários azarados — e com várias chamadas por requisição, quase todo
+    mundo cai na cauda de alguma delas.
+
+MEMÓRIA:
+    ru_maxrss é o PICO de memória residente do processo até aquele ponto.
+    Registramos o pico ao fim de cada fase: o salto entre fases mostra
+    quem alocou.
+
+IMPORTANTE:
+    settings é lido no import. O script (scripts/benchmark.py) define
+    VECTOR_STORE_DIR / CACHE_DIR para um diretório temporário ANTES de
+    importar este módulo — o benchmark nunca toca o índice real.
+"""
+
+import asyncio
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from src.benchmark.corpus import SyntheticCorpus, generate_corpus
+from src.benchmark.fake_llm import FakeChatModel
+from src.config.settings import settings
+from src.langchain_rag.chain import create_rag_chain
+from src.langchain_rag.embeddings import _DEFAULT_MODEL, get_embeddings
+from src.langchain_rag.flat_store import build_flat_index
+from src.langchain_rag.indexing import index_documents
+from src.langchain_rag.retrieval import load_shard_stores, search
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class BenchmarkConfig:
+    """Parâmetros de uma execução do benchmark."""
+
+    num_files: int = 200
+    sections: int = 6
+    seed: int = 42
+    include_data: bool = True
+    workers: int | None = None
+    queries: int = 100
+    top_k: int = 5
+    search_types: list[str] = field(default_factory=lambda: ["similarity", "hybrid", "mmr"])
+    concurrency: int = 8
+    rag_queries: int = 20
+    llm_latency: float = 0.2
+    llm_tokens_per_second: float = 200.0
+
+
+# ─── Medidas ─────────────────────────────────────────────────────────────────
+
+def latency_stats(samples: list[float]) -> dict:
+    """Estatísticas de latência (entrada em segundos, saída em ms)."""
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float | None:
+    """Pico de memória residente do processo (MB), ou None se indisponível."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB; macOS em bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _timed(func: Callable, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _distinct(queries: list[str], count: int, offset: int = 0) -> list[str]:
+    """
+    `count` consultas distintas a partir de `offset`.
+
+    Se o corpus tem menos consultas que o pedido, repete com um sufixo
+    (" #2", " #3"...): o texto muda, então o cache de resultados não as
+    reaproveita e medimos sempre o caminho sem cache.
+    """
+    result = []
+    for i in range(offset, offset + count):
+        query = queries[i % len(queries)]
+        round_ = i // len(queries)
+        result.append(query if round_ == 0 else f"{query} #{round_ + 1}")
+    return result
+
+
+# ─── Fases ───────────────────────────────────────────────────────────────────
+
+def bench_ingest(corpus: SyntheticCorpus, workers: int | None) -> dict:
+    start = time.perf_counter()
+    report = index_documents(corpus.directory, full=True, workers=workers)
+    elapsed = time.perf_counter() - start
+    return {
+        "files": corpus.files,
+        "bytes": corpus.bytes,
+        "chunks": report.chunks_total,
+        "seconds": round(elapsed, 3),
+        "chunks_per_second": round(report.chunks_total / elapsed, 1) if elapsed else None,
+    }
+
+
+def bench_retrieval(queries: list[str], search_type: str, top_k: int) -> dict:
+    cold = [_timed(search, query, top_k, search_type=search_type) for query in queries]
+    warm = [_timed(search, query, top_k, search_type=search_type) for query in queries]
+    return {
+        "cold": latency_stats(cold),
+        "warm": latency_stats(warm),
+        "redundancy": _redundancy(queries, search_type, top_k),
+    }
+
+
+def _redundancy(queries: list[str], search_type: str, top_k: int) -> float:
+    """
+    Similaridade cosseno média entre pares de resultados do mesmo top k.
+
+    Quanto menor, mais diverso o contexto (MMR deve reduzir). As buscas
+    já estão no cache; só os textos dos resultados são embeddados.
+    """
+    embeddings = get_embeddings()
+    values = []
+    for query in queries:
+        docs = search(query, top_k, search_type=search_type)
+        if len(docs) < 2:
+            continue
+        vectors = np.asarray(embeddings.embed_documents([doc.page_content for doc in docs]))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        similarity = vectors @ vectors.T
+        pairs = np.triu_indices(len(docs), k=1)
+        values.append(float(similarity[pairs].mean()))
+    return round(float(np.mean(values)), 4) if values else 0.0
+
+
+def bench_filtered_search(queries: list[str], top_k: int) -> dict:
+    """
+    Busca com e sem filtro de metadados para consultas com documento-alvo conhecido.
+
+    As consultas "O que diz a POL-0042?" têm resposta em synthetic/doc-00042.md:
+    a precisão é a fração do top k que vem desse arquivo.
+    """
+    targets = []
+    for query in queries:
+        match = re.search(r"POL-(\d{4})", query)
+        if match:
+            targets.append((query, f"synthetic/doc-{int(match.group(1)):05d}.md"))
+    if not targets:
+        return {"count": 0}
+
+    results = {}
+    for name, use_filter in (("unfiltered", False), ("filtered", True)):
+        latencies, precision = [], []
+        for query, source_path in targets:
+            # Sufixo distinto por variante: as duas medem o caminho sem cache
+            where = {"source_path": source_path} if use_filter else None
+            start = time.perf_counter()
+            docs = search(f"{query} ({name})", top_k, where=where)
+            latencies.append(time.perf_counter() - start)
+            hits = sum(doc.metadata.get("source_path") == source_path for doc in docs)
+            precision.append(hits / len(docs) if docs else 0.0)
+        results[name] = {
+            "latency": latency_stats(latencies),
+            "precision": round(float(np.mean(precision)), 4),
+        }
+    return results
+
+
+def bench_flat_index(queries: list[str], top_k: int) -> dict:
+    """
+    Índices planos (int8 e numpy) × HNSW do Chroma, com os mesmos vetores.
+
+    recall = fração do top k do Chroma que o índice plano também traz.
+    Mede só a busca vetorial (as perguntas são embeddadas antes);
+    batch_ms_per_query é a força bruta com TODAS as perguntas num produto
+    de matrizes. Na memória, scan_mb é o que a 1ª passada int8 percorre
+    (códigos + escalas); float32_mb é a matriz da força bruta. Com
+    sharding, compara dentro do maior shard.
+    """
+    shard, store = max(load_shard_stores(), key=lambda item: item[1]._collection.count())
+    start = time.perf_counter()
+    index = build_flat_index(store, shard=shard)
+    build_seconds = time.perf_counter() - start
+    vectors = np.asarray(get_embeddings().embed_documents(queries), dtype=np.float32)
+
+    chroma_latencies, expected_ids = [], []
+    for vector in vectors:
+        start = time.perf_counter()
+        result = store._collection.query(
+            query_embeddings=[vector.tolist()], n_results=top_k, include=[]
+        )
+        chroma_latencies.append(time.perf_counter() - start)
+        expected_ids.append(set(result["ids"][0]))
+
+    def _flat(exact: bool) -> tuple[list[float], float | None]:
+        latencies, recall = [], []
+        for vector, expected in zip(vectors, expected_ids):
+            start = time.perf_counter()
+            rows, _ = index.search(vector, top_k, exact=exact)[0]
+            latencies.append(time.perf_counter() - start)
+            if expected:
+                recall.append(len(expected & set(index.ids_at(rows))) / len(expected))
+        return latencies, round(float(np.mean(recall)), 4) if recall else None
+
+    int8_latencies, int8_recall = _flat(exact=False)
+    exact_latencies, exact_recall = _flat(exact=True)
+    start = time.perf_counter()
+    index.search(vectors, top_k, exact=True)
+    batch_seconds = time.perf_counter() - start
+
+    # Segmentos do Chroma (HNSW) são os subdiretórios; o SQLite guarda textos e metadados
+    hnsw_bytes = sum(
+        path.stat().st_size
+        for directory in settings.vector_store_dir.iterdir()
+        if directory.is_dir() and directory.name != "flat"
+        for path in directory.rglob("*") if path.is_file()
+    )
+    footprint = index.footprint()
+    megabyte = 1024 * 1024
+    return {
+        "chunks": len(index),
+        "chroma": {
+            "latency": latency_stats(chroma_latencies),
+            "hnsw_disk_mb": round(hnsw_bytes / megabyte, 2),
+        },
+        "int8": {
+            "latency": latency_stats(int8_latencies),
+            "recall": int8_recall,
+            "build_seconds": round(build_seconds, 3),
+            "scan_mb": round((footprint["codes"] + footprint["scales"]) / megabyte, 2),
+            "disk_mb": round(sum(footprint.values()) / megabyte, 2),
+        },
+        "numpy": {
+            "latency": latency_stats(exact_latencies),
+            "recall": exact_recall,
+            "batch_ms_per_query": round(batch_seconds * 1000 / max(len(vectors), 1), 4),
+            "float32_mb": round(footprint["vectors"] / megabyte, 2),
+        },
+    }
+
+
+def bench_concurrent_search(
+    queries: list[str], search_type: str, top_k: int, concurrency: int
+) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(
+            pool.map(lambda query: _timed(search, query, top_k, search_type=search_type), queries)
+        )
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "qps": round(len(queries) / elapsed, 2),
+        "latency": latency_stats(latencies),
+    }
+
+
+async def _gather_limited(coroutine_factory: Callable, items: list, concurrency: int) -> list:
+    """Executa coroutine_factory(item) para cada item, no máximo N ao mesmo tempo."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(item) -> float:
+        async with semaphore:
+            start = time.perf_counter()
+            await coroutine_factory(item)
+            return time.perf_counter() - start
+
+    return await asyncio.gather(*(_one(item) for item in items))
+
+
+def bench_rag(queries: list[str], config: BenchmarkConfig) -> dict:
+    llm = FakeChatModel(
+        first_token_latency=config.llm_latency,
+        tokens_per_second=config.llm_tokens_per_second,
+    )
+    chain = create_rag_chain(use_cache=False, llm=llm)
+
+    half = len(queries) // 2
+    sequential = [_timed(chain.invoke, query) for query in queries[:half]]
+
+    async_queries = queries[half:]
+    start = time.perf_counter()
+    latencies = asyncio.run(_gather_limited(chain.ainvoke, async_queries, config.concurrency))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "llm": {
+            "first_token_latency_s": config.llm_latency,
+            "tokens_per_second": config.llm_tokens_per_second,
+        },
+        "sequential": latency_stats(sequential),
+        "async": {
+            "concurrency": config.concurrency,
+            "qps": round(len(async_queries) / elapsed, 2) if elapsed else None,
+            "latency": latency_stats(latencies),
+        },
+    }
+
+
+def bench_mcp_search(queries: list[str], top_k: int, concurrency: int) -> dict:
+    """Tool search_documents do servidor MCP (chamada direta, sem transporte)."""
+    from src.mcp_server.server import search_documents
+
+    start = time.perf_counter()
+    latencies = asyncio.run(
+        _gather_limited(lambda query: search_documents(query, top_k=top_k), queries, concurrency)
+    )
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "qps": round(len(queries) / elapsed, 2),
+        "latency": latency_stats(latencies),
+    }
+
+
+# ─── Execução completa ───────────────────────────────────────────────────────
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(
+    config: BenchmarkConfig,
+    corpus_dir: Path,
+    log: Callable[[str], None] = print,
+) -> dict:
+    """
+    Executa todas as fases e retorna o relatório (serializável em JSON).
+
+    Args:
+        config: Parâmetros da execução.
+        corpus_dir: Onde gerar o corpus sintético.
+        log: Função para mensagens de progresso.
+    """
+    results: dict = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "embedding_model": _DEFAULT_MODEL,
+            "retrieval_mode": settings.retrieval_mode,
+            "shard_by": settings.shard_by,
+            "config": asdict(config),
+        },
+        "memory_peak_mb": {},
+    }
+
+    log(f"📝 Gerando corpus sintético ({config.num_files} arquivos)...")
+    corpus = generate_corpus(
+        corpus_dir,
+        num_files=config.num_files,
+        sections=config.sections,
+        seed=config.seed,
+        include_data_dir=settings.data_dir if config.include_data else None,
+    )
+    get_embeddings()  # Carrega o modelo fora da medição da ingestão
+    results["memory_peak_mb"]["startup"] = peak_rss_mb()
+
+    log("📥 Fase 1: ingestão...")
+    results["ingest"] = bench_ingest(corpus, config.workers)
+    results["memory_peak_mb"]["ingest"] = peak_rss_mb()
+
+    offset = 0
+    results["retrieval"] = {}
+    results["concurrency"] = {}
+    for search_type in config.search_types:
+        log(f"🔍 Fase 2: busca ({search_type})...")
+        queries = _distinct(corpus.queries, config.queries, offset)
+        offset += config.queries
+        results["retrieval"][search_type] = bench_retrieval(queries, search_type, config.top_k)
+
+        log(f"⚡ Fase 3: busca concorrente ({search_type}, {config.concurrency} threads)...")
+        queries = _distinct(corpus.queries, config.queries, offset)
+        offset += config.queries
+        results["concurrency"][search_type] = bench_concurrent_search(
+            queries, search_type, config.top_k, config.concurrency
+        )
+    log("🎯 Fase 3b: busca com filtro de metadados...")
+    code_queries = [query for query in corpus.queries if "POL-" in query]
+    results["filtered"] = bench_filtered_search(code_queries[:config.queries], config.top_k)
+    log("🗜️  Fase 3c: índices planos (int8, numpy) × Chroma...")
+    results["flat_index"] = bench_flat_index(
+        _distinct(corpus.queries, config.queries), config.top_k
+    )
+    results["memory_peak_mb"]["retrieval"] = peak_rss_mb()
+
+    log("🤖 Fase 4: RAG (LLM falso) e tools MCP...")
+    results["rag"] = bench_rag(_distinct(corpus.queries, config.rag_queries, offset), config)
+    offset += config.rag_queries
+    results["mcp_search_documents"] = bench_mcp_search(
+        _distinct(corpus.queries, config.queries, offset), config.top_k, config.concurrency
+    )
+    results["memory_peak_mb"]["rag"] = peak_rss_mb()
+
+    return results
+
+
+# ─── Comparação entre execuções ──────────────────────────────────────────────
+
+# Métricas em que "maior é melhor" (o resto — latências, tempos, memória — é o contrário)
+_HIGHER_IS_BETTER = ("qps", "chunks_per_second", "precision", "recall")
+
+
+def _flatten(data: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def compare_results(old: dict, new: dict, threshold: float = 0.10) -> list[str]:
+    """
+    Compara duas execuções métrica a métrica.
+
+    Returns:
+        Linhas "métrica: antes → depois (±x%)", marcando com ⚠️ as
+        pioras acima de `threshold` (10% por padrão).
+    """
+    old_flat = _flatten({k: v for k, v in old.items() if k != "meta"})
+    new_flat = _flatten({k: v for k, v in new.items() if k != "meta"})
+
+    lines = []
+    for path in sorted(old_flat.keys() & new_flat.keys()):
+        before, after = old_flat[path], new_flat[path]
+        if before == after or path.endswith(".count") or "config" in path:
+            continue
+        change = (after - before) / before if before else float("inf")
+        higher_is_better = path.rsplit(".", 1)[-1] in _HIGHER_IS_BETTER
+        worse = change < -threshold if higher_is_better else change > threshold
+        marker = "⚠️ " if worse else "   "
+        lines.append(f"{marker}{path}: {before:g} → {after:g} ({change:+.1%})")
+    return lines
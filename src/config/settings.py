@@ -40,6 +40,113 @@ class Settings:
     project_root: Path = _PROJECT_ROOT
     data_dir: Path = _PROJECT_ROOT / "data"
 
+    # Diretório de persistência do ChromaDB (e do manifesto de ingestão)
+    vector_store_dir: Path = Path(
+        os.getenv("VECTOR_STORE_DIR", str(_PROJECT_ROOT / "vector_store"))
+    )
+
+    # Caches locais (embeddings etc.) — podem ser apagados sem perda de dados
+    cache_dir: Path = Path(os.getenv("CACHE_DIR", str(_PROJECT_ROOT / ".cache")))
+
+    # Ingestão: nº de processos para ler/dividir arquivos e tamanho dos
+    # lotes de chunks enviados ao embedding + upsert
+    ingest_workers: int = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+    ingest_batch_size: int = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+
+    # Chunking: "markdown" (seções Markdown, tamanho em tokens do modelo) ou
+    # "recursive" (RecursiveCharacterTextSplitter, 800 caracteres). No modo
+    # markdown, CHUNK_MAX_TOKENS é a janela do modelo (com [CLS]/[SEP])
+    chunk_strategy: str = os.getenv("CHUNK_STRATEGY", "markdown")
+    chunk_max_tokens: int = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+    chunk_overlap_tokens: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+    # Embedding em lotes: tamanho do lote, threads intra-op do torch
+    # (0 = padrão do torch) e agrupamento por comprimento em tokens
+    embed_batch_size: int = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    embed_num_threads: int = int(os.getenv("EMBED_NUM_THREADS", "0"))
+    embed_length_bucketing: bool = os.getenv("EMBED_LENGTH_BUCKETING", "true").lower() == "true"
+
+    # Backend da busca vetorial: "chroma" (HNSW), "int8" (índice plano com
+    # códigos int8 em memmap, ver flat_store.py) ou "numpy" (força bruta exata
+    # na matriz float32 em memmap — coleções pequenas/médias). No modo int8, os
+    # FLAT_RESCORE_CANDIDATES melhores da 1ª passada são reavaliados em float32
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "chroma")
+    flat_rescore_candidates: int = int(os.getenv("FLAT_RESCORE_CANDIDATES", "100"))
+
+    # Sharding: "none" (uma collection), "hash" (VECTOR_SHARDS collections, por
+    # hash do arquivo) ou "directory" (uma por diretório de 1º nível de data/).
+    # As buscas consultam os shards em paralelo (SHARD_WORKERS threads)
+    shard_by: str = os.getenv("SHARD_BY", "none")
+    vector_shards: int = int(os.getenv("VECTOR_SHARDS", "4"))
+    shard_workers: int = int(os.getenv("SHARD_WORKERS", "8"))
+
+    # Recuperação: "similarity" (só vetorial), "hybrid" (vetorial + BM25)
+    # ou "mmr" (vetorial diversificada)
+    retrieval_mode: str = os.getenv("RETRIEVAL_MODE", "similarity")
+    # MMR: candidatos considerados e peso da relevância (1 = sem diversificar)
+    mmr_fetch_k: int = int(os.getenv("MMR_FETCH_K", "40"))
+    mmr_lambda: float = float(os.getenv("MMR_LAMBDA", "0.5"))
+    # Busca híbrida: candidatos por lista e pesos da fusão (RRF)
+    hybrid_fetch_k: int = int(os.getenv("HYBRID_FETCH_K", "20"))
+    hybrid_dense_weight: float = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+    hybrid_sparse_weight: float = float(os.getenv("HYBRID_SPARSE_WEIGHT", "1.0"))
+    hybrid_rrf_k: int = int(os.getenv("HYBRID_RRF_K", "60"))
+
+    # Reranking com cross-encoder local: candidatos buscados, lote por passada,
+    # orçamento de latência (estourado → ordem da busca) e cache de scores.
+    # Modelo multilíngue (melhor para PT): cross-encoder/mmarco-mMiniLMv2-L12-H384-v1
+    rerank_enabled: bool = os.getenv("RERANK", "false").lower() == "true"
+    rerank_model: str = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    rerank_candidates: int = int(os.getenv("RERANK_CANDIDATES", "30"))
+    rerank_batch_size: int = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+    rerank_budget_ms: float = float(os.getenv("RERANK_BUDGET_MS", "500"))
+    rerank_cache_size: int = int(os.getenv("RERANK_CACHE_SIZE", "4096"))
+
+    # Histórico da conversa: orçamento em tokens, turnos recentes literais e
+    # teto do resumo dos turnos antigos
+    history_max_tokens: int = int(os.getenv("HISTORY_MAX_TOKENS", "1500"))
+    history_keep_turns: int = int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+    history_summary_max_tokens: int = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "300"))
+
+    # Reformulação de perguntas de acompanhamento antes da busca (chat com memória)
+    query_rewrite_enabled: bool = os.getenv("QUERY_REWRITE", "true").lower() == "true"
+    query_rewrite_cache_size: int = int(os.getenv("QUERY_REWRITE_CACHE_SIZE", "256"))
+
+    # Contexto do prompt: orçamento em tokens dos trechos recuperados e limiar
+    # de similaridade (Jaccard de trigramas) para descartar quase-duplicatas
+    context_max_tokens: int = int(os.getenv("CONTEXT_MAX_TOKENS", "2000"))
+    context_dedup_threshold: float = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.9"))
+
+    # Servidor MCP: aquece modelo + collection em segundo plano ao iniciar
+    mcp_prewarm: bool = os.getenv("MCP_PREWARM", "false").lower() == "true"
+
+    # Métricas por etapa (tool MCP `stats`); desligue para remover os callbacks
+    metrics_enabled: bool = os.getenv("METRICS", "true").lower() == "true"
+
+    # Busca: cada consulta traz SEARCH_MAX_K candidatos (cacheados em LRU);
+    # pedidos com top_k menor são fatias do mesmo resultado
+    search_max_k: int = int(os.getenv("SEARCH_MAX_K", "20"))
+    search_cache_size: int = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+
+    # Concorrência (caminho assíncrono / MCP): threads para chamadas
+    # bloqueantes (Chroma, embeddings) e máximo de chamadas simultâneas ao Groq
+    io_workers: int = int(os.getenv("IO_WORKERS", "8"))
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    # Perguntas em lote: limite de chamadas ao LLM por minuto (0 = sem limite;
+    # o plano gratuito do Groq aceita ~30)
+    batch_requests_per_minute: float = float(os.getenv("BATCH_REQUESTS_PER_MINUTE", "30"))
+
+    # Cache de embeddings: vetores em disco (SQLite) + LRU em memória
+    embedding_cache_enabled: bool = os.getenv("EMBEDDING_CACHE", "true").lower() == "true"
+    embedding_cache_size: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
+    # Cache de respostas: match exato + semântico (cosseno ≥ limiar),
+    # com expiração (segundos) e nº máximo de entradas
+    answer_cache_enabled: bool = os.getenv("ANSWER_CACHE", "true").lower() == "true"
+    answer_cache_threshold: float = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    answer_cache_ttl: float = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+    answer_cache_size: int = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+
 
 # Instância única de configuração (Singleton simples)
 # Importar assim: from src.config.settings import settings
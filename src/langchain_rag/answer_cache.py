@@ -0,0 +1,324 @@
+"""
+Cache de respostas — Evita repetir retrieval + LLM para a mesma pergunta.
+
+O PROBLEMA:
+    Cada pergunta custa uma busca no Chroma + uma ida e volta ao Groq
+    (segundos). Mas em uso real muitas perguntas se repetem:
+
+        "Quantos dias de férias eu tenho?"
+        "quantos dias de ferias eu tenho"
+        "Quantos dias de férias tenho direito?"
+
+A SOLUÇÃO — cache em 2 níveis:
+    1. EXATO: pergunta normalizada (minúsculas, espaços, pontuação final)
+       → dict. Custo: um lookup.
+    2. SEMÂNTICO: compara o embedding da pergunta com os das perguntas
+       já respondidas. Similaridade de cosseno ≥ limiar (ex: 0.95)
+       → reaproveita a resposta. Custo: um embedding (que o cache de
+       embeddings e o próprio retrieval reaproveitam) + um produto
+       matriz-vetor.
+
+INVALIDAÇÃO:
+    - TTL: respostas expiram depois de N segundos
+    - LRU: acima de N entradas, descarta a menos usada
+    - VERSÃO DO CONTEÚDO: se uma ingestão mudou os documentos (a versão
+      do manifesto mudou), TODAS as respostas ficam potencialmente
+      erradas → o cache é esvaziado automaticamente
+    - CORRIDA COM A INGESTÃO: a versão é lida no miss, antes de gerar a
+      resposta, e passada ao put. Se uma ingestão terminou enquanto o
+      LLM gerava, a resposta veio dos documentos antigos → não é gravada
+
+PERSISTÊNCIA:
+    O cache é salvo em JSON (vetores em base64 float32) e recarregado na
+    inicialização, sobrevivendo a reinícios do servidor MCP.
+"""
+
+import atexit
+import base64
+import json
+import os
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from src.config.settings import settings
+from src.langchain_rag.concurrency import run_blocking
+from src.langchain_rag.embeddings import get_embeddings
+from src.langchain_rag.indexing import get_store_version
+from src.langchain_rag.metrics import registry
+
+# Intervalo mínimo entre gravações em disco (as escritas são agrupadas)
+_SAVE_INTERVAL_SECONDS = 10.0
+
+
+def normalize_question(question: str) -> str:
+    """Normaliza a pergunta para o match exato ("  Férias?? " → "férias")."""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip(" ?!.")
+
+
+@dataclass
+class AnswerCacheStats:
+    """Contadores de uso do cache de respostas."""
+
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    stale_writes: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class _Entry:
+    answer: str
+    vector: array
+    created_at: float
+
+
+class AnswerCache:
+    """
+    Cache de respostas com match exato e semântico.
+
+    Uso:
+        cache = AnswerCache(get_embeddings(), path)
+        cache.get("Quantos dias de férias?")        # None (miss)
+        cache.put("Quantos dias de férias?", "30 dias...")
+        cache.get("quantos dias de ferias eu tenho")  # "30 dias..." (semântico)
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        path: Path | None = None,
+        threshold: float = 0.95,
+        ttl_seconds: float = 86_400,
+        max_entries: int = 1_000,
+    ):
+        self.embeddings = embeddings
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = AnswerCacheStats()
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._matrix: np.ndarray | None = None  # vetores empilhados (reconstruído sob demanda)
+        self._matrix_keys: list[str] = []
+        self._version = get_store_version()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+
+        if path is not None:
+            self._load()
+            atexit.register(self.save)
+
+    # ─── API ─────────────────────────────────────────────────────────────────
+
+    def get(self, question: str) -> str | None:
+        """Retorna a resposta em cache (exata ou semântica) ou None."""
+        key = normalize_question(question)
+        with self._lock:
+            self._check_version()
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.exact_hits += 1
+                return entry.answer
+            if not self._entries:
+                self.stats.misses += 1
+                return None
+
+        vector = np.asarray(self.embeddings.embed_query(key), dtype=np.float32)
+
+        with self._lock:
+            match = self._nearest(vector)
+            if match is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            self.stats.semantic_hits += 1
+            return self._entries[match].answer
+
+    def put(self, question: str, answer: str, version: str | None = None) -> None:
+        """
+        Armazena a resposta de uma pergunta.
+
+        Args:
+            question: Pergunta respondida.
+            answer: Resposta gerada.
+            version: Versão do conteúdo (get_store_version) lida antes de
+                     gerar a resposta. Se o índice mudou desde então, a
+                     resposta é descartada. None = aceita a versão atual.
+        """
+        key = normalize_question(question)
+        vector = array("f", self.embeddings.embed_query(key))
+        with self._lock:
+            self._check_version()
+            if version is not None and version != self._version:
+                self.stats.stale_writes += 1
+                return
+            self._entries[key] = _Entry(answer=answer, vector=vector, created_at=time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+            self._dirty = True
+        if time.time() - self._last_save >= _SAVE_INTERVAL_SECONDS:
+            self.save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._dirty = True
+
+    # ─── Busca semântica ─────────────────────────────────────────────────────
+
+    def _nearest(self, vector: np.ndarray) -> str | None:
+        """Pergunta em cache mais similar (cosseno ≥ limiar), ou None."""
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries)
+            self._matrix = np.stack(
+                [np.frombuffer(self._entries[key].vector, dtype=np.float32)
+                 for key in self._matrix_keys]
+            )
+        # Vetores normalizados: cosseno = produto escalar
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        key = self._matrix_keys[best]
+        return key if key in self._entries else None
+
+    # ─── Invalidação ─────────────────────────────────────────────────────────
+
+    def _check_version(self) -> None:
+        """Esvazia o cache se o conteúdo indexado mudou desde que foi preenchido."""
+        version = get_store_version()
+        if version != self._version:
+            self._entries.clear()
+            self._matrix = None
+            self._version = version
+            self._dirty = True
+            self.stats.invalidations += 1
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+            self._dirty = True
+
+    # ─── Persistência ────────────────────────────────────────────────────────
+
+    def save(self) -> None:
+        """Grava o cache em disco (atômico; no-op se nada mudou)."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": self._version,
+                "entries": [
+                    {
+                        "question": key,
+                        "answer": entry.answer,
+                        "vector": base64.b64encode(entry.vector.tobytes()).decode("ascii"),
+                        "created_at": entry.created_at,
+                    }
+                    for key, entry in self._entries.items()
+                ],
+            }
+            self._dirty = False
+            self._last_save = time.time()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("version") != self._version:
+            return  # Documentos mudaram desde a gravação: cache inválido
+        for item in data.get("entries", []):
+            vector = array("f")
+            vector.frombytes(base64.b64decode(item["vector"]))
+            self._entries[item["question"]] = _Entry(
+                answer=item["answer"], vector=vector, created_at=item["created_at"]
+            )
+        self._expire()
+
+
+def with_answer_cache(chain: Runnable, cache: AnswerCache) -> Runnable:
+    """
+    Envolve uma chain (pergunta → resposta) com o cache de respostas.
+
+    O resultado continua sendo um Runnable: .invoke() e .ainvoke()
+    funcionam como antes, mas só chamam a chain em caso de miss. A versão
+    do conteúdo é lida no miss e conferida no put: uma resposta gerada
+    durante uma ingestão não é gravada como válida para o índice novo.
+    """
+
+    def _invoke(question: str, config: RunnableConfig) -> str:
+        answer = cache.get(question)
+        if answer is None:
+            version = get_store_version()
+            answer = chain.invoke(question, config)
+            cache.put(question, answer, version=version)
+        return answer
+
+    async def _ainvoke(question: str, config: RunnableConfig) -> str:
+        # get/put embedam a pergunta (bloqueante): vão para o pool de threads
+        answer = await run_blocking(cache.get, question)
+        if answer is None:
+            version = await run_blocking(get_store_version)
+            answer = await chain.ainvoke(question, config)
+            await run_blocking(cache.put, question, answer, version=version)
+        return answer
+
+    return RunnableLambda(_invoke, afunc=_ainvoke, name="answer_cache")
+
+
+# Instância única por processo: a chain do MCP e a do CLI compartilham o cache
+_cache: AnswerCache | None = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """Retorna o cache de respostas persistido (configurado via settings)."""
+    global _cache
+    if _cache is None:
+        _cache = AnswerCache(
+            get_embeddings(),
+            path=settings.cache_dir / "answers.json",
+            threshold=settings.answer_cache_threshold,
+            ttl_seconds=settings.answer_cache_ttl,
+            max_entries=settings.answer_cache_size,
+        )
+    return _cache
+
+
+registry.register_collector(
+    "answer_cache",
+    lambda: {"answer_cache": _cache.stats.as_dict()} if _cache is not None else {},
+)
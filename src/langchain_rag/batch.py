@@ -0,0 +1,165 @@
+"""
+Perguntas em lote — Centenas de perguntas sem pagar o custo de cada uma.
+
+O PROBLEMA:
+    O conjunto semanal de regressão tem centenas de perguntas de RH.
+    Uma por vez (ask_question ou o REPL), cada pergunta paga sozinha:
+    embedding da pergunta → busca no Chroma → leitura dos chunks →
+    ida ao Groq, esperando a anterior terminar.
+
+A SOLUÇÃO — cada etapa em lote:
+
+    perguntas ──▶ 1 embedding ──▶ 1 consulta ──▶ chunks únicos ──▶ LLM concorrente
+     (N)          (N vetores)     (N rankings)    (lidos 1 vez)      (limite de taxa)
+                                                                          │
+                                             JSONL por pergunta ◀─────────┘
+                                             (na ordem em que terminam)
+
+    1. EMBEDDING: todas as perguntas numa chamada (lotes do modelo, ver
+       embeddings.py) em vez de N embed_query.
+    2. BUSCA: o Chroma aceita várias consultas de uma vez
+       (query_embeddings=[...]) — uma ida ao índice para o lote todo.
+       Com VECTOR_BACKEND=int8/numpy, é um produto de matrizes no índice plano
+       (flat_store.py). Com sharding, uma consulta por shard, em paralelo.
+    3. DEDUPLICAÇÃO: perguntas parecidas trazem os mesmos chunks. Cada
+       chunk distinto vira UM Document, compartilhado entre as perguntas.
+    4. LLM: todas as perguntas seguem em paralelo, limitadas pelo
+       semáforo de concorrência (concurrency.py) e por um limite de
+       requisições por minuto (BATCH_REQUESTS_PER_MINUTE) — o rate limit
+       do Groq não estoura com HTTP 429.
+
+    Cada resultado sai assim que fica pronto, com os tempos da pergunta.
+    Os modos "hybrid" e "mmr" buscam pergunta a pergunta (via search(),
+    em threads); o resto do lote funciona igual.
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+from src.config.settings import settings
+from src.langchain_rag.chain import _format_docs, create_answer_chain
+from src.langchain_rag.concurrency import run_blocking
+from src.langchain_rag.embeddings import get_embeddings
+from src.langchain_rag.metrics import stage_timer
+from src.langchain_rag.retrieval import search, vector_search
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def retrieve_batch(
+    questions: list[str],
+    k: int = 5,
+    *,
+    search_type: str | None = None,
+    where: dict | None = None,
+) -> list[list[Document]]:
+    """
+    Chunks de cada pergunta, buscados em lote.
+
+    Returns:
+        Uma lista de Documents por pergunta (mesma ordem). Chunks
+        compartilhados entre perguntas são o MESMO objeto — trate-os
+        como somente leitura.
+    """
+    search_type = search_type or settings.retrieval_mode
+    if search_type != "similarity":
+        return [search(question, k, search_type=search_type, where=where) for question in questions]
+    if not questions:
+        return []
+
+    # O modelo é simétrico (mesmo encode para pergunta e documento):
+    # embed_documents embeda o lote inteiro de uma vez
+    with stage_timer("embed_query"):
+        vectors = get_embeddings().embed_documents(questions)
+    return vector_search(vectors, k, where)
+
+
+async def aanswer_batch(
+    questions: list[str],
+    *,
+    top_k: int = 5,
+    search_type: str | None = None,
+    where: dict | None = None,
+    llm: BaseChatModel | None = None,
+    requests_per_minute: float | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Responde um lote de perguntas, entregando cada resultado ao terminar.
+
+    Uso:
+        async for result in aanswer_batch(perguntas):
+            arquivo.write(json.dumps(result, ensure_ascii=False) + "\\n")
+
+    Args:
+        questions: Perguntas do lote.
+        top_k: Chunks por pergunta.
+        search_type: "similarity" (busca em lote), "hybrid" ou "mmr".
+                     Padrão: settings.retrieval_mode
+        where: Filtro de metadados aplicado a todas as buscas.
+        llm: Modelo a usar. Padrão: get_llm() (Groq)
+        requests_per_minute: Limite de chamadas ao LLM (0 = sem limite).
+                             Padrão: settings.batch_requests_per_minute
+
+    Yields:
+        {"index", "question", "answer", "sources", "error", "timings"}.
+        timings (ms): retrieval (da etapa em lote, comum a todas),
+        wait (fila do limite de taxa), llm e total (desde o início do lote).
+    """
+    started = time.perf_counter()
+    docs_per_question = await run_blocking(
+        retrieve_batch, questions, top_k, search_type=search_type, where=where
+    )
+    retrieval_ms = _ms(time.perf_counter() - started)
+
+    rpm = settings.batch_requests_per_minute if requests_per_minute is None else requests_per_minute
+    limiter = InMemoryRateLimiter(requests_per_second=rpm / 60) if rpm > 0 else None
+    answer_chain = create_answer_chain(llm=llm)
+
+    async def answer(index: int, question: str, docs: list[Document]) -> dict:
+        result = {
+            "index": index,
+            "question": question,
+            "answer": None,
+            "sources": list(dict.fromkeys(
+                doc.metadata.get("source_path") or Path(doc.metadata.get("source", "?")).name
+                for doc in docs
+            )),
+            "error": None,
+        }
+        queued = time.perf_counter()
+        if limiter is not None:
+            await limiter.aacquire()
+        llm_start = time.perf_counter()
+        try:
+            result["answer"] = await answer_chain.ainvoke(
+                {"context": _format_docs(docs), "question": question}
+            )
+        except Exception as error:  # uma pergunta com erro não derruba o lote
+            result["error"] = f"{type(error).__name__}: {error}"
+        finished = time.perf_counter()
+        result["timings"] = {
+            "retrieval_ms": retrieval_ms,
+            "wait_ms": _ms(llm_start - queued),
+            "llm_ms": _ms(finished - llm_start),
+            "total_ms": _ms(finished - started),
+        }
+        return result
+
+    tasks = [
+        asyncio.ensure_future(answer(index, question, docs))
+        for index, (question, docs) in enumerate(zip(questions, docs_per_question))
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:  # consumidor parou no meio: não deixa chamadas órfãs
+            task.cancel()
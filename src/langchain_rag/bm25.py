@@ -0,0 +1,293 @@
+"""
+BM25 — Índice invertido para busca por palavras exatas.
+
+POR QUE BUSCA LÉXICA, SE JÁ TEMOS EMBEDDINGS:
+    Embeddings capturam SIGNIFICADO: "férias" ≈ "descanso remunerado".
+    Mas são fracos com termos EXATOS: códigos de política ("POL-123"),
+    nomes de produtos, números. Para o modelo, "POL-123" e "POL-124"
+    são quase o mesmo vetor.
+
+    BM25 é o algoritmo clássico dos buscadores (Lucene, Elasticsearch):
+    pontua documentos pelos termos da consulta que eles contêm.
+
+        score(doc) = Σ  idf(termo) × tf × (k1 + 1)
+                   termo  ─────────────────────────────────────────
+                           tf + k1 × (1 - b + b × len(doc) / média)
+
+    - tf: quantas vezes o termo aparece no chunk
+    - idf: termos raros valem mais ("POL-123" > "empresa")
+    - len/média: normaliza chunks longos (que contêm "tudo")
+
+ÍNDICE INVERTIDO:
+    Em vez de "documento → termos", guardamos "termo → documentos":
+
+        "ferias"  → [(chunk_a, tf=3), (chunk_f, tf=1)]
+        "pol-123" → [(chunk_c, tf=1)]
+
+    Uma consulta só toca as listas dos SEUS termos — o custo depende
+    do nº de ocorrências dos termos, não do tamanho do corpus.
+
+    Persistimos em SQLite (ao lado do Chroma, em vector_store/):
+    - Tabela de postings com chave primária (term, doc_id) → B-tree
+      agrupada por termo: ler a lista de um termo é uma varredura contígua
+    - O cálculo do BM25 roda DENTRO do SQLite (SUM/GROUP BY em C),
+      sem trazer milhões de linhas para o Python
+    - Atualização incremental: add()/delete() por ID de chunk
+    - Nº de chunks e soma dos tamanhos numa tabela de uma linha (stats),
+      atualizada na mesma transação das escritas: a busca lê os dois
+      em O(1), sem varrer a tabela docs
+"""
+
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+from src.config.settings import settings
+
+# Parâmetros clássicos do BM25 (valores padrão do Lucene)
+_K1 = 1.2
+_B = 0.75
+
+# Palavras muito frequentes em português — não ajudam a distinguir chunks
+_STOPWORDS = frozenset(
+    "a ao aos as com como da das de do dos e em entre ha na nas no nos o os ou "
+    "para pela pelas pelo pelos por que qual quais se sem sao ser seu sua um uma "
+    "uns umas eu voce tem ter nao mais muito ja foi esta este essa esse isso".split()
+)
+
+# Termos: sequências alfanuméricas, mantendo códigos como "pol-123" ou "3.5"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+_DB_PATH = settings.vector_store_dir / "bm25.sqlite"
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Normaliza e quebra um texto em termos.
+
+    - minúsculas e sem acentos ("Férias" → "ferias")
+    - códigos compostos geram o termo inteiro E as partes:
+      "POL-123" → ["pol-123", "pol", "123"]
+    - stopwords removidas
+    """
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    normalized = "".join(char for char in normalized if not unicodedata.combining(char))
+
+    tokens = []
+    for match in _TOKEN_RE.finditer(normalized):
+        token = match.group()
+        if token not in _STOPWORDS:
+            tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(
+                part for part in re.split(r"[-_./]", token) if part and part not in _STOPWORDS
+            )
+    return tokens
+
+
+class BM25Index:
+    """
+    Índice BM25 persistido em SQLite.
+
+    Uso:
+        index = BM25Index(path)
+        index.add(["id1", "id2"], ["texto do chunk 1", "texto do chunk 2"])
+        index.search("política POL-123", k=10)  # → [("id1", 4.2), ...]
+    """
+
+    def __init__(self, path: Path = _DB_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                id TEXT PRIMARY KEY,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                docs INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            """
+        )
+        # Índices criados antes da tabela stats: calcula a linha uma vez
+        if self._db.execute("SELECT 1 FROM stats").fetchone() is None:
+            self._db.execute(
+                "INSERT INTO stats (id, docs, total_length)"
+                " SELECT 0, COUNT(*), COALESCE(SUM(length), 0) FROM docs"
+            )
+        self._db.commit()
+
+    # ─── Escrita ─────────────────────────────────────────────────────────────
+
+    def add(self, ids: list[str], texts: list[str]) -> None:
+        """
+        Indexa chunks. IDs já indexados são ignorados.
+
+        Os IDs são derivados do conteúdo (ver pipeline.make_chunk_ids):
+        mesmo ID = mesmo texto, então não há o que atualizar.
+        """
+        with self._lock, self._db:
+            existing = self._existing(ids)
+            added = added_length = 0
+            for doc_id, text in zip(ids, texts):
+                if doc_id in existing:
+                    continue
+                existing.add(doc_id)
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                added += 1
+                added_length += length
+                self._db.execute(
+                    "INSERT INTO docs (id, length) VALUES (?, ?)", (doc_id, length)
+                )
+                self._db.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, doc_id, tf) for term, tf in counts.items()],
+                )
+                self._db.executemany(
+                    "INSERT INTO terms (term, df) VALUES (?, 1)"
+                    " ON CONFLICT (term) DO UPDATE SET df = df + 1",
+                    [(term,) for term in counts],
+                )
+            self._update_stats(added, added_length)
+
+    def delete(self, ids: list[str]) -> None:
+        """Remove chunks do índice (IDs inexistentes são ignorados)."""
+        with self._lock, self._db:
+            removed = removed_length = 0
+            for doc_id in ids:
+                found = self._db.execute(
+                    "SELECT length FROM docs WHERE id = ?", (doc_id,)
+                ).fetchone()
+                if found is None:
+                    continue
+                removed += 1
+                removed_length += found[0]
+                terms = [
+                    row[0]
+                    for row in self._db.execute(
+                        "SELECT term FROM postings WHERE doc_id = ?", (doc_id,)
+                    )
+                ]
+                if not terms:
+                    self._db.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+                    continue
+                self._db.executemany(
+                    "UPDATE terms SET df = df - 1 WHERE term = ?", [(term,) for term in terms]
+                )
+                self._db.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+                self._db.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+            self._db.execute("DELETE FROM terms WHERE df <= 0")
+            self._update_stats(-removed, -removed_length)
+
+    def reset(self) -> None:
+        """Apaga o índice inteiro (reconstrução completa)."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM postings")
+            self._db.execute("DELETE FROM terms")
+            self._db.execute("DELETE FROM docs")
+            self._db.execute("UPDATE stats SET docs = 0, total_length = 0")
+
+    def _update_stats(self, docs: int, length: int) -> None:
+        if docs:
+            self._db.execute(
+                "UPDATE stats SET docs = docs + ?, total_length = total_length + ?",
+                (docs, length),
+            )
+
+    def _existing(self, ids: list[str]) -> set[str]:
+        existing: set[str] = set()
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(f"SELECT id FROM docs WHERE id IN ({placeholders})", batch)
+            existing.update(row[0] for row in rows)
+        return existing
+
+    # ─── Busca ───────────────────────────────────────────────────────────────
+
+    def search(self, query: str, k: int = 10) -> list[tuple[str, float]]:
+        """
+        Retorna os `k` chunks com maior score BM25 para a consulta.
+
+        Returns:
+            Lista de (id do chunk, score), do mais relevante ao menos.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            total_docs, total_length = self._db.execute(
+                "SELECT docs, total_length FROM stats"
+            ).fetchone()
+            if total_docs == 0:
+                return []
+            avg_length = total_length / total_docs or 1.0
+
+            placeholders = ",".join("?" * len(terms))
+            dfs = dict(
+                self._db.execute(
+                    f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms
+                )
+            )
+            if not dfs:
+                return []
+
+            # idf de cada termo da consulta, passado ao SQLite como tabela VALUES
+            idfs = [
+                (term, math.log(1 + (total_docs - df + 0.5) / (df + 0.5)))
+                for term, df in dfs.items()
+            ]
+            values = ",".join("(?, ?)" for _ in idfs)
+            rows = self._db.execute(
+                f"""
+                WITH q(term, idf) AS (VALUES {values})
+                SELECT p.doc_id,
+                       SUM(q.idf * p.tf * ({_K1} + 1)
+                           / (p.tf + {_K1} * (1 - {_B} + {_B} * d.length / ?))) AS score
+                FROM q
+                JOIN postings p ON p.term = q.term
+                JOIN docs d ON d.id = p.doc_id
+                GROUP BY p.doc_id
+                ORDER BY score DESC
+                LIMIT ?
+                """,
+                [value for pair in idfs for value in pair] + [avg_length, k],
+            ).fetchall()
+        return [(doc_id, score) for doc_id, score in rows]
+
+
+# Instância única por processo (mesmo padrão do cache de embeddings). O lock
+# evita que duas primeiras buscas simultâneas (pool do fan-out, threads do
+# MCP) abram duas conexões e criem as tabelas em dobro.
+_index: BM25Index | None = None
+_index_lock = threading.Lock()
+
+
+def get_bm25_index() -> BM25Index:
+    """Retorna o índice BM25 persistido (aberto uma vez por processo)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = BM25Index()
+    return _index
@@ -29,36 +29,182 @@ MEMÓRIA DE CONVERSA:
     User: E o plano de saúde, como funciona?     ← refere-se ao anterior!
     AI: O plano de saúde cobre...                ← responde com contexto!
 
-    Implementamos com um chat_history manual que é passado como
-    variável ao prompt template.
+    O histórico é passado como variável ao prompt template. Em vez de
+    uma lista que cresce para sempre, usamos ConversationMemory (ver
+    history.py): últimos turnos literais + resumo dos antigos, dentro de
+    um orçamento de tokens.
+
+CAMINHO ASSÍNCRONO:
+    As chains funcionam com .invoke() e com await .ainvoke(). No modo
+    assíncrono, a busca (Chroma + embedding, bloqueantes) roda num pool
+    de threads limitado e as chamadas ao Groq passam por um semáforo
+    (ver concurrency.py) — clientes concorrentes não se bloqueiam.
+
+STREAMING COM RETRIEVAL ÚNICO (RagStreamer):
+    chain.stream() já emite tokens, mas esconde os documentos usados.
+    O RagStreamer separa as etapas: busca UMA vez, entrega as fontes
+    e só então transmite a resposta token a token — o usuário vê as
+    fontes e o início da resposta em vez de esperar a geração inteira.
+
+RERANKING:
+    Com RERANK=true, o retriever das chains (e do RagStreamer) busca
+    mais candidatos e os reordena com um cross-encoder antes de ficar
+    com os top k (ver rerank.py) — nada muda na montagem da chain.
+
+MÉTRICAS:
+    As chains retornadas pelas factories saem instrumentadas (ver
+    metrics.py): cada etapa — busca, formatação, prompt, LLM — é
+    cronometrada, e a tool MCP `stats` mostra o resumo.
+
+CACHE DE RESPOSTAS:
+    A chain simples (sem memória) passa por um cache de respostas
+    (ver answer_cache.py): perguntas iguais ou quase iguais às já
+    respondidas não pagam retrieval + LLM de novo. A chain com memória
+    não usa o cache — a resposta depende do histórico.
 """
 
+from collections.abc import AsyncIterator, Iterator
+
 from langchain_core.documents import Document
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables import RunnablePassthrough
-
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda, RunnablePassthrough
+
+from src.config.settings import settings
+from src.langchain_rag.answer_cache import get_answer_cache, with_answer_cache
+from src.langchain_rag.concurrency import limit_llm_concurrency, run_blocking
+from src.langchain_rag.context import pack_context
+from src.langchain_rag.history import ConversationMemory, history_messages
 from src.langchain_rag.llm import get_llm
+from src.langchain_rag.metrics import callback_config, instrument
 from src.langchain_rag.retrieval import get_retriever
+from src.langchain_rag.rewrite import QueryRewriter
 
 
 def _format_docs(docs: list[Document]) -> str:
     """
     Formata documentos recuperados em texto para o prompt.
 
-    Formato: [Fonte: arquivo.md] seguido do conteúdo.
+    Formato: [Fonte: arquivo.md] seguido do conteúdo. Antes, os chunks
+    passam por pack_context (context.py): vizinhos mesclados, duplicatas
+    descartadas e o total limitado a settings.context_max_tokens.
     """
     parts = []
-    for doc in docs:
+    for doc in pack_context(docs):
         source = doc.metadata.get("source", "desconhecido")
         parts.append(f"[Fonte: {source}]\n{doc.page_content}")
     return "\n\n---\n\n".join(parts)
 
 
+def _retrieval_step(retriever: BaseRetriever) -> Runnable:
+    """
+    Envolve o retriever para o caminho assíncrono usar o pool limitado.
+
+    O retriever do Chroma é síncrono: no .ainvoke() padrão, o LangChain
+    o executa no pool GLOBAL do asyncio. Aqui ele vai para o nosso pool
+    (settings.io_workers), com tamanho controlado.
+    """
+
+    def _retrieve(query: str, config: RunnableConfig) -> list[Document]:
+        return retriever.invoke(query, config)
+
+    async def _aretrieve(query: str, config: RunnableConfig) -> list[Document]:
+        return await run_blocking(retriever.invoke, query, config)
+
+    return RunnableLambda(_retrieve, afunc=_aretrieve, name="retriever")
+
+
+def _rewrite_step(rewriter: QueryRewriter | None) -> Runnable:
+    """
+    {"question", "chat_history"} → consulta para a busca.
+
+    Com rewriter, perguntas de acompanhamento viram perguntas
+    independentes (ver rewrite.py); sem ele, usa a pergunta como está.
+    """
+
+    def _rewrite(x: dict) -> str:
+        if rewriter is None:
+            return x["question"]
+        return rewriter.rewrite(x["question"], history_messages(x["chat_history"]))
+
+    async def _arewrite(x: dict) -> str:
+        if rewriter is None:
+            return x["question"]
+        return await rewriter.arewrite(x["question"], history_messages(x["chat_history"]))
+
+    return RunnableLambda(_rewrite, afunc=_arewrite, name="query_rewrite")
+
+
+# ─── Prompts ─────────────────────────────────────────────────────────────────
+
+_SYSTEM_PROMPT = (
+    "Você é um assistente que responde perguntas com base em "
+    "documentos internos da empresa. Responda em português "
+    "de forma clara e objetiva."
+)
+
+_HUMAN_PROMPT = (
+    "Responda a pergunta abaixo APENAS com base no contexto fornecido.\n"
+    "Se a resposta não puder ser encontrada no contexto, diga:\n"
+    '"Não encontrei essa informação nos documentos disponíveis."\n'
+    "Não invente informações. Cite o documento de origem quando possível.\n\n"
+    "CONTEXTO:\n{context}\n\n"
+    "PERGUNTA: {question}\n\n"
+    "RESPOSTA:"
+)
+
+
+def _build_prompt(conversational: bool) -> ChatPromptTemplate:
+    """Template do prompt — equivalente ao _RAG_PROMPT_TEMPLATE da Fase 3."""
+    if not conversational:
+        return ChatPromptTemplate.from_messages([
+            ("system", _SYSTEM_PROMPT),
+            ("human", _HUMAN_PROMPT),
+        ])
+
+    # Template com placeholder para o histórico de conversa
+    return ChatPromptTemplate.from_messages([
+        (
+            "system",
+            _SYSTEM_PROMPT + " Use o histórico da conversa para entender o "
+            "contexto das perguntas do usuário.",
+        ),
+        # MessagesPlaceholder: insere a lista de mensagens do histórico aqui
+        # Isso mantém o formato correto (HumanMessage, AIMessage alternando)
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", _HUMAN_PROMPT),
+    ])
+
+
+def create_answer_chain(conversational: bool = False, llm: BaseChatModel | None = None) -> Runnable:
+    """
+    Cria só a parte de GERAÇÃO: prompt | llm | parser (sem retrieval).
+
+    Recebe o contexto já formatado:
+        answer_chain.invoke({"context": ..., "question": ...})
+        answer_chain.invoke({"context": ..., "question": ..., "chat_history": [...]})
+
+    Útil quando a busca é feita à parte (streaming, lotes de perguntas).
+
+    Args:
+        conversational: Inclui o placeholder de histórico no prompt.
+        llm: Modelo a usar. Padrão: get_llm() (Groq). Outro BaseChatModel
+             (ex: o modelo falso do benchmark) funciona igual.
+    """
+    llm = llm or get_llm(temperature=0.3)
+    return _build_prompt(conversational) | limit_llm_concurrency(llm) | StrOutputParser()
+
+
 # ─── CHAIN SIMPLES (sem memória) ─────────────────────────────────────────────
 
-def create_rag_chain():
+def create_rag_chain(
+    search_type: str | None = None,
+    use_cache: bool | None = None,
+    llm: BaseChatModel | None = None,
+):
     """
     Cria o pipeline RAG completo usando LCEL (LangChain Expression Language).
 
@@ -86,31 +232,17 @@ def create_rag_chain():
         sem alterá-lo. É como um fio que conecta a entrada direto
         ao prompt.
 
+    Args:
+        search_type: "similarity", "hybrid" (vetorial + BM25) ou "mmr".
+                     Padrão: settings.retrieval_mode
+        use_cache: Envolve a chain com o cache de respostas.
+                   Padrão: settings.answer_cache_enabled
+        llm: Modelo a usar. Padrão: get_llm() (Groq)
+
     Returns:
         Chain invocável: chain.invoke("minha pergunta") → str
     """
-    retriever = get_retriever()
-    llm = get_llm(temperature=0.3)
-
-    # Template do prompt — equivalente ao _RAG_PROMPT_TEMPLATE da Fase 3
-    prompt = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            "Você é um assistente que responde perguntas com base em "
-            "documentos internos da empresa. Responda em português "
-            "de forma clara e objetiva.",
-        ),
-        (
-            "human",
-            "Responda a pergunta abaixo APENAS com base no contexto fornecido.\n"
-            "Se a resposta não puder ser encontrada no contexto, diga:\n"
-            '"Não encontrei essa informação nos documentos disponíveis."\n'
-            "Não invente informações. Cite o documento de origem quando possível.\n\n"
-            "CONTEXTO:\n{context}\n\n"
-            "PERGUNTA: {question}\n\n"
-            "RESPOSTA:",
-        ),
-    ])
+    retriever = get_retriever(search_type=search_type)
 
     # LCEL: composição com o operador |
     # Leia assim: "o input vai para o retriever E para o passthrough,
@@ -118,20 +250,25 @@ def create_rag_chain():
     # depois para o parser"
     chain = (
         {
-            "context": retriever | _format_docs,
+            "context": _retrieval_step(retriever) | _format_docs,
             "question": RunnablePassthrough(),
         }
-        | prompt
-        | llm
-        | StrOutputParser()
+        | create_answer_chain(llm=llm)   # prompt | llm | StrOutputParser()
     )
 
-    return chain
+    if settings.answer_cache_enabled if use_cache is None else use_cache:
+        chain = with_answer_cache(chain, get_answer_cache())
+
+    return instrument(chain, "rag")
 
 
 # ─── CHAIN COM MEMÓRIA ───────────────────────────────────────────────────────
 
-def create_conversational_rag_chain():
+def create_conversational_rag_chain(
+    search_type: str | None = None,
+    llm: BaseChatModel | None = None,
+    rewrite: bool | None = None,
+):
     """
     Cria um pipeline RAG com memória de conversa.
 
@@ -144,58 +281,139 @@ def create_conversational_rag_chain():
         2. O modelo recebe: system + histórico + pergunta atual
         3. O modelo usa o histórico para entender contexto
            Ex: "E sobre o vale-refeição?" → sabe que estamos falando de benefícios
-
-    POR QUE NÃO REFORMULAR A QUERY:
-        Uma abordagem mais sofisticada seria reformular a pergunta antes
-        da busca. Ex: "E sobre o vale-refeição?" → "Quais são as regras
-        do vale-refeição da empresa?". Isso é o create_history_aware_retriever.
-        Vamos mantê-lo simples aqui e evoluir na Fase 6.
+        4. Sessões longas não estouram o prompt: a ConversationMemory
+           resume os turnos antigos e respeita um orçamento de tokens
+
+    REFORMULAÇÃO DA PERGUNTA (antes da busca):
+        A busca não vê o histórico: "E sobre o vale-refeição?" sozinha
+        traz chunks ruins. Por isso a pergunta é reformulada antes
+        ("Quais são as regras do vale-refeição da empresa?") — a mesma
+        ideia do create_history_aware_retriever. Perguntas que já se
+        sustentam sozinhas pulam essa etapa (ver rewrite.py).
+
+    Args:
+        search_type: "similarity", "hybrid" (vetorial + BM25) ou "mmr".
+                     Padrão: settings.retrieval_mode
+        llm: Modelo a usar. Padrão: get_llm() (Groq)
+        rewrite: Reformula perguntas de acompanhamento antes da busca.
+                 Padrão: settings.query_rewrite_enabled
 
     Returns:
-        Tuple de (chain, chat_history):
-        - chain: invocável com chain.invoke({"question": ..., "chat_history": ...})
-        - chat_history: lista mutável para acumular mensagens
+        Tuple de (chain, memory):
+        - chain: invocável com chain.invoke({"question": ..., "chat_history": memory})
+        - memory: ConversationMemory — registre cada turno com
+          memory.add_turn(pergunta, resposta). Uma lista de mensagens
+          também é aceita em "chat_history".
     """
-    retriever = get_retriever()
-    llm = get_llm(temperature=0.3)
-
-    # Template com placeholder para o histórico de conversa
-    prompt = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            "Você é um assistente que responde perguntas com base em "
-            "documentos internos da empresa. Responda em português "
-            "de forma clara e objetiva. "
-            "Use o histórico da conversa para entender o contexto "
-            "das perguntas do usuário.",
-        ),
-        # MessagesPlaceholder: insere a lista de mensagens do histórico aqui
-        # Isso mantém o formato correto (HumanMessage, AIMessage alternando)
-        MessagesPlaceholder(variable_name="chat_history"),
-        (
-            "human",
-            "Responda a pergunta abaixo APENAS com base no contexto fornecido.\n"
-            "Se a resposta não puder ser encontrada no contexto, diga:\n"
-            '"Não encontrei essa informação nos documentos disponíveis."\n'
-            "Não invente informações. Cite o documento de origem quando possível.\n\n"
-            "CONTEXTO:\n{context}\n\n"
-            "PERGUNTA: {question}\n\n"
-            "RESPOSTA:",
-        ),
-    ])
+    retriever = get_retriever(search_type=search_type)
+    rewriter = _make_rewriter(llm, rewrite)
 
     chain = (
         {
-            "context": (lambda x: x["question"]) | retriever | _format_docs,
+            "context": _rewrite_step(rewriter) | _retrieval_step(retriever) | _format_docs,
             "question": lambda x: x["question"],
-            "chat_history": lambda x: x["chat_history"],
+            "chat_history": lambda x: history_messages(x["chat_history"]),
         }
-        | prompt
-        | llm
-        | StrOutputParser()
+        | create_answer_chain(conversational=True, llm=llm)
     )
+    chain = instrument(chain, "conversational_rag")
 
     # Histórico vazio — será preenchido pelo script de uso
-    chat_history: list[HumanMessage | AIMessage] = []
+    memory = ConversationMemory(llm=llm)
+
+    return chain, memory
+
+
+def _make_rewriter(llm: BaseChatModel | None, rewrite: bool | None) -> QueryRewriter | None:
+    if not (settings.query_rewrite_enabled if rewrite is None else rewrite):
+        return None
+    return QueryRewriter(llm=llm)
+
+
+# ─── STREAMING (retrieval único + fontes antes da resposta) ──────────────────
+
+class RagStreamer:
+    """
+    RAG em duas etapas explícitas, para streaming com fontes.
+
+    Uso:
+        streamer = RagStreamer()
+        docs = streamer.retrieve("Quantos dias de férias?")
+        print(sources(docs))                         # fontes ANTES da geração
+        for token in streamer.stream("Quantos dias de férias?", docs):
+            print(token, end="", flush=True)         # tokens conforme chegam
+
+    A busca acontece UMA vez (retrieve) e os mesmos documentos alimentam
+    a geração — diferente de chamar retriever.invoke() + chain.stream(),
+    que buscaria duas vezes.
+
+    Args:
+        search_type: "similarity", "hybrid" ou "mmr". Padrão: settings.retrieval_mode
+        conversational: Usa o prompt com histórico (passe chat_history no
+                        retrieve e no stream). A busca usa a pergunta
+                        reformulada (ver rewrite.py).
+        llm: Modelo a usar. Padrão: get_llm() (Groq)
+        rewrite: Reformula perguntas de acompanhamento (só conversacional).
+                 Padrão: settings.query_rewrite_enabled
+    """
 
-    return chain, chat_history
+    def __init__(
+        self,
+        search_type: str | None = None,
+        conversational: bool = False,
+        llm: BaseChatModel | None = None,
+        rewrite: bool | None = None,
+    ):
+        self.conversational = conversational
+        self.retriever = get_retriever(search_type=search_type)
+        self.answer_chain = instrument(create_answer_chain(conversational, llm=llm), "rag_stream")
+        self.rewriter = _make_rewriter(llm, rewrite) if conversational else None
+
+    def search_query(
+        self, question: str, chat_history: ConversationMemory | list[BaseMessage] | None = None
+    ) -> str:
+        """Consulta usada na busca: a pergunta, ou sua reformulação independente."""
+        if self.rewriter is None:
+            return question
+        return self.rewriter.rewrite(question, history_messages(chat_history))
+
+    def retrieve(
+        self, question: str, chat_history: ConversationMemory | list[BaseMessage] | None = None
+    ) -> list[Document]:
+        query = self.search_query(question, chat_history)
+        return self.retriever.invoke(query, callback_config())
+
+    async def aretrieve(
+        self, question: str, chat_history: ConversationMemory | list[BaseMessage] | None = None
+    ) -> list[Document]:
+        query = question
+        if self.rewriter is not None:
+            query = await self.rewriter.arewrite(question, history_messages(chat_history))
+        return await run_blocking(self.retriever.invoke, query, callback_config())
+
+    def stream(
+        self,
+        question: str,
+        docs: list[Document],
+        chat_history: ConversationMemory | list[BaseMessage] | None = None,
+    ) -> Iterator[str]:
+        """Transmite a resposta token a token (síncrono)."""
+        yield from self.answer_chain.stream(self._inputs(question, docs, chat_history))
+
+    async def astream(
+        self,
+        question: str,
+        docs: list[Document],
+        chat_history: ConversationMemory | list[BaseMessage] | None = None,
+    ) -> AsyncIterator[str]:
+        """Transmite a resposta token a token (assíncrono)."""
+        async for token in self.answer_chain.astream(
+            self._inputs(question, docs, chat_history)
+        ):
+            yield token
+
+    def _inputs(self, question: str, docs: list[Document], chat_history) -> dict:
+        inputs = {"context": _format_docs(docs), "question": question}
+        if self.conversational:
+            inputs["chat_history"] = history_messages(chat_history)
+        return inputs
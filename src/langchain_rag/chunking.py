@@ -0,0 +1,252 @@
+"""
+Chunking por estrutura — Seções Markdown, tamanho medido em tokens.
+
+O PROBLEMA:
+    O RecursiveCharacterTextSplitter mede chunks em CARACTERES
+    (length_function=len) e corta onde der. Dois efeitos ruins:
+
+    1. TRUNCAMENTO SILENCIOSO: o all-MiniLM-L6-v2 lê no máximo 256
+       tokens. 800 caracteres de português (acentos, números, códigos)
+       passam disso com frequência — o final do chunk é guardado, vai
+       para o prompt, mas NUNCA entrou no embedding: a busca não o acha.
+    2. CORTES SEM CONTEXTO: um chunk começa no meio de uma seção e
+       termina no início da outra, misturando assuntos.
+
+A SOLUÇÃO — dividir pela estrutura e medir em tokens do modelo:
+
+    # Política de Férias            ┐
+    ## Férias                       │ chunk 1  (seções inteiras, enquanto
+    - 30 dias ...                   │           couberem na janela)
+    - Até 3 períodos ...            ┘
+    ## Benefícios                   ┐
+    ### Saúde                       │ chunk 2  (cabeçalhos "soltos" grudam
+    - Plano de saúde ...            ┘           na seção seguinte)
+    ### Financeiro                  ┐ chunk 3  (outra seção irmã: começa
+    ...                             ┘           chunk novo)
+
+    1. O texto é separado em SEÇÕES pelos cabeçalhos (metadata.py).
+    2. Seções filhas entram no mesmo chunk que a seção-mãe enquanto
+       couberem; uma seção irmã (ou de outro ramo) começa chunk novo —
+       assim o campo `section` dos metadados descreve o chunk inteiro.
+    3. Seções grandes são divididas em parágrafos → linhas → frases →
+       palavras, sempre respeitando o limite em TOKENS, com uma pequena
+       sobreposição (CHUNK_OVERLAP_TOKENS) só dentro da mesma seção.
+
+    Todo chunk cabe na janela do modelo (CHUNK_MAX_TOKENS, contando os
+    tokens especiais [CLS]/[SEP]). Sem a sobreposição fixa de 200
+    caracteres entre TODOS os chunks, o total de chunks cai.
+
+CAMINHO RÁPIDO:
+    Tokenizar é a parte cara. Contamos os tokens de cada PARÁGRAFO uma
+    vez (cache LRU) e somamos: o tokenizador WordPiece quebra primeiro
+    nos espaços, então os tokens de "A\\n\\nB" são os de A + os de B.
+    Parágrafos repetidos (avisos, rodapés) e arquivos re-ingeridos com
+    poucas mudanças quase não tokenizam nada.
+
+NOTA (process pool):
+    Este módulo roda nos workers da ingestão (pipeline.py). Carregamos
+    SÓ o tokenizador (alguns MB), não o modelo de embeddings inteiro.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from langchain_core.documents import Document
+
+from src.config.settings import settings
+from src.langchain_rag.metadata import header_index
+
+# Mesmo modelo de embeddings.py (nome completo no Hugging Face Hub)
+_TOKENIZER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Separadores para dividir trechos grandes demais, do mais ao menos natural
+_PARAGRAPH = re.compile(r"\n[ \t]*\n")
+_SPLIT_LEVELS = [
+    re.compile(r"\n"),                   # linhas (itens de lista, linhas de tabela)
+    re.compile(r"(?<=[.!?;:])[ \t]+"),   # frases
+    re.compile(r"[ \t]+"),               # palavras
+]
+
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    # Import tardio: transformers só é carregado por quem usa o chunker
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(_TOKENIZER_MODEL)
+
+
+@lru_cache(maxsize=16384)
+def paragraph_tokens(text: str) -> int:
+    """Nº de tokens de um trecho (sem tokens especiais), com cache por texto."""
+    return len(_tokenizer().encode(text, add_special_tokens=False, verbose=False))
+
+
+@dataclass
+class _Unit:
+    """Trecho indivisível do texto original: [start, end) e seus tokens."""
+
+    start: int
+    end: int
+    tokens: int
+
+
+@dataclass
+class _Section:
+    path: list[str]   # caminho de cabeçalhos ("" = nível pulado)
+    units: list[_Unit]
+    has_body: bool    # False = só a linha do cabeçalho
+
+    @property
+    def tokens(self) -> int:
+        return sum(unit.tokens for unit in self.units)
+
+
+def _spans(text: str, start: int, end: int, separator: re.Pattern) -> list[tuple[int, int]]:
+    """Divide [start, end) pelo separador, descartando pedaços só de espaços."""
+    spans, position = [], start
+    for match in separator.finditer(text, start, end):
+        spans.append((position, match.start()))
+        position = match.end()
+    spans.append((position, end))
+
+    result = []
+    for span_start, span_end in spans:
+        piece = text[span_start:span_end]
+        if piece.strip():
+            left = len(piece) - len(piece.lstrip())
+            right = len(piece.rstrip())
+            result.append((span_start + left, span_start + right))
+    return result
+
+
+def _units(text: str, start: int, end: int, budget: int, level: int = -1) -> list[_Unit]:
+    """Trechos de [start, end) com no máximo `budget` tokens cada."""
+    separator = _PARAGRAPH if level < 0 else _SPLIT_LEVELS[level]
+    units = []
+    for span_start, span_end in _spans(text, start, end, separator):
+        tokens = paragraph_tokens(text[span_start:span_end])
+        if tokens <= budget:
+            units.append(_Unit(span_start, span_end, tokens))
+        elif level + 1 < len(_SPLIT_LEVELS):
+            units.extend(_units(text, span_start, span_end, budget, level + 1))
+        else:
+            units.extend(_split_word(text, span_start, span_end, budget))
+    return units
+
+
+def _split_word(text: str, start: int, end: int, budget: int) -> list[_Unit]:
+    """Último recurso (ex: uma URL gigante): corta a "palavra" ao meio até caber."""
+    tokens = paragraph_tokens(text[start:end])
+    if tokens <= budget or end - start <= 1:
+        return [_Unit(start, end, tokens)]
+    middle = (start + end) // 2
+    return _split_word(text, start, middle, budget) + _split_word(text, middle, end, budget)
+
+
+def _sections(text: str, budget: int) -> list[_Section]:
+    offsets, paths = header_index(text)
+    bounds = offsets + [len(text)]
+    sections = []
+    if not offsets or offsets[0] > 0:
+        preamble_end = offsets[0] if offsets else len(text)
+        units = _units(text, 0, preamble_end, budget)
+        if units:
+            sections.append(_Section(path=[], units=units, has_body=True))
+    for i, path in enumerate(paths):
+        units = _units(text, bounds[i], bounds[i + 1], budget)
+        header_end = text.find("\n", bounds[i])
+        header_end = bounds[i + 1] if header_end < 0 else header_end
+        has_body = any(unit.end > header_end for unit in units)
+        sections.append(_Section(path=path, units=units, has_body=has_body))
+    return sections
+
+
+def _is_descendant(path: list[str], anchor: list[str]) -> bool:
+    return bool(anchor) and len(path) > len(anchor) and path[:len(anchor)] == anchor
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+) -> list[tuple[int, str]]:
+    """
+    Divide um texto Markdown em chunks que cabem na janela do modelo.
+
+    Args:
+        text: Conteúdo do documento.
+        max_tokens: Janela do modelo, com os tokens especiais.
+                    Padrão: settings.chunk_max_tokens
+        overlap_tokens: Sobreposição entre chunks de uma mesma seção.
+                        Padrão: settings.chunk_overlap_tokens
+
+    Returns:
+        Lista de (start_index, texto do chunk) — o texto é um trecho
+        literal do original, começando em start_index.
+    """
+    max_tokens = max_tokens or settings.chunk_max_tokens
+    overlap = settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+    budget = max_tokens - _tokenizer().num_special_tokens_to_add()
+
+    chunks: list[tuple[int, str]] = []
+    current: list[_Unit] = []
+    current_tokens = 0
+    anchor: list[str] | None = None  # seção da 1ª parte com conteúdo do chunk
+
+    def flush() -> None:
+        nonlocal current, current_tokens, anchor
+        if current:
+            chunks.append((current[0].start, text[current[0].start:current[-1].end]))
+        current, current_tokens, anchor = [], 0, None
+
+    for section in _sections(text, budget):
+        joinable = anchor is None or (
+            _is_descendant(section.path, anchor) and current_tokens + section.tokens <= budget
+        )
+        if current and not joinable:
+            flush()
+
+        section_start = section.units[0].start if section.units else 0
+        for unit in section.units:
+            if current and current_tokens + unit.tokens > budget:
+                # Seção maior que a janela: recomeça com o fim do chunk anterior
+                carried: list[_Unit] = []
+                carried_tokens = 0
+                for previous in reversed(current):
+                    if previous.start < section_start or carried_tokens + previous.tokens > overlap:
+                        break
+                    carried.insert(0, previous)
+                    carried_tokens += previous.tokens
+                if carried_tokens + unit.tokens > budget:
+                    carried, carried_tokens = [], 0
+                flush()
+                current, current_tokens = carried, carried_tokens
+            current.append(unit)
+            current_tokens += unit.tokens
+            if anchor is None and section.has_body:
+                anchor = section.path
+    flush()
+    return chunks
+
+
+def split_markdown(
+    documents: list[Document],
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+) -> list[Document]:
+    """
+    Equivalente a split_documents() usando o chunker por estrutura + tokens.
+
+    Returns:
+        Chunks com os metadados do documento de origem e start_index.
+    """
+    chunks = []
+    for document in documents:
+        for start, content in chunk_text(document.page_content, max_tokens, overlap_tokens):
+            chunks.append(Document(
+                page_content=content,
+                metadata={**document.metadata, "start_index": start},
+            ))
+    return chunks
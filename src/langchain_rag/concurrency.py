@@ -0,0 +1,87 @@
+"""
+Concorrência — Pool de threads limitado e limite de chamadas simultâneas ao LLM.
+
+O PROBLEMA:
+    No caminho assíncrono (ainvoke), duas coisas podem travar o event loop
+    ou sobrecarregar recursos:
+
+    1. Chamadas BLOQUEANTES (Chroma, embeddings, SQLite): se rodarem
+       direto numa coroutine, congelam o event loop — todos os clientes
+       esperam. Precisam ir para threads.
+    2. Chamadas ao LLM (Groq): com 50 clientes simultâneos, 50 requisições
+       ao mesmo tempo estouram o rate limit da API (HTTP 429) e todas
+       ficam mais lentas.
+
+A SOLUÇÃO:
+    - run_blocking(): executa a função num ThreadPoolExecutor COM TAMANHO
+      FIXO (settings.io_workers). O pool padrão do asyncio cresce com o
+      nº de núcleos e é compartilhado com tudo; este é só nosso e limitado.
+    - limit_llm_concurrency(): envolve o LLM num Runnable que só deixa
+      N chamadas em andamento (semáforo). As demais esperam na fila sem
+      bloquear o event loop. Streaming continua funcionando.
+"""
+
+import asyncio
+import functools
+import threading
+import weakref
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from src.config.settings import settings
+
+T = TypeVar("T")
+
+_executor = ThreadPoolExecutor(max_workers=settings.io_workers, thread_name_prefix="rag-io")
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Executa uma função bloqueante no pool de threads limitado.
+
+    Uso:
+        docs = await run_blocking(retriever.invoke, "férias")
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+# ─── Limite de chamadas simultâneas ao LLM ───────────────────────────────────
+
+# Um asyncio.Semaphore pertence a UM event loop. Scripts podem criar vários
+# loops (um asyncio.run() por pergunta), então guardamos um semáforo por loop.
+_async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+# Caminho síncrono (threads): semáforo comum
+_sync_slots = threading.BoundedSemaphore(settings.llm_max_concurrency)
+
+
+def _async_slot() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _async_slots:
+        _async_slots[loop] = asyncio.Semaphore(settings.llm_max_concurrency)
+    return _async_slots[loop]
+
+
+def limit_llm_concurrency(llm: Runnable) -> Runnable:
+    """
+    Envolve o LLM para limitar chamadas simultâneas (settings.llm_max_concurrency).
+
+    Implementado com geradores: .invoke() acumula os chunks e .stream()/.astream()
+    repassam os tokens conforme chegam — o limite vale para os dois modos.
+    """
+
+    def _call(prompt: Any, config: RunnableConfig) -> Iterator:
+        with _sync_slots:
+            yield from llm.stream(prompt, config)
+
+    async def _acall(prompt: Any, config: RunnableConfig) -> AsyncIterator:
+        async with _async_slot():
+            async for chunk in llm.astream(prompt, config):
+                yield chunk
+
+    return RunnableLambda(_call, afunc=_acall, name="llm_concurrency_limit")
@@ -0,0 +1,160 @@
+"""
+Empacotamento do contexto — Menos tokens repetidos, mais conteúdo distinto.
+
+O PROBLEMA:
+    Os chunks são gerados com sobreposição (CHUNK_OVERLAP_TOKENS nas
+    seções longas, chunk_overlap no splitter por caracteres): o fim de um
+    chunk se repete no começo do próximo. Quando a busca traz dois
+    chunks vizinhos do mesmo arquivo — o que é comum, a resposta costuma
+    estar num trecho contínuo — o prompt carrega essa sobreposição
+    DUAS vezes. Somando chunks quase idênticos (avisos repetidos em
+    vários documentos), boa parte do contexto é redundante: prompt
+    maior, Groq mais lento, menos espaço para informação nova.
+
+A SOLUÇÃO — 3 passos antes de montar o prompt:
+    1. MESCLAR vizinhos: chunks do mesmo arquivo que se sobrepõem ou se
+       encostam (pelo start_index) viram um trecho só, sem repetição:
+
+           [0 ────── 800]                     chunk A
+                  [600 ────── 1400]           chunk B
+           [0 ─────────────── 1400]           A + B[200:]
+
+    2. DESCARTAR quase-duplicatas: trechos com Jaccard ≥ limiar sobre
+       trigramas de palavras em relação a um trecho já escolhido.
+
+    3. ORÇAMENTO de tokens: os trechos entram por ordem de relevância
+       (a melhor posição entre os chunks que os formam) até encher o
+       orçamento. O que não cabe fica de fora — só o trecho mais
+       relevante é truncado, se sozinho estourar o orçamento (contexto
+       vazio seria pior).
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+from src.config.settings import settings
+from src.langchain_rag.tokens import count_tokens, truncate_to_tokens
+
+# Distância máxima (caracteres) entre dois chunks para considerá-los vizinhos:
+# o splitter remove as quebras de linha entre parágrafos ("\n\n")
+_ADJACENT_GAP = 2
+
+
+@dataclass
+class _Passage:
+    """Trecho contínuo de um arquivo, formado por um ou mais chunks."""
+
+    source: str
+    start: int
+    text: str
+    rank: int  # melhor posição (0 = mais relevante) entre os chunks do trecho
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.text)
+
+
+def _source_of(doc: Document) -> str:
+    return doc.metadata.get("source_path") or doc.metadata.get("source", "")
+
+
+def _merge_adjacent(docs: list[Document]) -> list[_Passage]:
+    """Junta chunks sobrepostos/vizinhos do mesmo arquivo (precisa de start_index)."""
+    passages: list[_Passage] = []
+    by_source: dict[str, list[_Passage]] = {}
+
+    for rank, doc in enumerate(docs):
+        start = doc.metadata.get("start_index")
+        passage = _Passage(
+            source=_source_of(doc),
+            start=start if isinstance(start, int) and start >= 0 else -1,
+            text=doc.page_content,
+            rank=rank,
+            metadata=dict(doc.metadata),
+        )
+        if passage.start < 0:
+            passages.append(passage)  # sem posição: não dá para mesclar
+        else:
+            by_source.setdefault(passage.source, []).append(passage)
+
+    for source_passages in by_source.values():
+        source_passages.sort(key=lambda p: p.start)
+        current = source_passages[0]
+        for passage in source_passages[1:]:
+            if passage.start <= current.end + _ADJACENT_GAP:
+                gap = passage.start - current.end
+                if gap > 0:
+                    current.text += "\n" * gap + passage.text
+                elif passage.end > current.end:
+                    current.text += passage.text[-gap:]
+                current.rank = min(current.rank, passage.rank)
+            else:
+                passages.append(current)
+                current = passage
+        passages.append(current)
+
+    return sorted(passages, key=lambda p: p.rank)
+
+
+def _shingles(text: str) -> set[tuple[str, ...]]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def pack_context(
+    docs: list[Document],
+    max_tokens: int | None = None,
+    dedup_threshold: float | None = None,
+) -> list[Document]:
+    """
+    Mescla, deduplica e seleciona chunks dentro de um orçamento de tokens.
+
+    Args:
+        docs: Chunks recuperados, do mais ao menos relevante.
+        max_tokens: Orçamento do contexto. Padrão: settings.context_max_tokens
+        dedup_threshold: Similaridade (Jaccard de trigramas) a partir da
+                         qual um trecho é descartado como duplicata.
+                         Padrão: settings.context_dedup_threshold
+
+    Returns:
+        Documents com os trechos escolhidos, por ordem de relevância.
+        O metadata é o do chunk que começa o trecho, com start_index
+        apontando para o início do trecho mesclado.
+    """
+    max_tokens = max_tokens or settings.context_max_tokens
+    threshold = settings.context_dedup_threshold if dedup_threshold is None else dedup_threshold
+
+    selected: list[Document] = []
+    selected_shingles: list[set] = []
+    used_tokens = 0
+
+    for passage in _merge_adjacent(docs):
+        shingles = _shingles(passage.text)
+        if any(_jaccard(shingles, other) >= threshold for other in selected_shingles):
+            continue
+        text = passage.text
+        tokens = count_tokens(text)
+        if used_tokens + tokens > max_tokens:
+            if selected:
+                continue  # não cabe: tenta os próximos (menores podem caber)
+            text = truncate_to_tokens(text, max_tokens)
+            tokens = count_tokens(text)
+        used_tokens += tokens
+        selected_shingles.append(shingles)
+        metadata = dict(passage.metadata)
+        if passage.start >= 0:
+            metadata["start_index"] = passage.start
+        selected.append(Document(page_content=text, metadata=metadata))
+
+    return selected
@@ -0,0 +1,190 @@
+"""
+Cache de embeddings — Vetores persistidos em disco, com LRU em memória.
+
+O PROBLEMA:
+    Embeddar é determinístico: o mesmo texto, no mesmo modelo, gera
+    SEMPRE o mesmo vetor. Mesmo assim, cada embed_documents/embed_query
+    recalcula tudo do zero — inclusive chunks e perguntas que já
+    embeddamos milhares de vezes (re-ingestões, perguntas repetidas).
+
+A SOLUÇÃO — cache em 2 níveis:
+    1. Memória (LRU): dict ordenado com os vetores mais usados.
+       Acesso em microssegundos, tamanho limitado.
+    2. Disco (SQLite): todos os vetores já calculados, como BLOBs float32
+       (384 dims × 4 bytes = 1,5 KB por vetor). Sobrevive a reinícios.
+
+    Chave: (modelo, normalize, tipo, sha256(texto))
+    - modelo/normalize: vetores de configurações diferentes não se misturam
+    - tipo ("query"/"document"): modelos assimétricos (ex: BGE) embedam
+      perguntas e documentos de forma diferente
+
+CONCEITO: Decorator / Wrapper
+    CachedEmbeddings implementa a MESMA interface Embeddings do LangChain
+    e delega para o modelo real só em caso de miss. Quem usa (Chroma,
+    retriever, ingestão) não percebe a diferença — é transparente.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+# SQLite limita o nº de parâmetros por consulta; buscamos em lotes.
+_LOOKUP_BATCH_SIZE = 500
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Contadores de uso do cache."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "hit_rate": round(self.hit_rate, 4)}
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings com cache em memória (LRU) + disco (SQLite).
+
+    Uso:
+        embeddings = CachedEmbeddings(HuggingFaceEmbeddings(...), "all-MiniLM-L6-v2")
+        embeddings.embed_query("férias")   # miss → calcula e grava
+        embeddings.embed_query("férias")   # hit em memória
+        embeddings.stats.as_dict()
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        model_name: str,
+        path: Path,
+        normalize: bool = True,
+        memory_size: int = 10_000,
+    ):
+        self.inner = inner
+        self.model_name = model_name
+        self.normalize = normalize
+        self.memory_size = memory_size
+        self.stats = EmbeddingCacheStats()
+
+        self._memory: OrderedDict[tuple[str, bytes], array] = OrderedDict()
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # check_same_thread=False: o acesso é serializado pelo self._lock
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        # WAL: leitores não bloqueiam o escritor (ex: MCP server + ingest.py)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " normalize INTEGER NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, normalize, kind, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    # ─── Interface Embeddings ────────────────────────────────────────────────
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts, "document", self.inner.embed_documents)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed([text], "query", lambda texts: [self.inner.embed_query(texts[0])])[0]
+
+    # ─── Implementação ───────────────────────────────────────────────────────
+
+    def _embed(self, texts: list[str], kind: str, compute) -> list[list[float]]:
+        hashes = [hashlib.sha256(text.encode("utf-8")).digest() for text in texts]
+        vectors: list[array | None] = [None] * len(texts)
+
+        with self._lock:
+            # Nível 1: memória
+            for i, text_hash in enumerate(hashes):
+                vector = self._memory.get((kind, text_hash))
+                if vector is not None:
+                    self._memory.move_to_end((kind, text_hash))
+                    vectors[i] = vector
+                    self.stats.memory_hits += 1
+
+            # Nível 2: disco
+            pending = {hashes[i] for i, vector in enumerate(vectors) if vector is None}
+            found = self._lookup(kind, pending)
+            for i, text_hash in enumerate(hashes):
+                if vectors[i] is None and text_hash in found:
+                    vectors[i] = found[text_hash]
+                    self.stats.disk_hits += 1
+                    self._remember(kind, text_hash, vectors[i])
+
+        # Miss: calcula fora do lock (é a parte lenta) e só uma vez por texto
+        missing: dict[bytes, str] = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(hashes[i], texts[i])
+        if missing:
+            computed = compute(list(missing.values()))
+            new = {
+                text_hash: array("f", vector) for text_hash, vector in zip(missing, computed)
+            }
+            with self._lock:
+                self.stats.misses += len(new)
+                self._store(kind, new)
+                for text_hash, vector in new.items():
+                    self._remember(kind, text_hash, vector)
+            for i, text_hash in enumerate(hashes):
+                if vectors[i] is None:
+                    vectors[i] = new[text_hash]
+
+        return [vector.tolist() for vector in vectors]
+
+    def _remember(self, kind: str, text_hash: bytes, vector: array) -> None:
+        """Insere no LRU em memória, descartando o menos usado se cheio."""
+        self._memory[(kind, text_hash)] = vector
+        self._memory.move_to_end((kind, text_hash))
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, kind: str, hashes: set[bytes]) -> dict[bytes, array]:
+        found: dict[bytes, array] = {}
+        pending = list(hashes)
+        for start in range(0, len(pending), _LOOKUP_BATCH_SIZE):
+            batch = pending[start:start + _LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                "SELECT text_hash, vector FROM embeddings"
+                " WHERE model = ? AND normalize = ? AND kind = ?"
+                f" AND text_hash IN ({placeholders})",
+                (self.model_name, int(self.normalize), kind, *batch),
+            )
+            for text_hash, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[text_hash] = vector
+        return found
+
+    def _store(self, kind: str, vectors: dict[bytes, array]) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, normalize, kind, text_hash, vector)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [
+                (self.model_name, int(self.normalize), kind, text_hash, vector.tobytes())
+                for text_hash, vector in vectors.items()
+            ],
+        )
+        self._db.commit()
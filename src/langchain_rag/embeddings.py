@@ -20,10 +20,37 @@ MODELO ESCOLHIDO: all-MiniLM-L6-v2
     - Treinado para similaridade semântica
     - Roda localmente (sem API key, sem custo)
     - Suporta textos de até 256 tokens (~200 palavras)
+
+EMBEDDING EM LOTES (BatchedEmbeddings):
+    Um Transformer processa um lote como uma matriz [lote × maior_texto].
+    Textos menores são completados com PADDING — tokens que custam
+    processamento mas não servem para nada. Misturar um chunk de 20
+    tokens com um de 256 no mesmo lote desperdiça ~90% do trabalho
+    com o menor.
+
+    Solução: ordenar os textos pelo comprimento EM TOKENS e formar lotes
+    de textos parecidos (length bucketing). O resultado é devolvido na
+    ordem original. Tamanho de lote e nº de threads do torch são
+    configuráveis (EMBED_BATCH_SIZE, EMBED_NUM_THREADS).
+
+CACHE DE VETORES:
+    get_embeddings() retorna o modelo "embrulhado" em CachedEmbeddings
+    (ver embedding_cache.py): textos já embeddados não são recalculados,
+    nem entre execuções. Desative com EMBEDDING_CACHE=false no .env.
+
+    Pilha completa: CachedEmbeddings → BatchedEmbeddings → HuggingFaceEmbeddings
 """
 
+import time
+from dataclasses import dataclass
+
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from src.config.settings import settings
+from src.langchain_rag.embedding_cache import CachedEmbeddings
+from src.langchain_rag.metrics import registry
+
 # Modelo de embedding local
 # Se mudarmos o modelo, os embeddings antigos ficam incompatíveis
 # e precisaríamos re-indexar todos os documentos.
@@ -33,11 +60,165 @@ _DEFAULT_MODEL = "all-MiniLM-L6-v2"
 # Cache da instância — evita recarregar o modelo a cada chamada.
 # Usamos um dict como cache simples (pattern: memoization por model_name).
 _cache: dict[str, HuggingFaceEmbeddings] = {}
+_batched_embeddings: dict[str, "BatchedEmbeddings"] = {}
+_cached_embeddings: dict[str, CachedEmbeddings] = {}
+
+
+@dataclass
+class EmbeddingThroughput:
+    """Contadores de desempenho do embedding de documentos."""
+
+    texts: int = 0
+    batches: int = 0
+    tokens: int = 0
+    padded_tokens: int = 0
+    seconds: float = 0.0
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.texts / self.seconds if self.seconds else 0.0
+
+    @property
+    def padding_ratio(self) -> float:
+        """Fração dos tokens processados que era só padding."""
+        return 1 - self.tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Embedding de documentos em lotes agrupados por comprimento em tokens.
+
+    Uso:
+        embeddings = BatchedEmbeddings(get_embedding_model(), batch_size=64)
+        vectors = embeddings.embed_documents(chunks)
+        embeddings.throughput.texts_per_second
+    """
+
+    def __init__(
+        self,
+        model: HuggingFaceEmbeddings,
+        batch_size: int = 64,
+        num_threads: int = 0,
+        length_bucketing: bool = True,
+    ):
+        self.model = model
+        self.batch_size = batch_size
+        self.length_bucketing = length_bucketing
+        self.throughput = EmbeddingThroughput()
+
+        if num_threads > 0:
+            import torch
+
+            # Threads intra-op: quantos núcleos cada multiplicação de matriz usa
+            torch.set_num_threads(num_threads)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.model.embed_query(text)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        client = self.model._client  # SentenceTransformer por baixo do LangChain
+        lengths = self._token_lengths(client, texts)
+
+        order = list(range(len(texts)))
+        if self.length_bucketing:
+            order.sort(key=lengths.__getitem__)
+
+        vectors: list[list[float] | None] = [None] * len(texts)
+        for batch_start in range(0, len(order), self.batch_size):
+            batch = order[batch_start:batch_start + self.batch_size]
+            encoded = client.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                show_progress_bar=False,
+                **self.model.encode_kwargs,
+            )
+            for i, vector in zip(batch, encoded):
+                vectors[i] = vector.tolist()
+            self.throughput.batches += 1
+            self.throughput.padded_tokens += max(lengths[i] for i in batch) * len(batch)
+
+        self.throughput.texts += len(texts)
+        self.throughput.tokens += sum(lengths)
+        self.throughput.seconds += time.perf_counter() - start
+        return vectors
+
+    @staticmethod
+    def _token_lengths(client, texts: list[str]) -> list[int]:
+        """Comprimento de cada texto em tokens (já truncado ao limite do modelo)."""
+        encoded = client.tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=client.max_seq_length,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+
+def get_embeddings(model_name: str = _DEFAULT_MODEL) -> Embeddings:
+    """
+    Retorna o modelo de embeddings com cache de vetores (memória + disco).
+
+    É o que o resto do projeto deve usar (ingestão, retriever, MCP).
+    Com EMBEDDING_CACHE=false, retorna o modelo sem o cache de vetores.
+
+    Args:
+        model_name: Nome do modelo sentence-transformers.
+
+    Returns:
+        Instância de Embeddings (reutilizada se já existir).
+    """
+    model = get_embedding_model(model_name)
+    if model_name not in _batched_embeddings:
+        _batched_embeddings[model_name] = BatchedEmbeddings(
+            model,
+            batch_size=settings.embed_batch_size,
+            num_threads=settings.embed_num_threads,
+            length_bucketing=settings.embed_length_bucketing,
+        )
+    batched = _batched_embeddings[model_name]
+    if not settings.embedding_cache_enabled:
+        return batched
+
+    if model_name not in _cached_embeddings:
+        _cached_embeddings[model_name] = CachedEmbeddings(
+            batched,
+            model_name=model_name,
+            path=settings.cache_dir / "embeddings.sqlite",
+            normalize=model.encode_kwargs.get("normalize_embeddings", False),
+            memory_size=settings.embedding_cache_size,
+        )
+    return _cached_embeddings[model_name]
+
+
+def get_embedding_cache_stats() -> dict[str, dict]:
+    """Contadores de hit/miss do cache de embeddings, por modelo."""
+    return {name: cached.stats.as_dict() for name, cached in _cached_embeddings.items()}
+
+
+def _collect_embedding_cache() -> dict[str, dict[str, float]]:
+    """Contadores do cache de embeddings somados entre modelos (para metrics.py)."""
+    totals: dict[str, float] = {}
+    for cached in _cached_embeddings.values():
+        for event in ("memory_hits", "disk_hits", "misses"):
+            totals[event] = totals.get(event, 0) + getattr(cached.stats, event)
+    return {"embedding_cache": totals} if totals else {}
+
+
+registry.register_collector("embedding_cache", _collect_embedding_cache)
+
+
+def get_embedding_throughput() -> dict[str, EmbeddingThroughput]:
+    """Contadores de desempenho (chunks/s, padding) do embedding, por modelo."""
+    return {name: batched.throughput for name, batched in _batched_embeddings.items()}
 
 
-def get_embeddings(model_name: str = _DEFAULT_MODEL) -> HuggingFaceEmbeddings:
+def get_embedding_model(model_name: str = _DEFAULT_MODEL) -> HuggingFaceEmbeddings:
     """
-    Retorna a instância (cacheada) do modelo de embeddings.
+    Retorna a instância (cacheada) do modelo de embeddings, SEM cache de vetores.
 
     POR QUE HuggingFaceEmbeddings:
         - Gratuito: roda 100% local
@@ -0,0 +1,87 @@
+"""
+Filtros de metadados — Avaliação de filtros `where` no formato do Chroma.
+
+O Chroma aceita filtros como dicionários:
+
+    {"source_path": "politica-ferias-beneficios.md"}
+    {"source_path": {"$in": ["a.md", "b.md"]}}
+    {"$and": [{"file_type": "md"}, {"modified_ts": {"$gte": 1700000000}}]}
+
+O próprio Chroma aplica esses filtros na busca vetorial. Mas alguns
+caminhos de busca NÃO passam pelo Chroma (ex: candidatos do BM25 na
+busca híbrida) e precisam aplicar o MESMO filtro em Python.
+Este módulo implementa esse subconjunto da sintaxe.
+"""
+
+import json
+from collections.abc import Callable
+from operator import eq, ge, gt, le, lt, ne
+from typing import Any
+
+
+def _ordered(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    """
+    $gt/$gte/$lt/$lte que dão False quando os tipos não se comparam.
+
+    Ex: {"modified": {"$gte": 1700000000}} com modified = "2024-05-01"
+    (str vs int). O Chroma simplesmente não casa o chunk; sem isso, o
+    TypeError escaparia de search() na busca híbrida.
+    """
+
+    def check(value: Any, target: Any) -> bool:
+        try:
+            return value is not None and compare(value, target)
+        except TypeError:
+            return False
+
+    return check
+
+
+_COMPARATORS = {
+    "$eq": eq,
+    "$ne": ne,
+    "$gt": _ordered(gt),
+    "$gte": _ordered(ge),
+    "$lt": _ordered(lt),
+    "$lte": _ordered(le),
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+}
+
+
+def matches_where(metadata: dict[str, Any], where: dict | None) -> bool:
+    """
+    Verifica se os metadados de um chunk satisfazem um filtro `where`.
+
+    Args:
+        metadata: Metadados do chunk.
+        where: Filtro no formato do Chroma (None = aceita tudo).
+
+    Raises:
+        ValueError: Operador desconhecido.
+    """
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, target in condition.items():
+                if operator not in _COMPARATORS:
+                    raise ValueError(f"Operador de filtro não suportado: {operator}")
+                if not _COMPARATORS[operator](value, target):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def where_key(where: dict | None) -> str:
+    """Representação canônica de um filtro (para usar como chave de cache)."""
+    return json.dumps(where or {}, sort_keys=True, ensure_ascii=False)
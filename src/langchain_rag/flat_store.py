@@ -0,0 +1,470 @@
+"""
+Índice plano — Embeddings em arquivos NumPy mapeados em memória.
+
+O PROBLEMA:
+    O Chroma guarda cada chunk como 384 float32 (1,5 KB) num grafo HNSW
+    que precisa estar INTEIRO em memória para responder: os vetores mais
+    as listas de vizinhos de cada nó. Com dezenas de milhões de chunks
+    são dezenas de GB por collection — a memória do nó decide quantas
+    collections cabem nele.
+
+A SOLUÇÃO — códigos int8 + reavaliação exata (VECTOR_BACKEND=int8):
+
+    pergunta ──▶ 1ª passada: produto com os códigos int8 ──▶ R candidatos
+                 (todos os chunks, em blocos; 4x menos bytes)     │
+                                                                  ▼
+                 top k ◀── 2ª passada: float32 exato ◀── só as R linhas
+
+    QUANTIZAÇÃO (por vetor, simétrica): cada embedding normalizado vira
+    384 códigos int8 e uma escala:
+
+        escala = max|x| / 127        código = round(x / escala)
+        x · q  ≈  escala × (código · q)
+
+    388 bytes por chunk em vez de 1536. A ordem aproximada erra pouco,
+    e só perto do corte: os FLAT_RESCORE_CANDIDATES melhores da 1ª
+    passada são reavaliados com os vetores float32 originais.
+
+    MEMMAP: os arquivos são abertos com np.load(mmap_mode="r") — o SO
+    carrega as páginas sob demanda. A 1ª passada percorre os códigos;
+    dos vetores float32 só são lidas as linhas dos candidatos. O resto
+    fica no disco (ou no cache de páginas, se sobrar memória).
+
+BUSCA EXATA (VECTOR_BACKEND=numpy):
+    Para poucos milhares de chunks (como os arquivos de data/), o HNSW +
+    SQLite do Chroma custa mais que a conta inteira. O modo numpy usa só
+    a matriz float32 contígua (n, d) e responde com força bruta:
+
+        scores = perguntas @ vetores.T        (m, n) — um produto de matrizes
+        top k  = np.argpartition(-scores, k)  O(n), sem ordenar tudo
+
+    Resultado EXATO (sem a aproximação do HNSW) e várias perguntas numa
+    conta só (batch.retrieve_batch). O custo cresce linearmente com n:
+    para corpora grandes, prefira int8 ou chroma.
+
+ARQUIVOS (vector_store/flat/):
+    (com sharding, um diretório por shard: vector_store/flat/<shard>/)
+    <prefixo>.ids.npy      (n,)   IDs dos chunks, ORDENADOS (busca binária)
+    <prefixo>.codes.npy    (n, d) int8     ← percorridos a cada consulta
+    <prefixo>.scales.npy   (n,)   float32
+    <prefixo>.vectors.npy  (n, d) float32  ← linhas reavaliadas (int8) ou todas (numpy)
+    index.json             prefixo + versão atuais (troca atômica)
+
+O CHROMA CONTINUA SENDO A FONTE:
+    Textos, metadados e filtros `where` seguem no Chroma (SQLite). O
+    índice plano é DERIVADO dos embeddings guardados nele: reconstruído
+    ao fim de cada ingestão — ou na 1ª consulta, se a versão do
+    manifesto mudou. As buscas não passam pelo HNSW.
+"""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from src.config.settings import settings
+from src.langchain_rag.metrics import registry, stage_timer
+
+_FLAT_DIR = settings.vector_store_dir / "flat"
+_INDEX_FILE = "index.json"
+_FORMAT = 1
+
+# Linhas convertidas para float32 por vez na 1ª passada: memória temporária
+# de bloco × d × 4 bytes (~25 MB com 384 dimensões)
+_BLOCK_ROWS = 16384
+
+# IDs/embeddings lidos do Chroma por chamada durante a construção
+_READ_PAGE = 5000
+
+VECTOR_BACKENDS = ("chroma", "int8", "numpy")
+
+FLAT_INDEX_LOADS = registry.counter(
+    "rag_flat_index_loads_total", "Aberturas do índice plano por motivo (open/build)"
+)
+
+
+def flat_index_enabled() -> bool:
+    """True se as buscas vetoriais usam o índice plano (VECTOR_BACKEND != "chroma")."""
+    if settings.vector_backend not in VECTOR_BACKENDS:
+        raise ValueError(
+            f"VECTOR_BACKEND inválido: {settings.vector_backend!r} "
+            f"(use {', '.join(map(repr, VECTOR_BACKENDS))})"
+        )
+    return settings.vector_backend != "chroma"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class FlatIndex:
+    """
+    Índice plano somente leitura (os arquivos de UMA construção).
+
+    Uso:
+        index = get_flat_index(store)
+        rows, scores = index.search(vetores_das_perguntas, k=5)[0]
+        index.ids_at(rows)  # → ["id do chunk", ...]
+    """
+
+    def __init__(self, directory: Path, meta: dict):
+        prefix = directory / meta["prefix"]
+        self.version: str = meta["version"]
+        self.ids = np.load(f"{prefix}.ids.npy", mmap_mode="r")
+        self.codes = np.load(f"{prefix}.codes.npy", mmap_mode="r")
+        self.scales = np.load(f"{prefix}.scales.npy", mmap_mode="r")
+        self.vectors = np.load(f"{prefix}.vectors.npy", mmap_mode="r")
+
+    @classmethod
+    def open(cls, directory: Path = _FLAT_DIR) -> "FlatIndex | None":
+        """Abre a construção atual (None se não houver índice gravado)."""
+        try:
+            meta = json.loads((directory / _INDEX_FILE).read_text(encoding="utf-8"))
+            if meta.get("format") != _FORMAT:
+                return None
+            return cls(directory, meta)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def footprint(self) -> dict[str, int]:
+        """Bytes de cada arquivo. A 1ª passada lê codes + scales; vectors só nos candidatos."""
+        return {
+            "ids": self.ids.nbytes,
+            "codes": self.codes.nbytes,
+            "scales": self.scales.nbytes,
+            "vectors": self.vectors.nbytes,
+        }
+
+    def ids_at(self, rows: np.ndarray) -> list[str]:
+        return [chunk_id.decode("utf-8") for chunk_id in self.ids[rows]]
+
+    def rows_of(self, ids: list[str]) -> np.ndarray:
+        """Linhas dos IDs informados, em ordem crescente (IDs fora do índice são ignorados)."""
+        if not len(self.ids) or not ids:
+            return np.empty(0, dtype=np.int64)
+        # IDs mais longos que os do índice não estão nele (e seriam truncados)
+        width = self.ids.dtype.itemsize
+        encoded = [chunk_id.encode("utf-8") for chunk_id in ids]
+        wanted = np.unique(np.array([value for value in encoded if len(value) <= width],
+                                    dtype=self.ids.dtype))
+        positions = np.minimum(np.searchsorted(self.ids, wanted), len(self.ids) - 1)
+        return positions[self.ids[positions] == wanted].astype(np.int64)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        rows: np.ndarray | None = None,
+        rescore: int | None = None,
+        exact: bool | None = None,
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Os k chunks mais próximos (cosseno) de cada pergunta.
+
+        Args:
+            queries: Embeddings das perguntas, shape (m, d) ou (d,).
+            k: Nº de resultados por pergunta.
+            rows: Restringe a busca a estas linhas (filtro `where`). None = todas.
+            rescore: Candidatos da 1ª passada reavaliados em float32 (modo int8).
+                     Padrão: settings.flat_rescore_candidates
+            exact: Força bruta sobre os vetores float32, sem a passada int8.
+                   Padrão: VECTOR_BACKEND == "numpy"
+
+        Returns:
+            Uma tupla (linhas, scores) por pergunta, do mais ao menos próximo.
+        """
+        queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        total = len(self.ids) if rows is None else len(rows)
+        k = min(k, total)
+        if k <= 0:
+            return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))] * len(queries)
+        exact = settings.vector_backend == "numpy" if exact is None else exact
+        if exact:
+            return self._exact(queries, k, rows)
+
+        rescore = min(max(k, rescore or settings.flat_rescore_candidates), total)
+        results = []
+        for query, candidates in zip(queries, self._first_pass(queries, rescore, rows)):
+            candidates = np.sort(candidates)  # leitura do memmap em ordem
+            scores = self.vectors[candidates] @ query
+            top = np.argsort(-scores, kind="stable")[:k]
+            results.append((candidates[top], scores[top]))
+        return results
+
+    def _exact(
+        self, queries: np.ndarray, k: int, rows: np.ndarray | None
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Força bruta: um produto de matrizes e um argpartition para o lote todo."""
+        matrix = self.vectors if rows is None else self.vectors[rows]
+        scores = queries @ matrix.T  # (m, n)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")  # só os k, não os n
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        if rows is not None:
+            top = rows[top]
+        return list(zip(top, top_scores))
+
+    def _first_pass(self, queries: np.ndarray, r: int, rows: np.ndarray | None) -> np.ndarray:
+        """Linhas dos r melhores scores aproximados (int8) de cada pergunta, shape (m, r)."""
+        m = len(queries)
+        best_rows = np.empty((m, 0), dtype=np.int64)
+        best_scores = np.empty((m, 0), dtype=np.float32)
+        total = len(self.ids) if rows is None else len(rows)
+
+        for start in range(0, total, _BLOCK_ROWS):
+            end = min(start + _BLOCK_ROWS, total)
+            if rows is None:
+                block = np.arange(start, end)
+                codes, scales = self.codes[start:end], self.scales[start:end]
+            else:
+                block = rows[start:end]
+                codes, scales = self.codes[block], self.scales[block]
+            scores = (codes.astype(np.float32) @ queries.T).T * scales  # (m, bloco)
+
+            all_rows = np.concatenate([best_rows, np.broadcast_to(block, (m, len(block)))], axis=1)
+            all_scores = np.concatenate([best_scores, scores], axis=1)
+            if all_scores.shape[1] > r:
+                keep = np.argpartition(-all_scores, r - 1, axis=1)[:, :r]
+                all_rows = np.take_along_axis(all_rows, keep, axis=1)
+                all_scores = np.take_along_axis(all_scores, keep, axis=1)
+            best_rows, best_scores = all_rows, all_scores
+        return best_rows
+
+
+# ─── Construção ──────────────────────────────────────────────────────────────
+
+def _all_ids(store: Chroma) -> list[str]:
+    ids: list[str] = []
+    while True:
+        page = store._collection.get(include=[], limit=_READ_PAGE, offset=len(ids))["ids"]
+        ids.extend(page)
+        if len(page) < _READ_PAGE:
+            return ids
+
+
+def _flat_dir(shard: str) -> Path:
+    return _FLAT_DIR / shard if shard else _FLAT_DIR
+
+
+def build_flat_index(
+    store: Chroma,
+    version: str | None = None,
+    shard: str = "",
+) -> FlatIndex:
+    """
+    (Re)constrói o índice plano a partir dos embeddings guardados no Chroma.
+
+    Os IDs são lidos e ordenados primeiro; os embeddings vêm depois, em
+    páginas, direto para os arquivos (np.lib.format.open_memmap) — nunca
+    há uma cópia float32 do corpus inteiro em memória.
+
+    Cada construção grava arquivos com prefixo próprio e troca o
+    index.json por último: quem ainda tem a construção anterior mapeada
+    segue lendo os arquivos antigos até reabrir.
+
+    Args:
+        store: Vector store (fonte dos embeddings).
+        version: Versão do conteúdo indexado. Padrão: get_store_version(shard)
+        shard: Shard do store ("" = sem sharding); define o diretório.
+    """
+    # Import tardio: indexing importa retrieval, que importa este módulo
+    from src.langchain_rag.indexing import get_store_version
+
+    version = get_store_version(shard) if version is None else version
+    ids = sorted(_all_ids(store))
+    prefix = uuid.uuid4().hex[:12]
+    directory = _flat_dir(shard)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def path(name: str) -> Path:
+        return directory / f"{prefix}.{name}.npy"
+
+    np.save(path("ids"), np.array([chunk_id.encode("utf-8") for chunk_id in ids], dtype=bytes))
+    vectors = codes = scales = None
+    for start in range(0, len(ids), _READ_PAGE):
+        page = ids[start:start + _READ_PAGE]
+        result = store._collection.get(ids=page, include=["embeddings"])
+        by_id = dict(zip(result["ids"], result["embeddings"]))
+        batch = _normalize(np.asarray([by_id[chunk_id] for chunk_id in page], dtype=np.float32))
+        if vectors is None:
+            shape = (len(ids), batch.shape[1])
+            vectors = np.lib.format.open_memmap(path("vectors"), "w+", np.float32, shape)
+            codes = np.lib.format.open_memmap(path("codes"), "w+", np.int8, shape)
+            scales = np.lib.format.open_memmap(path("scales"), "w+", np.float32, (len(ids),))
+
+        batch_scales = np.abs(batch).max(axis=1) / 127
+        end = start + len(page)
+        vectors[start:end] = batch
+        codes[start:end] = np.rint(batch / np.where(batch_scales == 0, 1.0, batch_scales)[:, None])
+        scales[start:end] = batch_scales
+
+    if vectors is None:  # collection vazia
+        np.save(path("vectors"), np.empty((0, 0), dtype=np.float32))
+        np.save(path("codes"), np.empty((0, 0), dtype=np.int8))
+        np.save(path("scales"), np.empty(0, dtype=np.float32))
+    else:
+        for array in (vectors, codes, scales):
+            array.flush()
+        del vectors, codes, scales
+
+    meta = {"format": _FORMAT, "version": version, "prefix": prefix, "count": len(ids)}
+    tmp_path = directory / f"{_INDEX_FILE}.tmp"
+    tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp_path, directory / _INDEX_FILE)
+
+    for old in directory.glob("*.npy"):
+        if not old.name.startswith(f"{prefix}."):
+            try:
+                old.unlink()
+            except OSError:  # Windows: arquivo ainda mapeado por outro processo
+                pass
+    return FlatIndex(directory, meta)
+
+
+def remove_stale_indexes(shards: set[str]) -> None:
+    """
+    Apaga os índices planos de shards que deixaram de existir.
+
+    Depois de mudar SHARD_BY/VECTOR_SHARDS, os diretórios do esquema
+    antigo (vector_store/flat/<shard>/, ou os arquivos da raiz de flat/,
+    do modo sem sharding) ficariam no disco para sempre.
+
+    Args:
+        shards: Shards do esquema atual ("" = sem sharding).
+    """
+    if not _FLAT_DIR.is_dir():
+        return
+    with _index_lock:
+        for path in _FLAT_DIR.iterdir():
+            if path.is_dir():
+                if path.name not in shards:
+                    shutil.rmtree(path, ignore_errors=True)  # Windows: mapeado em outro processo
+                    _indexes.pop(path.name, None)
+            elif "" not in shards and (path.name == _INDEX_FILE or path.suffix == ".npy"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        if "" not in shards:
+            _indexes.pop("", None)
+
+
+# ─── Índice do processo + busca com Documents ────────────────────────────────
+
+_indexes: dict[str, FlatIndex] = {}
+_index_lock = threading.Lock()
+
+
+def get_flat_index(store: Chroma, shard: str = "") -> FlatIndex:
+    """
+    Índice plano do processo, reaberto (ou reconstruído) quando a versão muda.
+
+    Mesmo esquema do registro de stores (retrieval._StoreRegistry): o
+    caminho comum custa um stat() do manifesto. Se outro processo rodou
+    a ingestão, lê a construção nova; se ela não existe ou é de outra
+    versão (ex: VECTOR_BACKEND acabou de ser ligado), constrói aqui.
+
+    Com sharding, cada shard tem seu índice e sua versão: uma ingestão
+    que só mexeu no shard "rh" não reconstrói o índice de "ti".
+    """
+    from src.langchain_rag.indexing import get_store_version
+
+    version = get_store_version(shard)
+    index = _indexes.get(shard)
+    if index is not None and index.version == version:
+        return index
+
+    with _index_lock:
+        index = _indexes.get(shard)
+        if index is not None and index.version == version:
+            return index
+        index = FlatIndex.open(_flat_dir(shard))
+        if index is not None and index.version == version:
+            FLAT_INDEX_LOADS.inc(reason="open")
+        else:
+            index = build_flat_index(store, version, shard)
+            FLAT_INDEX_LOADS.inc(reason="build")
+        _indexes[shard] = index
+        return index
+
+
+def fetch_documents(store: Chroma, ids: list[str]) -> dict[str, Document]:
+    """
+    Documents dos IDs informados, lidos do Chroma numa chamada só.
+
+    IDs repetidos são lidos uma vez: o mesmo Document é devolvido para
+    todos — trate-os como somente leitura.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    if not unique_ids:
+        return {}
+    chunks = store._collection.get(ids=unique_ids, include=["documents", "metadatas"])
+    return {
+        chunk_id: Document(id=chunk_id, page_content=text, metadata=metadata or {})
+        for chunk_id, text, metadata in zip(chunks["ids"], chunks["documents"], chunks["metadatas"])
+    }
+
+
+def _filter_rows(store: Chroma, index: FlatIndex, where: dict | None) -> np.ndarray | None:
+    """Linhas que passam no filtro `where` (resolvido pelo Chroma/SQLite), ou None."""
+    if not where:
+        return None
+    with stage_timer("metadata_filter"):
+        return index.rows_of(store._collection.get(where=where, include=[])["ids"])
+
+
+def flat_search(
+    store: Chroma,
+    vectors: list[list[float]],
+    k: int,
+    where: dict | None = None,
+    shard: str = "",
+) -> list[list[tuple[float, Document]]]:
+    """
+    Busca vetorial no índice plano: (score, Document) por pergunta, do maior score.
+
+    Aceita várias perguntas de uma vez (batch.retrieve_batch): a busca
+    vira um produto de matrizes (por bloco de códigos, no modo int8).
+    """
+    index = get_flat_index(store, shard)
+    rows = _filter_rows(store, index, where)
+    with stage_timer("vector_search"):
+        hits = [
+            list(zip(scores.tolist(), index.ids_at(found)))
+            for found, scores in index.search(np.asarray(vectors), k, rows)
+        ]
+    docs_by_id = fetch_documents(store, [chunk_id for pairs in hits for _, chunk_id in pairs])
+    return [
+        [(score, docs_by_id[chunk_id]) for score, chunk_id in pairs if chunk_id in docs_by_id]
+        for pairs in hits
+    ]
+
+
+def flat_candidates(
+    store: Chroma,
+    vector: list[float],
+    k: int,
+    where: dict | None = None,
+    shard: str = "",
+) -> tuple[list[Document], np.ndarray]:
+    """Os k candidatos de uma pergunta com seus vetores float32 (para o MMR)."""
+    index = get_flat_index(store, shard)
+    rows = _filter_rows(store, index, where)
+    with stage_timer("vector_search"):
+        found, _ = index.search(np.asarray(vector), k, rows)[0]
+        ids = index.ids_at(found)
+    docs_by_id = fetch_documents(store, ids)
+    keep = [i for i, chunk_id in enumerate(ids) if chunk_id in docs_by_id]
+    return [docs_by_id[ids[i]] for i in keep], np.asarray(index.vectors[found[keep]])
@@ -0,0 +1,184 @@
+"""
+Memória de conversa — Histórico com orçamento de tokens.
+
+O PROBLEMA:
+    Uma lista chat_history que só cresce vai INTEIRA para o prompt a cada
+    pergunta. Na 30ª pergunta, o Groq recebe as 29 anteriores com as
+    respostas: o prompt (e a latência, e o custo) cresce a cada turno,
+    até estourar o limite de contexto do modelo.
+
+A SOLUÇÃO — janela + resumo incremental:
+
+    turnos antigos                    últimos N turnos
+    ┌──────────────────────────┐     ┌─────────────────────────┐
+    │ T1  T2  T3  ...  T20     │ ──▶ │ T21  T22  T23  T24      │
+    └──────────────────────────┘     └─────────────────────────┘
+         resumo (≤ S tokens)               literais
+
+    - Os últimos N turnos vão LITERAIS (é deles que "e o plano de
+      saúde?" depende)
+    - Turnos que saem da janela são RESUMIDOS pelo LLM — uma vez só:
+      o resumo novo = resumo anterior + turnos que acabaram de sair.
+      Nunca re-resumimos a conversa inteira.
+    - Tudo é medido em tokens (tokens.py): resumo + janela ≤ max_tokens.
+      Se os turnos recentes forem enormes, a janela encolhe (os mais
+      antigos dela vão para o resumo).
+
+    Resultado: o tamanho do histórico no prompt é LIMITADO, não importa
+    quantos turnos a sessão tenha.
+"""
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from src.config.settings import settings
+from src.langchain_rag.concurrency import limit_llm_concurrency
+from src.langchain_rag.llm import get_llm
+from src.langchain_rag.tokens import count_tokens, truncate_to_tokens
+
+_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Você resume conversas entre um usuário e um assistente sobre "
+        "documentos internos de uma empresa. Escreva em português, em até "
+        "{max_words} palavras, mantendo fatos, números, nomes de documentos "
+        "e o assunto em discussão. Não invente nada.",
+    ),
+    (
+        "human",
+        "RESUMO ATÉ AGORA:\n{summary}\n\n"
+        "NOVOS TRECHOS DA CONVERSA:\n{turns}\n\n"
+        "RESUMO ATUALIZADO:",
+    ),
+])
+
+# Prefixo do resumo quando entra no prompt
+_SUMMARY_PREFIX = "Resumo da conversa anterior: "
+
+
+class ConversationMemory:
+    """
+    Histórico de conversa com orçamento de tokens.
+
+    Uso:
+        memory = ConversationMemory()
+        chain.invoke({"question": q, "chat_history": memory})
+        memory.add_turn(q, resposta)     # resume turnos antigos, se preciso
+
+    A chain aceita a memória no lugar da lista de mensagens (chama
+    .messages()). O histórico completo continua em .turns (para exibir).
+
+    Args:
+        llm: Modelo usado para os resumos. Padrão: get_llm(temperature=0)
+        max_tokens: Orçamento total do histórico no prompt.
+        keep_turns: Máximo de turnos recentes mantidos literais.
+        summary_max_tokens: Teto do resumo.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel | None = None,
+        max_tokens: int | None = None,
+        keep_turns: int | None = None,
+        summary_max_tokens: int | None = None,
+    ):
+        self._llm = llm
+        self.max_tokens = max_tokens or settings.history_max_tokens
+        self.keep_turns = keep_turns or settings.history_keep_turns
+        self.summary_max_tokens = summary_max_tokens or settings.history_summary_max_tokens
+
+        self.turns: list[tuple[str, str]] = []  # (pergunta, resposta), sessão inteira
+        self.summary = ""
+        self._summarized = 0  # turns[:_summarized] já estão no resumo
+        self._summarizer = None
+
+    # ─── API ─────────────────────────────────────────────────────────────────
+
+    def add_turn(self, question: str, answer: str) -> None:
+        """Registra um turno e compacta o histórico se passou do orçamento."""
+        self.turns.append((question, answer))
+        self._compact()
+
+    def messages(self) -> list[BaseMessage]:
+        """Mensagens para o MessagesPlaceholder: resumo (se houver) + janela recente."""
+        messages: list[BaseMessage] = []
+        if self.summary:
+            messages.append(SystemMessage(content=_SUMMARY_PREFIX + self.summary))
+        budget = self.max_tokens - self.summary_max_tokens
+        for question, answer in self.turns[self._summarized:]:
+            # Último recurso: um único turno gigante é truncado para caber
+            if count_tokens(question) + count_tokens(answer) > budget:
+                question = truncate_to_tokens(question, budget // 4)
+                answer = truncate_to_tokens(answer, budget - count_tokens(question))
+            messages.append(HumanMessage(content=question))
+            messages.append(AIMessage(content=answer))
+        return messages
+
+    def prompt_tokens(self) -> int:
+        """Tokens que o histórico ocupa hoje no prompt."""
+        return sum(count_tokens(message.content) for message in self.messages())
+
+    @property
+    def summarized_turns(self) -> int:
+        return self._summarized
+
+    def clear(self) -> None:
+        self.turns.clear()
+        self.summary = ""
+        self._summarized = 0
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    # ─── Compactação ─────────────────────────────────────────────────────────
+
+    def _window_tokens(self, start: int) -> int:
+        return sum(count_tokens(q) + count_tokens(a) for q, a in self.turns[start:])
+
+    def _compact(self) -> None:
+        """
+        Move para o resumo os turnos que não cabem na janela.
+
+        A janela é a maior sequência de turnos recentes (≤ keep_turns)
+        que cabe no orçamento junto com o resumo. O turno mais recente
+        sempre fica — se sozinho não couber, é truncado em messages()
+        (o texto completo continua em .turns).
+        """
+        start = max(self._summarized, len(self.turns) - self.keep_turns)
+        budget = self.max_tokens - self.summary_max_tokens
+        while start < len(self.turns) - 1 and self._window_tokens(start) > budget:
+            start += 1
+
+        if start > self._summarized:
+            self.summary = self._summarize(self.turns[self._summarized:start])
+            self._summarized = start
+
+    def _summarize(self, turns: list[tuple[str, str]]) -> str:
+        """Resumo incremental: resumo anterior + turnos novos → resumo novo."""
+        if self._summarizer is None:
+            llm = self._llm or get_llm(temperature=0.0)
+            self._summarizer = _SUMMARY_PROMPT | limit_llm_concurrency(llm) | StrOutputParser()
+
+        text = "\n".join(f"Usuário: {q}\nAssistente: {a}" for q, a in turns)
+        summary = self._summarizer.invoke({
+            "summary": self.summary or "(vazio)",
+            "turns": text,
+            # ~0.75 palavra por token: pedimos menos que o teto, e truncamos se passar
+            "max_words": int(self.summary_max_tokens * 0.6),
+        })
+        # O prefixo entra no prompt junto com o resumo: conta no mesmo teto
+        budget = self.summary_max_tokens - count_tokens(_SUMMARY_PREFIX)
+        return truncate_to_tokens(summary.strip(), budget)
+
+
+def history_messages(
+    history: ConversationMemory | list[BaseMessage] | None,
+) -> list[BaseMessage]:
+    """Aceita ConversationMemory ou uma lista de mensagens (compatibilidade)."""
+    if history is None:
+        return []
+    if isinstance(history, ConversationMemory):
+        return history.messages()
+    return list(history)
@@ -0,0 +1,526 @@
+"""
+Indexação incremental — Re-ingestão baseada em hash de conteúdo.
+
+O PROBLEMA:
+    A forma mais simples de re-indexar é apagar tudo (reset_collection)
+    e embeddar o corpus inteiro de novo. Funciona, mas custa caro:
+    editar UMA linha de UM arquivo re-embeda TODOS os chunks.
+
+A SOLUÇÃO — 3 ideias combinadas:
+    1. IDs ESTÁVEIS por chunk
+       id = sha256(caminho do arquivo + hash do conteúdo do chunk)
+       O mesmo texto no mesmo arquivo gera SEMPRE o mesmo ID.
+       Se o chunk não mudou, o ID já está no Chroma → não re-embeda.
+
+    2. MANIFESTO persistido (JSON ao lado do vector_store/)
+       Guarda, por arquivo: mtime, tamanho, sha256, nº de chunks e quando
+       foi ingerido. Também serve de CATÁLOGO das fontes indexadas
+       (load_catalog): listar documentos lê o manifesto, sem varrer os
+       chunks do Chroma.
+
+    3. DIFF entre o disco e o manifesto a cada execução:
+       - mtime + tamanho iguais  → arquivo nem é lido
+       - conteúdo igual (sha256) → só atualiza o mtime no manifesto
+       - conteúdo alterado       → re-divide o arquivo e embeda SÓ os
+                                   chunks com IDs novos; apaga os que sumiram
+       - arquivo removido        → apaga todos os seus chunks
+
+    É a mesma estratégia do `make` e do `rsync`: comparar metadados
+    baratos primeiro, e só olhar o conteúdo quando necessário.
+
+    A leitura e o chunking dos arquivos alterados rodam em paralelo e em
+    fluxo (ver pipeline.py): os chunks novos seguem em lotes para o
+    embedding + upsert, sem carregar o corpus inteiro em memória.
+
+QUANDO É FEITA UMA RECONSTRUÇÃO COMPLETA:
+    - Flag full=True (ex: python scripts/ingest.py --full)
+    - Manifesto inexistente ou collection vazia
+    - Mudança de configuração (modelo de embedding, tamanho de chunk...),
+      porque aí TODOS os vetores/chunks antigos ficam incompatíveis
+
+Com VECTOR_BACKEND=int8 ou numpy, o índice plano (flat_store.py) é reconstruído
+ao final, a partir dos embeddings gravados no Chroma.
+
+SHARDING (SHARD_BY, ver sharding.py):
+    Cada arquivo vai para a collection do seu shard; o manifesto continua
+    único, mas guarda também a versão de cada shard. Com shard="rh", só
+    os arquivos daquele shard são sincronizados — e com full=True, só
+    aquele shard é reconstruído.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from src.config.settings import settings
+from src.langchain_rag.embeddings import _DEFAULT_MODEL
+from src.langchain_rag.flat_store import (
+    flat_index_enabled,
+    get_flat_index,
+    remove_stale_indexes,
+)
+from src.langchain_rag.ingestion import iter_source_files
+from src.langchain_rag.pipeline import FileTask, iter_processed
+from src.langchain_rag.retrieval import (
+    delete_chunks,
+    drop_stale_collections,
+    get_chunk_ids,
+    load_shard_stores,
+    load_vector_store,
+    reset_shard,
+    reset_vector_store,
+    update_chunk_metadata,
+    upsert_chunks,
+)
+from src.langchain_rag.sharding import list_shards, shard_of, sharding_enabled
+
+_MANIFEST_PATH = settings.vector_store_dir / "ingest_manifest.json"
+_MANIFEST_FORMAT = 1
+
+# Salva o manifesto a cada N lotes gravados: se a ingestão for
+# interrompida, a próxima execução retoma de onde parou.
+_CHECKPOINT_EVERY = 20
+
+
+# ─── Manifesto ───────────────────────────────────────────────────────────────
+
+@dataclass
+class FileEntry:
+    """Estado de um arquivo na última ingestão."""
+
+    mtime_ns: int
+    size: int
+    sha256: str
+    chunks: int
+    ingested_at: float = 0.0  # timestamp (epoch) da última vez que o conteúdo foi indexado
+
+
+@dataclass
+class IngestManifest:
+    """
+    Manifesto persistido da ingestão.
+
+    Attributes:
+        config: Parâmetros que, se mudarem, invalidam o índice inteiro.
+        files: Estado de cada arquivo, indexado pelo caminho relativo a data/.
+        version: Hash do conteúdo indexado — muda sempre que o índice muda.
+        shards: Versão de cada shard (só com sharding): muda só quando
+                arquivos daquele shard mudam.
+    """
+
+    config: dict = field(default_factory=dict)
+    files: dict[str, FileEntry] = field(default_factory=dict)
+    version: str = ""
+    shards: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path = _MANIFEST_PATH) -> "IngestManifest":
+        """Lê o manifesto do disco (ou retorna um vazio se não existir)."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls()
+        if data.get("format") != _MANIFEST_FORMAT:
+            return cls()
+        return cls(
+            config=data.get("config", {}),
+            files={key: FileEntry(**entry) for key, entry in data.get("files", {}).items()},
+            version=data.get("version", ""),
+            shards=data.get("shards", {}),
+        )
+
+    def save(self, path: Path = _MANIFEST_PATH) -> None:
+        """
+        Grava o manifesto de forma atômica.
+
+        Escreve num arquivo temporário e troca com os.replace(): se o
+        processo morrer no meio, o manifesto antigo continua íntegro.
+        """
+        self.version = self.compute_version()
+        self.shards = self.compute_shard_versions()
+        data = {
+            "format": _MANIFEST_FORMAT,
+            "version": self.version,
+            "shards": self.shards,
+            "config": self.config,
+            "totals": self.totals(),
+            "files": {key: asdict(entry) for key, entry in sorted(self.files.items())},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp_path, path)
+        _forget_catalog()
+
+    def totals(self) -> dict:
+        """Totais do catálogo: nº de arquivos, chunks e bytes indexados."""
+        return {
+            "files": len(self.files),
+            "chunks": sum(entry.chunks for entry in self.files.values()),
+            "bytes": sum(entry.size for entry in self.files.values()),
+        }
+
+    def compute_version(self) -> str:
+        """Hash da configuração + hash de cada arquivo indexado."""
+        digest = hashlib.sha256(json.dumps(self.config, sort_keys=True).encode("utf-8"))
+        for key, entry in sorted(self.files.items()):
+            digest.update(f"{key}\0{entry.sha256}\0".encode("utf-8"))
+        return digest.hexdigest()
+
+    def compute_shard_versions(self) -> dict[str, str]:
+        """Mesmo hash de compute_version(), só com os arquivos de cada shard."""
+        if not sharding_enabled():
+            return {}
+        config = json.dumps(self.config, sort_keys=True).encode("utf-8")
+        digests = {}
+        for key, entry in sorted(self.files.items()):
+            digest = digests.setdefault(shard_of(key), hashlib.sha256(config))
+            digest.update(f"{key}\0{entry.sha256}\0".encode("utf-8"))
+        return {shard: digest.hexdigest() for shard, digest in sorted(digests.items())}
+
+
+# Memo do manifesto: (identidade do arquivo no stat(), manifesto lido)
+_manifest_memo: tuple[tuple, IngestManifest] = ((), IngestManifest())
+
+
+def _forget_catalog() -> None:
+    """Descarta o memo (o manifesto acabou de ser gravado por este processo)."""
+    global _manifest_memo
+    _manifest_memo = ((), IngestManifest())
+
+
+def load_catalog() -> IngestManifest:
+    """
+    Catálogo das fontes indexadas (o manifesto da última ingestão).
+
+    Só relê o arquivo quando ele muda (ex: ingest.py rodou em outro
+    processo) — a checagem normal custa um stat(). mtime, inode e tamanho
+    juntos: duas gravações no mesmo tique do relógio do sistema de
+    arquivos ainda são percebidas. O objeto retornado é compartilhado:
+    trate-o como somente leitura.
+    """
+    global _manifest_memo
+    try:
+        stat = _MANIFEST_PATH.stat()
+    except FileNotFoundError:
+        return IngestManifest()
+    key = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+    if _manifest_memo[0] != key:
+        _manifest_memo = (key, IngestManifest.load())
+    return _manifest_memo[1]
+
+
+def get_store_version(shard: str | None = None) -> str:
+    """
+    Versão do conteúdo indexado (vazia se nada foi indexado ainda).
+
+    Útil para invalidar caches que dependem do conteúdo do vector store.
+
+    Args:
+        shard: Versão só deste shard (ver sharding.py). None ou "" = o
+               índice inteiro.
+    """
+    catalog = load_catalog()
+    return catalog.shards.get(shard, "") if shard else catalog.version
+
+
+# ─── Indexação ───────────────────────────────────────────────────────────────
+
+@dataclass
+class IndexReport:
+    """Resumo de uma execução de indexação."""
+
+    full_rebuild: bool = False
+    files_unchanged: int = 0
+    files_added: int = 0
+    files_changed: int = 0
+    files_deleted: int = 0
+    chunks_embedded: int = 0
+    chunks_deleted: int = 0
+    chunks_total: int = 0
+    shards: dict[str, int] = field(default_factory=dict)  # chunks por shard (com sharding)
+
+
+def _index_config(chunk_size: int, chunk_overlap: int, chunk_strategy: str) -> dict:
+    if chunk_strategy == "markdown":
+        chunking = {
+            "chunker": "markdown-tokens-v1",
+            "chunk_max_tokens": settings.chunk_max_tokens,
+            "chunk_overlap_tokens": settings.chunk_overlap_tokens,
+        }
+    else:
+        chunking = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+    config = {
+        "embedding_model": _DEFAULT_MODEL,
+        **chunking,
+        # Índices construídos junto com o Chroma: incluir aqui força uma
+        # reconstrução completa quando um índice novo é adicionado
+        "lexical_index": "bm25-v1",
+        # Campos de metadados dos chunks (metadata.py): chunks antigos não os têm
+        "metadata_fields": "v1",
+    }
+    if sharding_enabled():
+        # Mudar a divisão em shards muda a collection de cada chunk
+        config["sharding"] = (
+            f"hash:{settings.vector_shards}" if settings.shard_by == "hash" else settings.shard_by
+        )
+    return config
+
+
+class _ChunkBuffer:
+    """
+    Acumula chunks novos até formar um lote e então grava no vector store.
+
+    A entrada de um arquivo só vai para o manifesto DEPOIS que todos os
+    seus chunks foram gravados. Assim, um checkpoint nunca marca como
+    indexado um arquivo cujos chunks ainda estavam só em memória.
+
+    Com sharding, cada chunk vai para o store do shard do seu arquivo.
+    """
+
+    def __init__(self, stores: dict[str, Chroma], manifest: IngestManifest, batch_size: int):
+        self.stores = stores
+        self.manifest = manifest
+        self.batch_size = batch_size
+        self.pending: dict[str, tuple[list[Document], list[str]]] = {}
+        self.size = 0
+        self.entries: dict[str, FileEntry] = {}
+        self.flushes = 0
+
+    def add(self, source_path: str, entry: FileEntry, chunks: list[Document], ids: list[str]):
+        shard_chunks, shard_ids = self.pending.setdefault(shard_of(source_path), ([], []))
+        shard_chunks.extend(chunks)
+        shard_ids.extend(ids)
+        self.size += len(chunks)
+        self.entries[source_path] = entry
+        if self.size >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        for shard, (chunks, ids) in self.pending.items():
+            if chunks:
+                upsert_chunks(self.stores[shard], chunks, ids)
+        self.manifest.files.update(self.entries)
+        self.pending, self.size, self.entries = {}, 0, {}
+        self.flushes += 1
+        if self.flushes % _CHECKPOINT_EVERY == 0:
+            self.manifest.save()
+
+
+def _iter_tasks(
+    data_dir: Path,
+    manifest: IngestManifest,
+    report: IndexReport,
+    seen: set[str],
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_strategy: str,
+    shard: str | None,
+) -> Iterator[FileTask]:
+    """Gera tarefas só para arquivos cujo mtime/tamanho mudou (ou novos)."""
+    for path in iter_source_files(data_dir):
+        source_path = path.relative_to(data_dir).as_posix()
+        if shard is not None and shard_of(source_path) != shard:
+            continue
+        seen.add(source_path)
+        stat = path.stat()
+        entry = manifest.files.get(source_path)
+
+        # Caminho rápido: metadados do sistema de arquivos iguais → nem lê
+        if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            report.files_unchanged += 1
+            continue
+
+        yield FileTask(
+            path=path,
+            source_path=source_path,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            known_sha256=entry.sha256 if entry else None,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            chunk_strategy=chunk_strategy,
+            chunk_max_tokens=settings.chunk_max_tokens,
+            chunk_overlap_tokens=settings.chunk_overlap_tokens,
+        )
+
+
+def _open_stores(data_dir: Path, manifest: IngestManifest, shard: str | None) -> dict[str, Chroma]:
+    """
+    Abre, de uma vez, o store de cada shard que a ingestão pode tocar.
+
+    Tudo antes do 1º checkpoint: salvar o manifesto muda a versão, e um
+    load_vector_store() depois disso reabriria o System do Chroma que os
+    stores já abertos estão usando.
+    """
+    if shard is not None:
+        shards = {shard}
+    else:
+        shards = set(list_shards()) | {shard_of(source_path) for source_path in manifest.files}
+        if settings.shard_by == "directory":  # diretórios novos em data/
+            shards |= {
+                shard_of(path.relative_to(data_dir).as_posix())
+                for path in iter_source_files(data_dir)
+            }
+    return {name: load_vector_store(name) for name in sorted(shards)}
+
+
+def _validate_shard(shard: str) -> None:
+    if not sharding_enabled():
+        raise ValueError("shard só existe com sharding (SHARD_BY=hash ou directory)")
+    if settings.shard_by == "hash" and shard not in list_shards():
+        raise ValueError(f"shard inválido: {shard!r} (use {', '.join(list_shards())})")
+
+
+def index_documents(
+    directory: str | Path | None = None,
+    full: bool = False,
+    chunk_size: int = 800,
+    chunk_overlap: int = 200,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    chunk_strategy: str | None = None,
+    shard: str | None = None,
+) -> IndexReport:
+    """
+    Sincroniza o vector store com os arquivos de data/ (incremental).
+
+    Args:
+        directory: Diretório dos documentos. Padrão: settings.data_dir
+        full: Força reconstrução completa (ignora o manifesto) — só do
+              shard informado, se houver.
+        chunk_size: Tamanho máximo de cada chunk em caracteres (modo "recursive").
+        chunk_overlap: Sobreposição entre chunks consecutivos (modo "recursive").
+        workers: Processos para ler/dividir arquivos. Padrão: settings.ingest_workers
+        batch_size: Chunks por lote de embedding + upsert.
+                    Padrão: settings.ingest_batch_size
+        chunk_strategy: "markdown" (seções + tokens, ver chunking.py) ou
+                        "recursive". Padrão: settings.chunk_strategy
+        shard: Sincroniza só os arquivos deste shard (ver sharding.py); os
+               outros shards não são tocados. Padrão: todos
+
+    Returns:
+        IndexReport com o que foi adicionado, alterado e removido.
+    """
+    data_dir = Path(directory or settings.data_dir)
+    chunk_strategy = chunk_strategy or settings.chunk_strategy
+    if chunk_strategy not in ("markdown", "recursive"):
+        raise ValueError(
+            f"chunk_strategy inválido: {chunk_strategy!r} (use 'markdown' ou 'recursive')"
+        )
+    if shard is not None:
+        _validate_shard(shard)
+    config = _index_config(chunk_size, chunk_overlap, chunk_strategy)
+    manifest = IngestManifest.load()
+    if shard is not None and manifest.files and manifest.config != config:
+        # Reconstruir só um shard deixaria os outros com chunks da config antiga
+        raise ValueError("a configuração do índice mudou: rode a ingestão sem shard")
+    stores = _open_stores(data_dir, manifest, shard)
+    report = IndexReport()
+
+    empty = {name for name, store in stores.items() if store._collection.count() == 0}
+    if (
+        manifest.config != config
+        or (shard is None and (full or empty == set(stores)))
+    ):
+        for store in stores.values():
+            reset_vector_store(store)
+        if shard is None:
+            # Collections e índices planos de um esquema de shards anterior
+            drop_stale_collections(next(iter(stores.values())), set(stores))
+            remove_stale_indexes(set(stores))
+        manifest = IngestManifest(config=config)
+        report.full_rebuild = True
+    else:
+        # Reconstrói só um shard: pedido (--full com shard) ou collection
+        # vazia com arquivos no manifesto (ex: apagada à mão)
+        rebuild = {shard} if full else set()
+        rebuild |= {shard_of(source_path) for source_path in manifest.files} & empty
+        for name in sorted(rebuild):
+            reset_shard(stores[name])
+            for source_path in [path for path in manifest.files if shard_of(path) == name]:
+                del manifest.files[source_path]
+        report.full_rebuild = bool(rebuild) and rebuild == set(stores)
+
+    seen: set[str] = set()
+    buffer = _ChunkBuffer(stores, manifest, batch_size or settings.ingest_batch_size)
+    tasks = _iter_tasks(
+        data_dir, manifest, report, seen, chunk_size, chunk_overlap, chunk_strategy, shard
+    )
+
+    for result in iter_processed(tasks, workers or settings.ingest_workers):
+        task = result.task
+        entry = manifest.files.get(task.source_path)
+        store = stores[shard_of(task.source_path)]
+
+        if result.unchanged:
+            # Arquivo "tocado" (ex: git checkout), mas conteúdo idêntico
+            entry.mtime_ns = task.mtime_ns
+            report.files_unchanged += 1
+            continue
+
+        old_ids = set(get_chunk_ids(store, task.source_path)) if entry else set()
+        new = [(chunk_id, chunk) for chunk_id, chunk in zip(result.ids, result.chunks)
+               if chunk_id not in old_ids]
+        kept = [(chunk_id, chunk) for chunk_id, chunk in zip(result.ids, result.chunks)
+                if chunk_id in old_ids]
+        removed = sorted(old_ids - set(result.ids))
+
+        if kept:
+            update_chunk_metadata(
+                store, [chunk_id for chunk_id, _ in kept], [chunk for _, chunk in kept]
+            )
+        if removed:
+            delete_chunks(store, removed)
+
+        report.chunks_embedded += len(new)
+        report.chunks_deleted += len(removed)
+        if entry:
+            report.files_changed += 1
+        else:
+            report.files_added += 1
+
+        buffer.add(
+            task.source_path,
+            FileEntry(
+                mtime_ns=task.mtime_ns,
+                size=task.size,
+                sha256=result.sha256,
+                chunks=len(result.chunks),
+                ingested_at=time.time(),
+            ),
+            [chunk for _, chunk in new],
+            [chunk_id for chunk_id, _ in new],
+        )
+
+    buffer.flush()
+
+    # Arquivos que estavam no manifesto mas sumiram do disco
+    for source_path in sorted(set(manifest.files) - seen):
+        if shard is not None and shard_of(source_path) != shard:
+            continue
+        store = stores[shard_of(source_path)]
+        removed = get_chunk_ids(store, source_path)
+        if removed:
+            delete_chunks(store, removed)
+        report.chunks_deleted += len(removed)
+        report.files_deleted += 1
+        del manifest.files[source_path]
+
+    manifest.save()
+    if flat_index_enabled():
+        for name, store in stores.items():
+            get_flat_index(store, name)  # reconstrói agora, não na 1ª consulta
+    # Contagem de TODOS os shards (com shard=..., os outros não foram abertos)
+    counts = {name: store._collection.count() for name, store in load_shard_stores()}
+    report.chunks_total = sum(counts.values())
+    if sharding_enabled():
+        report.shards = counts
+    return report
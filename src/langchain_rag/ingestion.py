@@ -25,6 +25,10 @@ CONCEITO LANGCHAIN: Text Splitters
 NOTA: O Document do LangChain usa `page_content` (não `content`).
 """
 
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
 from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -68,6 +72,48 @@ def load_documents(directory: str | None = None) -> list[Document]:
     return documents
 
 
+def iter_source_files(directory: str | Path | None = None) -> Iterator[Path]:
+    """
+    Percorre os arquivos Markdown de um diretório (mesmo glob do load_documents).
+
+    É um GERADOR: devolve um caminho por vez, sem montar a lista completa.
+    Com 100 mil arquivos, a ingestão começa a processar o primeiro
+    enquanto o resto do diretório ainda nem foi listado.
+
+    Args:
+        directory: Caminho do diretório. Padrão: settings.data_dir
+
+    Yields:
+        Caminhos de arquivos .md, em ordem determinística.
+    """
+    data_dir = Path(directory or settings.data_dir)
+    for root, dirs, files in os.walk(data_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".md"):
+                yield Path(root) / name
+
+
+def load_file(path: Path, raw: bytes | None = None) -> Document:
+    """
+    Carrega UM arquivo como Document (equivalente ao TextLoader).
+
+    Args:
+        path: Caminho do arquivo.
+        raw: Conteúdo já lido do disco (evita ler o arquivo duas vezes
+             quando o chamador já calculou o hash).
+
+    Returns:
+        Document com page_content e metadata["source"].
+    """
+    if raw is None:
+        raw = path.read_bytes()
+    return Document(
+        page_content=raw.decode("utf-8"),
+        metadata={"source": str(path)},
+    )
+
+
 def split_documents(
     documents: list[Document],
     chunk_size: int = 800,
@@ -0,0 +1,135 @@
+"""
+Metadados estruturados — Título, seção, tipo e data de cada chunk.
+
+O PROBLEMA:
+    Os chunks saíam do splitter só com `source` e `start_index`. Não dava
+    para restringir uma busca a um documento, a uma seção ("Benefícios")
+    ou a documentos recentes: toda consulta competia com o corpus inteiro
+    — em corpora com vários departamentos, um chunk de "férias" do RH
+    disputa posição com o "férias" do manual de TI.
+
+A SOLUÇÃO — extrair os metadados na ingestão:
+
+    # Política de Férias e Benefícios      ← title / h1
+    ## Benefícios                          ← h2
+    ### Saúde                              ← h3
+    - Plano de saúde: ...                  ← chunk: section =
+                                             "Política de Férias e Benefícios > Benefícios > Saúde"
+
+    Campos gravados em cada chunk (metadados do Chroma, filtráveis com
+    `where` em search()/get_retriever()/search_documents):
+
+        title        Título do documento (1º "# ", ou o nome do arquivo)
+        section      Caminho de cabeçalhos até o chunk (" > ")
+        h1, h2, h3   Cada nível do caminho (só os presentes)
+        file_type    Extensão do arquivo ("md")
+        modified     Data de modificação, "AAAA-MM-DD"
+        modified_ts  A mesma data em segundos (o Chroma só compara
+                     números com $gt/$gte/$lt/$lte)
+
+    O Chroma aplica o `where` ANTES de ordenar por similaridade: a busca
+    considera só os chunks que passam no filtro — mais rápida e sem
+    resultados de documentos fora do escopo.
+"""
+
+import bisect
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+# Cabeçalho ATX ("## Título ##"); cabeçalhos dentro de blocos de código são ignorados
+_HEADER = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+_FENCE = re.compile(r"^(```|~~~)")
+
+# Níveis gravados como campos próprios (h1, h2, h3)
+_HEADER_FIELDS = 3
+
+SECTION_SEPARATOR = " > "
+
+
+def header_index(text: str) -> tuple[list[int], list[list[str]]]:
+    """
+    Posição de cada cabeçalho e o caminho de cabeçalhos a partir dela.
+
+    Returns:
+        (offsets, paths): offsets[i] é a posição (em caracteres) do i-ésimo
+        cabeçalho e paths[i] o caminho vigente dali em diante
+        (ex: ["Política", "Benefícios", "Saúde"]).
+    """
+    offsets: list[int] = []
+    paths: list[list[str]] = []
+    path: list[str] = []
+    in_fence = False
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        stripped = line.rstrip("\r\n")
+        if _FENCE.match(stripped):
+            in_fence = not in_fence
+        elif not in_fence and (match := _HEADER.match(stripped)):
+            level = len(match.group(1))
+            path = path[:level - 1] + [""] * (level - 1 - len(path)) + [match.group(2)]
+            offsets.append(offset)
+            paths.append(path)
+        offset += len(line)
+    return offsets, paths
+
+
+def section_at(offsets: list[int], paths: list[list[str]], position: int) -> list[str]:
+    """Caminho de cabeçalhos vigente numa posição do texto (busca binária)."""
+    i = bisect.bisect_right(offsets, position) - 1
+    return paths[i] if i >= 0 else []
+
+
+def _first_content(text: str) -> int:
+    """
+    Posição da 1ª linha de conteúdo (nem cabeçalho, nem vazia) do chunk.
+
+    Um chunk que começa com cabeçalhos ("## Benefícios\n### Saúde\n- ...")
+    pertence à seção do conteúdo que vem depois deles (Saúde).
+    """
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        stripped = line.rstrip("\r\n")
+        if stripped.strip() and not _HEADER.match(stripped):
+            return offset
+        offset += len(line)
+    return 0
+
+
+def document_title(paths: list[list[str]], path: Path) -> str:
+    """Primeiro cabeçalho de nível 1 (de header_index); sem ele, o nome do arquivo."""
+    for header_path in paths:
+        if len(header_path) == 1:
+            return header_path[0]
+    return path.stem.replace("-", " ").replace("_", " ")
+
+
+def enrich_chunks(chunks: list[Document], text: str, path: Path, mtime_ns: int) -> None:
+    """
+    Acrescenta os metadados estruturados aos chunks de UM arquivo (in place).
+
+    Args:
+        chunks: Chunks do arquivo (com metadata["start_index"]).
+        text: Conteúdo completo do arquivo.
+        path: Caminho do arquivo (tipo e, na falta de "# ", o título).
+        mtime_ns: Data de modificação (os.stat().st_mtime_ns).
+    """
+    offsets, paths = header_index(text)
+    modified = datetime.fromtimestamp(mtime_ns / 1e9, tz=timezone.utc)
+    common = {
+        "title": document_title(paths, path),
+        "file_type": path.suffix.lstrip(".").lower(),
+        "modified": modified.strftime("%Y-%m-%d"),
+        "modified_ts": int(modified.timestamp()),
+    }
+
+    for chunk in chunks:
+        position = chunk.metadata.get("start_index", 0) + _first_content(chunk.page_content)
+        headers = section_at(offsets, paths, position)
+        chunk.metadata.update(common)
+        chunk.metadata["section"] = SECTION_SEPARATOR.join(header for header in headers if header)
+        for level, header in enumerate(headers[:_HEADER_FIELDS], 1):
+            if header:  # nível pulado (ex: "###" direto sob "#") fica sem campo
+                chunk.metadata[f"h{level}"] = header
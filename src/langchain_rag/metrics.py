@@ -0,0 +1,413 @@
+"""
+Métricas — Tempo por etapa, tokens, chunks e caches do pipeline RAG.
+
+O PROBLEMA:
+    Uma chamada a ask_question demorou 4 segundos. Onde foi o tempo?
+    Embedding da pergunta? Busca no Chroma? Montagem do prompt? Groq?
+    Sem medir cada etapa, qualquer otimização é chute.
+
+A SOLUÇÃO — duas fontes de medição:
+    1. CALLBACKS do LangChain (MetricsCallbackHandler): todo Runnable
+       avisa quando começa e termina. Um único handler, anexado à chain
+       com instrument(), cronometra as etapas pelo nome do Runnable:
+
+           query_rewrite      → "query_rewrite"
+           retriever          → "retrieval"   (+ nº de chunks retornados)
+           _format_docs       → "format_docs"
+           ChatPromptTemplate → "prompt"
+           chat model         → "llm"         (+ tokens, tempo até o 1º token)
+           chain inteira      → duração da requisição
+
+    2. TIMERS explícitos (stage_timer) onde não há Runnable: dentro da
+       busca, o embedding da pergunta ("embed_query"), a busca vetorial
+       ("vector_search") e a busca BM25 ("bm25_search").
+
+FORMATO:
+    Contadores e histogramas no estilo Prometheus, em memória:
+    - render_prometheus(): texto no formato de exposição do Prometheus
+    - snapshot(): resumo em JSON (contagens, médias, p50/p95 aproximados)
+    A tool MCP `stats` devolve esse resumo do servidor em execução.
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import Runnable
+
+from src.config.settings import settings
+
+# Limites dos buckets de latência (segundos): de 1 ms a 30 s
+_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _label_key(labels: Labels) -> str:
+    """Chave legível para o snapshot JSON: "stage=llm" (ou "total" sem labels)."""
+    return ",".join(f"{key}={value}" for key, value in labels) or "total"
+
+
+def _format_labels(labels: Labels, extra: dict[str, str] | None = None) -> str:
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+# ─── Tipos de métrica ────────────────────────────────────────────────────────
+
+class Counter:
+    """Contador monotônico com labels (ex: requisições por chain)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: dict[Labels, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        with self._lock:
+            self._values[_labels(labels)] += amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {value:g}")
+        return lines
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                _label_key(labels): value
+                for labels, value in sorted(self._values.items())
+            }
+
+
+class Gauge(Counter):
+    """Valor que pode subir ou descer (ex: tempo de cada etapa da inicialização)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+
+class Histogram:
+    """
+    Histograma com buckets fixos (como o do Prometheus).
+
+    Guarda só contagens por faixa + soma: memória constante, não importa
+    quantas observações. Os percentis do snapshot() são aproximados pelo
+    limite superior do bucket onde o percentil cai.
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._counts: dict[Labels, list[int]] = {}
+        self._sums: dict[Labels, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, counts in sorted(self._counts.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(labels, {'le': f'{bound:g}'})} "
+                        f"{cumulative}"
+                    )
+                total = cumulative + counts[-1]
+                lines.append(f"{self.name}_bucket{_format_labels(labels, {'le': '+Inf'})} {total}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {self._sums[labels]:g}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {total}")
+        return lines
+
+    def _quantile(self, counts: list[int], q: float) -> float | None:
+        total = sum(counts)
+        if total == 0:
+            return None
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            if cumulative >= q * total:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            result = {}
+            for labels, counts in sorted(self._counts.items()):
+                total = sum(counts)
+                result[_label_key(labels)] = {
+                    "count": total,
+                    "mean": round(self._sums[labels] / total, 6) if total else None,
+                    "p50_le": self._quantile(counts, 0.50),
+                    "p95_le": self._quantile(counts, 0.95),
+                }
+            return result
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas do processo.
+
+    Além das métricas próprias, aceita "coletores": funções chamadas na
+    exportação que leem contadores mantidos em outro lugar (ex: as
+    estatísticas do cache de respostas), sem duplicar a contagem.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._collectors: dict[str, Callable[[], dict[str, dict[str, float]]]] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._metrics.setdefault(name, Gauge(name, help_text))
+
+    def histogram(
+        self, name: str, help_text: str, buckets: tuple[float, ...] = _LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def register_collector(
+        self, name: str, collect: Callable[[], dict[str, dict[str, float]]]
+    ) -> None:
+        """
+        Registra um coletor: collect() → {métrica: {valor_do_label: número}}.
+
+        Ex: {"answer_cache": {"exact_hits": 3, "misses": 10}} vira
+            rag_answer_cache_total{event="exact_hits"} 3
+        """
+        self._collectors[name] = collect
+
+    def render_prometheus(self) -> str:
+        """Todas as métricas no formato de exposição de texto do Prometheus."""
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collect in self._collectors.values():
+            for metric_name, values in collect().items():
+                name = f"rag_{metric_name}_total"
+                lines.append(f"# TYPE {name} counter")
+                for event, value in sorted(values.items()):
+                    lines.append(f'{name}{{event="{event}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Resumo em JSON de todas as métricas."""
+        result: dict[str, Any] = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        for collect in self._collectors.values():
+            result.update(collect())
+        return result
+
+
+# ─── Métricas do pipeline ────────────────────────────────────────────────────
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "rag_stage_duration_seconds", "Duração de cada etapa do pipeline RAG"
+)
+REQUEST_SECONDS = registry.histogram(
+    "rag_request_duration_seconds", "Duração total de cada chamada de chain"
+)
+REQUESTS = registry.counter("rag_requests_total", "Chamadas de chain por status")
+LLM_FIRST_TOKEN_SECONDS = registry.histogram(
+    "rag_llm_first_token_seconds", "Tempo até o primeiro token do LLM"
+)
+LLM_TOKENS = registry.counter("rag_llm_tokens_total", "Tokens do LLM (prompt/resposta)")
+RETRIEVED_CHUNKS = registry.histogram(
+    "rag_retrieved_chunks", "Chunks retornados por busca", _COUNT_BUCKETS
+)
+SEARCH_CACHE = registry.counter("rag_search_cache_total", "Cache de resultados de busca")
+STARTUP_SECONDS = registry.gauge(
+    "rag_startup_seconds", "Duração de cada etapa da inicialização do servidor"
+)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Cronometra um trecho de código como uma etapa do pipeline.
+
+    Uso:
+        with stage_timer("vector_search"):
+            docs = store.similarity_search_by_vector(vector, k)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+# ─── Callback handler ────────────────────────────────────────────────────────
+
+# Nome do Runnable → etapa medida
+_STAGES_BY_NAME = {
+    "query_rewrite": "query_rewrite",
+    "_format_docs": "format_docs",
+    "ChatPromptTemplate": "prompt",
+}
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Cronometra as etapas de uma chain a partir dos eventos do LangChain.
+
+    Cada evento traz um run_id: guardamos o instante de início por run_id
+    e medimos no evento de fim. A execução raiz (sem parent_run_id) é a
+    requisição inteira.
+    """
+
+    def __init__(self):
+        self._starts: dict[UUID, tuple[str, float]] = {}
+        self._first_token: set[UUID] = set()
+        self._streamed: dict[UUID, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, label: str) -> None:
+        with self._lock:
+            self._starts[run_id] = (label, time.perf_counter())
+
+    def _end(self, run_id: UUID) -> tuple[str, float] | None:
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+        if started is None:
+            return None
+        return started[0], time.perf_counter() - started[1]
+
+    # ─── Chains e etapas ─────────────────────────────────────────────────────
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or ""
+        if parent_run_id is None:
+            self._start(run_id, f"request:{name}")
+        elif name in _STAGES_BY_NAME:
+            self._start(run_id, _STAGES_BY_NAME[name])
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id, "ok")
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "error")
+
+    def _finish(self, run_id: UUID, status: str) -> None:
+        ended = self._end(run_id)
+        if ended is None:
+            return
+        label, seconds = ended
+        if label.startswith("request:"):
+            chain = label.removeprefix("request:")
+            REQUEST_SECONDS.observe(seconds, chain=chain)
+            REQUESTS.inc(chain=chain, status=status)
+        else:
+            STAGE_SECONDS.observe(seconds, stage=label)
+
+    # ─── Retriever ───────────────────────────────────────────────────────────
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start(run_id, "retrieval")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        ended = self._end(run_id)
+        if ended is not None:
+            STAGE_SECONDS.observe(ended[1], stage="retrieval")
+        RETRIEVED_CHUNKS.observe(len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    # ─── LLM ─────────────────────────────────────────────────────────────────
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm")
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            self._streamed[run_id] += 1
+            first = run_id not in self._first_token
+            self._first_token.add(run_id)
+            started = self._starts.get(run_id)
+        if first and started is not None:
+            LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started[1])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        ended = self._end(run_id)
+        with self._lock:
+            self._first_token.discard(run_id)
+            streamed = self._streamed.pop(run_id, 0)
+        if ended is not None:
+            STAGE_SECONDS.observe(ended[1], stage="llm")
+
+        # Tokens: usage_metadata (informado pela API) ou, sem ele, a contagem
+        # de chunks recebidos no streaming como estimativa da resposta
+        usage = None
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or usage
+        if usage:
+            LLM_TOKENS.inc(usage.get("input_tokens", 0), kind="prompt")
+            LLM_TOKENS.inc(usage.get("output_tokens", 0), kind="completion")
+        elif streamed:
+            LLM_TOKENS.inc(streamed, kind="completion_chunks")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+        with self._lock:
+            self._first_token.discard(run_id)
+            self._streamed.pop(run_id, None)
+
+
+_handler = MetricsCallbackHandler()
+
+
+def instrument(chain: Runnable, name: str) -> Runnable:
+    """
+    Anexa o handler de métricas a uma chain (no-op com METRICS=false).
+
+    O nome identifica a chain nas métricas de requisição
+    (rag_request_duration_seconds{chain="rag"}). Os callbacks são
+    herdados pelas etapas internas: basta instrumentar a chain externa.
+    """
+    if not settings.metrics_enabled:
+        return chain
+    return chain.with_config(callbacks=[_handler], run_name=name)
+
+
+def callback_config() -> dict:
+    """Config para .invoke()/.stream() fora de uma chain instrumentada."""
+    return {"callbacks": [_handler]} if settings.metrics_enabled else {}
@@ -0,0 +1,159 @@
+"""
+MMR — Maximal Marginal Relevance vetorizado com NumPy.
+
+O PROBLEMA:
+    Nossas políticas repetem parágrafos quase idênticos (avisos,
+    definições, a mesma regra citada em vários documentos). A busca por
+    similaridade ordena só pela relevância: se três cópias do mesmo
+    texto são as mais parecidas com a pergunta, o top 5 traz as três —
+    e o LLM recebe o mesmo conteúdo três vezes.
+
+A SOLUÇÃO — MMR (Carbonell & Goldstein, 1998):
+    Escolhe os resultados um a um, pontuando cada candidato por
+
+        λ · sim(pergunta, c)  −  (1 − λ) · max sim(c, já escolhidos)
+           └── relevância ──┘       └──────── redundância ────────┘
+
+    λ = 1 → similaridade pura; λ = 0 → diversidade pura.
+
+COMO FAZEMOS RÁPIDO:
+    1. UMA consulta ao Chroma traz os candidatos JÁ com os embeddings
+       guardados (include=["embeddings"]) — nada é re-embeddado.
+    2. A matriz de similaridade candidatos × candidatos é calculada de
+       uma vez (um produto de matrizes).
+    3. A cada escolha, a redundância de TODOS os candidatos é atualizada
+       com um np.maximum sobre uma linha da matriz — k passos vetorizados,
+       em vez de um loop Python por candidato (O(k·n²) → O(n²) + k·O(n)).
+
+    Com VECTOR_BACKEND=int8/numpy, os candidatos e seus vetores float32 vêm do
+    índice plano (flat_store.py) em vez do Chroma.
+
+    Com sharding, cada shard traz seus fetch_k candidatos em paralelo; os
+    fetch_k mais relevantes do conjunto seguem para a seleção — os mesmos
+    de uma collection só.
+
+    A seleção é gulosa: os primeiros k de uma seleção de tamanho 20 são
+    exatamente a seleção de tamanho k. Por isso o resultado convive com o
+    cache de search() (que guarda os N melhores e fatia por top_k).
+"""
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from src.config.settings import settings
+from src.langchain_rag.flat_store import flat_candidates, flat_index_enabled
+from src.langchain_rag.metrics import stage_timer
+from src.langchain_rag.sharding import fan_out
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def mmr_select(
+    query_vector: np.ndarray,
+    candidate_vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+) -> list[int]:
+    """
+    Índices dos `k` candidatos escolhidos por MMR, na ordem de escolha.
+
+    Args:
+        query_vector: Embedding da pergunta, shape (d,).
+        candidate_vectors: Embeddings dos candidatos, shape (n, d).
+        k: Nº de candidatos a escolher.
+        lambda_mult: Peso da relevância (1 = só relevância, 0 = só diversidade).
+    """
+    n = len(candidate_vectors)
+    if n == 0 or k <= 0:
+        return []
+
+    candidates = _normalize(np.asarray(candidate_vectors, dtype=np.float32))
+    query = _normalize(np.asarray(query_vector, dtype=np.float32))
+    relevance = candidates @ query                 # (n,)
+    similarity = candidates @ candidates.T         # (n, n)
+
+    selected: list[int] = []
+    redundancy = np.full(n, -np.inf, dtype=np.float32)  # max sim com os escolhidos
+    available = np.ones(n, dtype=bool)
+
+    for _ in range(min(k, n)):
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        else:
+            scores = relevance.copy()  # 1ª escolha: o mais relevante
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return selected
+
+
+def _candidates(
+    shard: str,
+    store: Chroma,
+    query_vector: list[float],
+    fetch_k: int,
+    where: dict | None,
+) -> tuple[list[Document], np.ndarray]:
+    """Os fetch_k candidatos de um shard, com seus embeddings."""
+    if flat_index_enabled():
+        return flat_candidates(store, query_vector, fetch_k, where, shard)
+    with stage_timer("vector_search"):
+        result = store._collection.query(
+            query_embeddings=[query_vector],
+            n_results=fetch_k,
+            where=where,
+            include=["documents", "metadatas", "embeddings"],
+        )
+    ids, texts, metadatas = result["ids"][0], result["documents"][0], result["metadatas"][0]
+    candidates = [
+        Document(id=ids[i], page_content=texts[i], metadata=metadatas[i] or {})
+        for i in range(len(ids))
+    ]
+    return candidates, np.asarray(result["embeddings"][0])
+
+
+def mmr_search(
+    stores: list[tuple[str, Chroma]],
+    query_vector: list[float],
+    k: int,
+    where: dict | None = None,
+    fetch_k: int | None = None,
+    lambda_mult: float | None = None,
+) -> list[Document]:
+    """
+    Busca com MMR: candidatos + embeddings numa consulta, seleção vetorizada.
+
+    Args:
+        stores: (shard, store) de cada shard (retrieval.load_shard_stores()).
+        query_vector: Embedding da pergunta.
+        k: Nº de documentos retornados.
+        where: Filtro de metadados (formato do Chroma).
+        fetch_k: Candidatos considerados. Padrão: settings.mmr_fetch_k
+        lambda_mult: Relevância × diversidade. Padrão: settings.mmr_lambda
+    """
+    fetch_k = max(fetch_k or settings.mmr_fetch_k, k)
+    lambda_mult = settings.mmr_lambda if lambda_mult is None else lambda_mult
+
+    per_shard = fan_out(
+        lambda shard_store: _candidates(*shard_store, query_vector, fetch_k, where), stores
+    )
+    candidates = [doc for docs, _ in per_shard for doc in docs]
+    if not candidates:
+        return []
+    vectors = np.concatenate([shard_vectors for docs, shard_vectors in per_shard if docs])
+    if len(per_shard) > 1 and len(candidates) > fetch_k:
+        # Os fetch_k mais relevantes de todos os shards (os de uma collection só)
+        relevance = _normalize(vectors) @ _normalize(np.asarray(query_vector, dtype=vectors.dtype))
+        keep = np.sort(np.argsort(-relevance, kind="stable")[:fetch_k])
+        candidates, vectors = [candidates[i] for i in keep], vectors[keep]
+
+    with stage_timer("mmr"):
+        order = mmr_select(np.asarray(query_vector), vectors, k, lambda_mult)
+    return [candidates[i] for i in order]
@@ -0,0 +1,181 @@
+"""
+Pipeline de ingestão — Leitura e chunking em paralelo, em fluxo (streaming).
+
+O PROBLEMA:
+    load_documents() + split_documents() carregam o corpus INTEIRO numa
+    lista e dividem tudo de uma vez, em um único núcleo:
+    - Memória cresce com o tamanho do corpus (100k arquivos = GBs)
+    - 1 núcleo trabalhando, os outros parados
+
+A SOLUÇÃO — um pipeline de geradores:
+
+    iter_source_files()  →  process pool  →  lotes  →  embedding + upsert
+       (1 caminho por vez)   (lê, hasheia,    (N chunks)  (no processo principal)
+                              divide)
+
+    - PARALELISMO: cada arquivo é lido e dividido num processo do pool
+      (ProcessPoolExecutor). Chunking é CPU-bound e o GIL impediria
+      ganho real com threads.
+    - STREAMING: nada de listas com o corpus inteiro. Cada estágio
+      consome e produz um item por vez (generators).
+    - BACKPRESSURE: no máximo `max_pending` arquivos "em voo" no pool.
+      Se o embedding (estágio lento) atrasar, paramos de submeter
+      arquivos novos até ele alcançar. Assim a memória fica estável,
+      não importa o tamanho do corpus.
+
+NOTA (Windows / spawn):
+    As funções executadas no pool precisam ser importáveis no nível do
+    módulo (process_file) e os argumentos precisam ser "pickláveis".
+    Por isso este módulo NÃO importa embeddings/retrieval: cada worker
+    carregaria o modelo de embeddings à toa.
+"""
+
+import hashlib
+import itertools
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from src.langchain_rag.chunking import split_markdown
+from src.langchain_rag.ingestion import load_file, split_documents
+from src.langchain_rag.metadata import enrich_chunks
+
+
+def sha256_hex(data: bytes | str) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_chunk_ids(source_path: str, chunks: list[Document]) -> list[str]:
+    """
+    Gera IDs estáveis para os chunks de um arquivo.
+
+    id = sha256(source_path + sha256(conteúdo) + nº da ocorrência)
+
+    O nº da ocorrência diferencia chunks com texto IDÊNTICO no mesmo
+    arquivo (ex: um aviso repetido), que colidiriam com o mesmo ID.
+    Não usamos o start_index: inserir um parágrafo no topo deslocaria
+    todos os chunks seguintes e forçaria re-embeddar o arquivo inteiro.
+
+    Args:
+        source_path: Caminho do arquivo relativo a data/.
+        chunks: Chunks do arquivo, na ordem em que aparecem.
+
+    Returns:
+        Lista de IDs (mesma ordem de chunks).
+    """
+    seen: dict[str, int] = {}
+    ids = []
+    for chunk in chunks:
+        content_hash = sha256_hex(chunk.page_content)
+        occurrence = seen.get(content_hash, 0)
+        seen[content_hash] = occurrence + 1
+        ids.append(sha256_hex(f"{source_path}\0{content_hash}\0{occurrence}"))
+    return ids
+
+
+# ─── Estágio 1: um arquivo → chunks (roda no process pool) ──────────────────
+
+@dataclass
+class FileTask:
+    """Um arquivo a processar (precisa ser picklável)."""
+
+    path: Path
+    source_path: str
+    mtime_ns: int
+    size: int
+    known_sha256: str | None = None
+    chunk_size: int = 800
+    chunk_overlap: int = 200
+    chunk_strategy: str = "recursive"
+    chunk_max_tokens: int = 256
+    chunk_overlap_tokens: int = 32
+
+
+@dataclass
+class ProcessedFile:
+    """
+    Resultado do processamento de um arquivo.
+
+    `unchanged=True` quando o conteúdo bate com known_sha256: o arquivo
+    foi só "tocado" (mtime mudou) e não há nada a re-embeddar.
+    """
+
+    task: FileTask
+    sha256: str
+    unchanged: bool = False
+    chunks: list[Document] = field(default_factory=list)
+    ids: list[str] = field(default_factory=list)
+
+
+def process_file(task: FileTask) -> ProcessedFile:
+    """Lê, hasheia, divide e extrai os metadados de UM arquivo. Executado nos workers do pool."""
+    raw = task.path.read_bytes()
+    digest = sha256_hex(raw)
+    if digest == task.known_sha256:
+        return ProcessedFile(task=task, sha256=digest, unchanged=True)
+
+    document = load_file(task.path, raw)
+    if task.chunk_strategy == "markdown":
+        chunks = split_markdown([document], task.chunk_max_tokens, task.chunk_overlap_tokens)
+    else:
+        chunks = split_documents([document], task.chunk_size, task.chunk_overlap)
+    for chunk in chunks:
+        chunk.metadata["source_path"] = task.source_path
+    enrich_chunks(chunks, document.page_content, task.path, task.mtime_ns)
+    return ProcessedFile(
+        task=task,
+        sha256=digest,
+        chunks=chunks,
+        ids=make_chunk_ids(task.source_path, chunks),
+    )
+
+
+def iter_processed(
+    tasks: Iterable[FileTask],
+    workers: int,
+    max_pending: int | None = None,
+) -> Iterator[ProcessedFile]:
+    """
+    Processa arquivos em paralelo, devolvendo resultados conforme ficam prontos.
+
+    BACKPRESSURE:
+        Mantém no máximo `max_pending` tarefas submetidas ao pool. Um novo
+        arquivo só é submetido quando o consumidor (este gerador) entrega
+        um resultado. Se o consumidor está lento (ex: embeddando), o pool
+        simplesmente espera — sem acumular resultados em memória.
+
+    Args:
+        tasks: Arquivos a processar (pode ser um gerador).
+        workers: Nº de processos. Com 1, roda no próprio processo
+                 (sem custo de criar o pool — melhor para corpora pequenos).
+        max_pending: Máximo de tarefas em voo. Padrão: 2 × workers.
+
+    Yields:
+        ProcessedFile, na ordem em que ficam prontos (não necessariamente
+        na ordem de entrada).
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield process_file(task)
+        return
+
+    max_pending = max_pending or workers * 2
+    task_iter = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: set[Future] = set()
+        for task in itertools.islice(task_iter, max_pending):
+            pending.add(pool.submit(process_file, task))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            # Repõe exatamente o que saiu: o nº de tarefas em voo nunca cresce
+            for task in itertools.islice(task_iter, len(done)):
+                pending.add(pool.submit(process_file, task))
+
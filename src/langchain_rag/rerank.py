@@ -0,0 +1,161 @@
+"""
+Reranking — Reordenação dos candidatos com um cross-encoder local.
+
+O PROBLEMA:
+    A busca vetorial usa um BI-ENCODER (all-MiniLM-L6-v2): pergunta e
+    chunk viram vetores SEPARADAMENTE e a relevância é só o cosseno
+    entre eles. É rápido (os chunks são embeddados uma vez, na ingestão),
+    mas o modelo nunca "lê" pergunta e chunk juntos — a ordem dos
+    resultados é aproximada. Para compensar, aumentamos o top_k, e o
+    prompt incha com chunks medianos.
+
+A SOLUÇÃO — buscar muito, reordenar com cuidado, ficar com poucos:
+
+    pergunta ──▶ busca (bi-encoder) ──▶ 30 candidatos
+                                          │
+                  cross-encoder(pergunta, chunk) em lotes
+                                          │
+                                          ▼
+                                   top k reordenados
+
+    Um CROSS-ENCODER recebe o par (pergunta, chunk) na mesma entrada e
+    devolve um score de relevância — bem mais preciso, mas custa uma
+    passada do modelo POR PAR. Por isso só reordenamos os candidatos
+    que a busca já trouxe (RERANK_CANDIDATES), nunca o corpus inteiro.
+
+CUSTO SOB CONTROLE:
+    - CACHE de scores por (hash da pergunta, id do chunk): a mesma
+      pergunta repetida (ou com top_k diferente) não pontua de novo,
+      e candidatos repetidos entre buscas só pagam uma vez.
+    - ORÇAMENTO de latência (RERANK_BUDGET_MS): os lotes são pontuados
+      em sequência; se o tempo estourar, desistimos e devolvemos a
+      ordem do bi-encoder — resposta um pouco pior, mas no prazo.
+
+    O reranking é opcional (RERANK=true no .env, ou rerank=True por
+    chamada) — o modelo (~90MB) só é carregado quando usado.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from langchain_core.documents import Document
+
+from src.config.settings import settings
+from src.langchain_rag.metrics import registry, stage_timer
+
+RERANKS = registry.counter("rag_rerank_total", "Reordenações por resultado (ok/timeout)")
+RERANK_SCORES = registry.counter("rag_rerank_scores_total", "Scores do reranker (cache/computed)")
+
+
+def _query_digest(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def _chunk_id(doc: Document) -> str:
+    """ID do chunk no Chroma; sem ID, o hash do conteúdo serve de chave."""
+    return doc.id or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+class CrossEncoderReranker:
+    """
+    Reordena Documents com um cross-encoder (sentence-transformers), em CPU.
+
+    Uso:
+        reranker = get_reranker()
+        docs = reranker.rerank("Quantos dias de férias?", candidatos, k=5)
+
+    Args:
+        model_name: Modelo cross-encoder. Padrão: settings.rerank_model
+        batch_size: Pares (pergunta, chunk) por passada do modelo.
+        budget_ms: Orçamento de latência; estourado, mantém a ordem original.
+        cache_size: Máximo de scores memorizados (LRU).
+    """
+
+    def __init__(
+        self,
+        model_name: str | None = None,
+        batch_size: int | None = None,
+        budget_ms: float | None = None,
+        cache_size: int | None = None,
+    ):
+        self.model_name = model_name or settings.rerank_model
+        self.batch_size = batch_size or settings.rerank_batch_size
+        self.budget_ms = settings.rerank_budget_ms if budget_ms is None else budget_ms
+        self.cache_size = cache_size or settings.rerank_cache_size
+        self._model = None
+        self._scores: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Carrega o modelo (uma vez). Fica fora do orçamento de latência."""
+        with self._lock:
+            if self._model is None:
+                # Import tardio: torch + transformers só quando o reranking é usado
+                from sentence_transformers import CrossEncoder
+
+                self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def rerank(self, query: str, docs: list[Document], k: int) -> list[Document]:
+        """
+        Os `k` documentos mais relevantes para a pergunta, segundo o cross-encoder.
+
+        Se o orçamento de latência estourar, devolve docs[:k] (ordem do
+        bi-encoder). Os scores calculados até ali ficam no cache.
+        """
+        if len(docs) <= 1:
+            return docs[:k]
+
+        model = self.load()
+        digest = _query_digest(query)
+        keys = [(digest, _chunk_id(doc)) for doc in docs]
+
+        with self._lock:
+            scores = {key: self._scores[key] for key in keys if key in self._scores}
+        RERANK_SCORES.inc(len(scores), source="cache")
+        pending = [i for i, key in enumerate(keys) if key not in scores]
+
+        with stage_timer("rerank"):
+            start = time.perf_counter()
+            for batch_start in range(0, len(pending), self.batch_size):
+                if (time.perf_counter() - start) * 1000 > self.budget_ms:
+                    RERANKS.inc(result="timeout")
+                    return docs[:k]
+                batch = pending[batch_start:batch_start + self.batch_size]
+                batch_scores = model.predict(
+                    [(query, docs[i].page_content) for i in batch],
+                    batch_size=len(batch),
+                    show_progress_bar=False,
+                )
+                new_scores = {keys[i]: float(score) for i, score in zip(batch, batch_scores)}
+                scores.update(new_scores)
+                self._remember(new_scores)
+                RERANK_SCORES.inc(len(batch), source="computed")
+
+        RERANKS.inc(result="ok")
+        # sorted é estável: empates mantêm a ordem do bi-encoder
+        order = sorted(range(len(docs)), key=lambda i: scores[keys[i]], reverse=True)
+        return [docs[i] for i in order[:k]]
+
+    def _remember(self, new_scores: dict[tuple[str, str], float]) -> None:
+        with self._lock:
+            for key, score in new_scores.items():
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+
+
+_reranker: CrossEncoderReranker | None = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """Reranker compartilhado pelo processo (singleton, modelo carregado sob demanda)."""
+    global _reranker
+    with _reranker_lock:
+        if _reranker is None:
+            _reranker = CrossEncoderReranker()
+    return _reranker
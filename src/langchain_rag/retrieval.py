@@ -22,101 +22,628 @@ CONCEITO: from_documents() (class method)
     Chroma.from_documents() cria a store E indexa os documentos
     em uma só chamada:
         store = Chroma.from_documents(docs, embeddings)
+
+BUSCA HÍBRIDA (search_type="hybrid"):
+    Combina a busca vetorial (significado) com BM25 (palavras exatas,
+    ver bm25.py) usando Reciprocal Rank Fusion (RRF):
+
+        score(chunk) = w_denso / (60 + posição_densa)
+                     + w_bm25  / (60 + posição_bm25)
+
+    RRF usa só as POSIÇÕES nos rankings, não os scores — scores de
+    cosseno e de BM25 estão em escalas incomparáveis. Um chunk bem
+    posicionado nas duas listas sobe; um que só aparece em uma também
+    entra, se estiver bem colocado nela.
+
+DIVERSIFICAÇÃO (search_type="mmr"):
+    Maximal Marginal Relevance sobre os embeddings já guardados no
+    Chroma (ver mmr.py): evita que o top k traga várias cópias do mesmo
+    parágrafo.
+
+ÍNDICE PLANO (VECTOR_BACKEND=int8 ou numpy):
+    A busca vetorial sai do HNSW do Chroma e vai para um índice plano em
+    memmap (ver flat_store.py): códigos int8 + reavaliação (int8) ou
+    força bruta exata na matriz float32 (numpy). Textos, metadados e
+    filtros continuam vindo do Chroma. As funções daqui não mudam.
+
+SHARDING (SHARD_BY=hash ou directory):
+    O corpus fica em várias collections ("rag_documents-<shard>", ver
+    sharding.py). vector_search() consulta todas em paralelo e intercala
+    os top k de cada uma num heap — similarity, hybrid e mmr passam por
+    ela, então nada acima daqui precisa saber quantos shards existem.
+
+RERANKING (rerank=True ou RERANK=true):
+    Busca RERANK_CANDIDATES candidatos e reordena com um cross-encoder
+    (ver rerank.py), ficando com os k melhores.
 """
 
+import hashlib
+import heapq
+import itertools
+import re
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+
 from langchain_chroma import Chroma
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
-from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.retrievers import BaseRetriever
 
 from src.config.settings import settings
+from src.langchain_rag.bm25 import get_bm25_index
 from src.langchain_rag.embeddings import get_embeddings
+from src.langchain_rag.filters import matches_where, where_key
+from src.langchain_rag.flat_store import fetch_documents, flat_index_enabled, flat_search
+from src.langchain_rag.metrics import SEARCH_CACHE, registry, stage_timer
+from src.langchain_rag.mmr import mmr_search
+from src.langchain_rag.sharding import fan_out, list_shards
 
 # Diretório de persistência do ChromaDB
-_PERSIST_DIR = str(settings.project_root / "vector_store")
+_PERSIST_DIR = str(settings.vector_store_dir)
 _COLLECTION_NAME = "rag_documents"
 
+# Nome de shard que pode ir direto no nome da collection (regras do Chroma:
+# só [A-Za-z0-9._-], começando e terminando com letra ou número)
+_SAFE_SHARD = re.compile(r"[A-Za-z0-9_-]{0,40}[A-Za-z0-9]")
+
+# O ChromaDB limita o tamanho de cada upsert/delete; mandamos em lotes.
+_WRITE_BATCH_SIZE = 1000
 
-def create_vector_store(documents: list[Document]) -> Chroma:
+SEARCH_TYPES = ("similarity", "hybrid", "mmr")
+
+STORE_OPENS = registry.counter("rag_vector_store_opens_total", "Aberturas do Chroma por motivo")
+
+
+def create_vector_store(
+    documents: list[Document],
+    ids: list[str] | None = None,
+) -> Chroma:
     """
     Cria um vector store e indexa os documentos.
 
     O LangChain faz tudo por baixo:
     1. Chama embeddings.embed_documents() em batch
-    2. Gera IDs automáticos (UUID)
+    2. Gera IDs automáticos (UUID) — ou usa os `ids` informados
     3. Faz upsert no ChromaDB
     4. Retorna o store pronto para busca
 
     IMPORTANTE: Limpa a collection existente antes de recriar,
-    evitando duplicatas ao re-indexar.
+    evitando duplicatas ao re-indexar. Para re-indexar só o que mudou
+    (e para dividir o corpus em shards), use
+    src.langchain_rag.indexing.index_documents().
 
     Args:
         documents: Lista de Documents (chunks já divididos).
+        ids: IDs estáveis dos chunks (opcional, mesmo tamanho de documents).
 
     Returns:
         Instância de Chroma com documentos indexados.
     """
-    embeddings = get_embeddings()
-
     # Limpa collection existente para evitar duplicatas
-    existing = Chroma(
-        persist_directory=_PERSIST_DIR,
-        embedding_function=embeddings,
-        collection_name=_COLLECTION_NAME,
-    )
-    existing.reset_collection()
+    vector_store = load_vector_store()
+    reset_vector_store(vector_store)
 
-    vector_store = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        persist_directory=_PERSIST_DIR,
-        collection_name=_COLLECTION_NAME,
-    )
+    ids = ids or [str(uuid.uuid4()) for _ in documents]
+    upsert_chunks(vector_store, documents, ids)
 
     return vector_store
 
 
-def load_vector_store() -> Chroma:
+def load_vector_store(shard: str = "") -> Chroma:
     """
-    Carrega um vector store existente do disco.
+    Retorna o vector store do disco — a MESMA instância para todo o processo.
 
     Use quando os documentos JÁ FORAM indexados (por ingest.py).
     Isso evita re-embeddar tudo a cada execução.
 
+    Chamadas repetidas (retriever, MCP, scripts) não abrem clientes novos:
+    ver _StoreRegistry.
+
+    Args:
+        shard: Shard do corpus (ver sharding.py). "" = a collection única,
+               usada quando não há sharding.
+
     Returns:
         Instância de Chroma conectada ao store existente.
     """
-    embeddings = get_embeddings()
+    return _registry.get(_PERSIST_DIR, _collection_name(shard))
+
+
+def load_shard_stores() -> list[tuple[str, Chroma]]:
+    """(shard, store) de cada shard a consultar — [("", store)] sem sharding."""
+    return [(shard, load_vector_store(shard)) for shard in list_shards()]
+
+
+def _collection_name(shard: str) -> str:
+    """Collection de um shard; nomes fora das regras do Chroma viram slug + hash."""
+    if not shard:
+        return _COLLECTION_NAME
+    if _SAFE_SHARD.fullmatch(shard):
+        return f"{_COLLECTION_NAME}-{shard}"
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", shard).strip("-")[:24]
+    digest = hashlib.sha256(shard.encode("utf-8")).hexdigest()[:6]
+    return f"{_COLLECTION_NAME}-{slug}-{digest}" if slug else f"{_COLLECTION_NAME}-{digest}"
+
+
+# ─── Registro de stores (um cliente por processo) ────────────────────────────
+
+class _StoreRegistry:
+    """
+    Um Chroma compartilhado por (diretório, collection), reaberto só se preciso.
+
+    O PROBLEMA:
+        Cada Chroma(...) novo abre de novo a persistência (SQLite + índice
+        HNSW) e resolve a collection — custo de inicialização e memória
+        duplicada a cada chamada de load_vector_store().
+
+    A SOLUÇÃO:
+        O primeiro pedido abre o store; os seguintes recebem o mesmo
+        objeto (thread-safe: o lock só protege a abertura). Junto, guardamos
+        a versão do manifesto de ingestão (get_store_version, que custa um
+        stat()). Se outro processo rodou o ingest.py, a versão muda e o
+        store é reaberto — UMA vez, no pedido seguinte.
+
+        clear_system_cache() descarta o "System" do Chroma guardado em cache
+        por diretório; sem isso, o Chroma novo reaproveitaria o antigo (e o
+        índice em memória desatualizado). Quem ainda usa o objeto antigo
+        termina a consulta normalmente.
+
+        Com sharding, as collections de todos os shards dividem o mesmo
+        System: quando a versão muda, o cache é limpo UMA vez e todos os
+        stores são descartados juntos (cada um reabre no próximo pedido).
+    """
+
+    def __init__(self):
+        self._version: str | None = None
+        self._stores: dict[tuple[str, str], Chroma] = {}
+        self._stale: set[tuple[str, str]] = set()  # abertos antes da última mudança
+        self._lock = threading.Lock()
+
+    def get(self, persist_dir: str, collection_name: str) -> Chroma:
+        # Import tardio: indexing importa este módulo (import circular)
+        from src.langchain_rag.indexing import get_store_version
+
+        version = get_store_version()
+        key = (persist_dir, collection_name)
+        if self._version == version and (store := self._stores.get(key)) is not None:
+            return store  # caminho comum: sem lock, sem I/O além do stat()
+
+        with self._lock:
+            if self._version != version:
+                if self._stores:
+                    next(iter(self._stores.values()))._client.clear_system_cache()
+                self._stale |= self._stores.keys()
+                self._stores = {}
+                self._version = version
+            store = self._stores.get(key)
+            if store is None:
+                store = Chroma(
+                    persist_directory=persist_dir,
+                    embedding_function=get_embeddings(),
+                    collection_name=collection_name,
+                )
+                self._stores[key] = store
+                STORE_OPENS.inc(reason="reopen" if key in self._stale else "open")
+            return store
+
+
+_registry = _StoreRegistry()
+
+
+# ─── Escrita incremental (usada por indexing.py) ─────────────────────────────
+
+def upsert_chunks(store: Chroma, chunks: list[Document], ids: list[str]) -> None:
+    """
+    Embeda e grava (upsert) chunks com IDs estáveis.
+
+    Upsert = insere se o ID não existe, substitui se já existe.
+    Como o ID vem do conteúdo, re-gravar o mesmo chunk é idempotente.
+    O índice BM25 é atualizado junto, para as duas buscas verem o mesmo corpus.
+    """
+    bm25 = get_bm25_index()
+    for start in range(0, len(chunks), _WRITE_BATCH_SIZE):
+        end = start + _WRITE_BATCH_SIZE
+        store.add_documents(chunks[start:end], ids=ids[start:end])
+        bm25.add(ids[start:end], [chunk.page_content for chunk in chunks[start:end]])
+
+
+def update_chunk_metadata(store: Chroma, ids: list[str], chunks: list[Document]) -> None:
+    """
+    Atualiza SÓ os metadados de chunks já indexados (sem re-embeddar).
+
+    Necessário quando um chunk não mudou de conteúdo, mas mudou de
+    posição no arquivo (ex: um parágrafo foi inserido antes dele),
+    o que altera o start_index.
+    """
+    for start in range(0, len(ids), _WRITE_BATCH_SIZE):
+        end = start + _WRITE_BATCH_SIZE
+        store._collection.update(
+            ids=ids[start:end],
+            metadatas=[chunk.metadata for chunk in chunks[start:end]],
+        )
+
+
+def delete_chunks(store: Chroma, ids: list[str]) -> None:
+    """Remove chunks pelo ID (do Chroma e do índice BM25)."""
+    bm25 = get_bm25_index()
+    for start in range(0, len(ids), _WRITE_BATCH_SIZE):
+        store.delete(ids=ids[start:start + _WRITE_BATCH_SIZE])
+        bm25.delete(ids[start:start + _WRITE_BATCH_SIZE])
+
+
+def reset_vector_store(store: Chroma) -> None:
+    """Apaga todos os chunks (Chroma + BM25) para uma reconstrução completa."""
+    store.reset_collection()
+    get_bm25_index().reset()
+
+
+def drop_stale_collections(store: Chroma, shards: set[str]) -> list[str]:
+    """
+    Apaga as collections do projeto ("rag_documents*") fora dos `shards` atuais.
+
+    Depois de mudar SHARD_BY/VECTOR_SHARDS, as collections do esquema
+    antigo (ex: "rag_documents" ao ligar o sharding, "rag_documents-h07"
+    ao passar de 8 para 4 shards) não são mais consultadas, mas ocupariam
+    o disco para sempre.
+
+    Args:
+        store: Qualquer store do diretório (dá acesso ao cliente do Chroma).
+        shards: Shards do esquema atual ("" = sem sharding).
+
+    Returns:
+        Nomes das collections apagadas.
+    """
+    keep = {_collection_name(shard) for shard in shards}
+    stale = [
+        collection.name for collection in store._client.list_collections()
+        if collection.name not in keep
+        and (collection.name == _COLLECTION_NAME
+             or collection.name.startswith(f"{_COLLECTION_NAME}-"))
+    ]
+    for name in stale:
+        store._client.delete_collection(name)
+    return stale
+
+
+def reset_shard(store: Chroma) -> None:
+    """
+    Apaga os chunks de UM shard, para reconstruí-lo sozinho.
+
+    O BM25 é um índice único para todos os shards: dele saem só os IDs
+    deste shard.
+    """
+    bm25 = get_bm25_index()
+    for start in itertools.count(0, _WRITE_BATCH_SIZE):
+        ids = store._collection.get(include=[], limit=_WRITE_BATCH_SIZE, offset=start)["ids"]
+        if not ids:
+            break
+        bm25.delete(ids)
+    store.reset_collection()
+
 
-    return Chroma(
-        persist_directory=_PERSIST_DIR,
-        embedding_function=embeddings,
-        collection_name=_COLLECTION_NAME,
+def get_chunk_ids(store: Chroma, source_path: str) -> list[str]:
+    """
+    Retorna os IDs de todos os chunks de um arquivo.
+
+    Args:
+        store: Vector store.
+        source_path: Caminho do arquivo relativo a data/ (metadata["source_path"]).
+    """
+    result = store._collection.get(where={"source_path": source_path}, include=[])
+    return result["ids"]
+
+
+# ─── Busca com parâmetros por chamada ────────────────────────────────────────
+#
+# search() é a API central de busca: k, filtro (where) e tipo de busca vão
+# POR CHAMADA — nada de alterar um retriever compartilhado (o antigo
+# retriever.search_kwargs["k"] = top_k era uma condição de corrida entre
+# chamadas simultâneas).
+#
+# Ela também busca SEMPRE o máximo de candidatos (settings.search_max_k)
+# e guarda o resultado num cache LRU: pedidos com top_k diferentes para a
+# mesma consulta são fatias do mesmo resultado — uma busca vetorial só.
+
+class _SearchCache:
+    """
+    Cache LRU de resultados de busca com "single flight".
+
+    Single flight: se 10 chamadas simultâneas pedem a mesma consulta,
+    só a primeira executa a busca; as outras esperam o resultado dela.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[int, list[Document]]] = OrderedDict()
+        self._inflight: dict[tuple, tuple[int, Future]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, fetch_k: int, compute) -> list[Document]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] >= fetch_k:
+                self._entries.move_to_end(key)
+                SEARCH_CACHE.inc(result="hit")
+                return cached[1]
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight[0] >= fetch_k:
+                future, owner = inflight[1], False
+            else:
+                future, owner = Future(), True
+                self._inflight[key] = (fetch_k, future)
+
+        SEARCH_CACHE.inc(result="miss" if owner else "shared")
+        if not owner:
+            return future.result()
+
+        try:
+            docs = compute()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key, (0, None))[1] is future:
+                    del self._inflight[key]
+
+        future.set_result(docs)
+        with self._lock:
+            self._entries[key] = (fetch_k, docs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return docs
+
+
+_search_cache = _SearchCache(settings.search_cache_size)
+
+
+def search(
+    query: str,
+    k: int = 5,
+    *,
+    search_type: str | None = None,
+    where: dict | None = None,
+    rerank: bool | None = None,
+) -> list[Document]:
+    """
+    Busca os `k` chunks mais relevantes — parâmetros por chamada, thread-safe.
+
+    Args:
+        query: Texto da busca.
+        k: Nº de chunks a retornar.
+        search_type: "similarity", "hybrid" ou "mmr" (diversificada).
+                     Padrão: settings.retrieval_mode
+        where: Filtro de metadados no formato do Chroma
+               (ex: {"source_path": "politica-ferias-beneficios.md"}).
+        rerank: Reordena os candidatos com o cross-encoder (rerank.py).
+                Padrão: settings.rerank_enabled
+
+    Returns:
+        Lista de Documents (cópias: o chamador pode alterá-las à vontade).
+    """
+    # Import tardio: indexing importa este módulo (import circular)
+    from src.langchain_rag.indexing import get_store_version
+
+    search_type = search_type or settings.retrieval_mode
+    if search_type not in SEARCH_TYPES:
+        raise ValueError(
+            f"search_type inválido: {search_type!r} (use {', '.join(map(repr, SEARCH_TYPES))})"
+        )
+
+    rerank = settings.rerank_enabled if rerank is None else rerank
+    fetch_k = max(k, settings.search_max_k)
+    if rerank:
+        fetch_k = max(fetch_k, settings.rerank_candidates)
+    # A versão do conteúdo entra na chave: uma nova ingestão invalida o cache
+    key = (get_store_version(), search_type, where_key(where), query)
+
+    def compute() -> list[Document]:
+        if search_type == "hybrid":
+            return _hybrid_search(query, fetch_k, where)
+        if search_type == "mmr":
+            with stage_timer("embed_query"):
+                vector = get_embeddings().embed_query(query)
+            return mmr_search(load_shard_stores(), vector, fetch_k, where)
+        return _dense_search(query, fetch_k, where)
+
+    docs = _search_cache.get_or_compute(key, fetch_k, compute)
+    if rerank:
+        from src.langchain_rag.rerank import get_reranker
+
+        docs = get_reranker().rerank(query, docs[:max(k, settings.rerank_candidates)], k)
+    return [doc.model_copy(deep=True) for doc in docs[:k]]
+
+
+def vector_search(
+    vectors: list[list[float]],
+    k: int,
+    where: dict | None = None,
+) -> list[list[Document]]:
+    """
+    Busca vetorial de uma ou mais perguntas (já embeddadas) em todos os shards.
+
+    Cada shard devolve seu top k com score, em paralelo; as listas já vêm
+    ordenadas, então heapq.merge as intercala lendo só o necessário:
+
+        h00: 0.91 0.72 0.40 ┐
+        h01: 0.88 0.85 0.31 ├─▶ merge ─▶ 0.91 0.88 0.85 ... (k primeiros)
+        h02: 0.50 0.20 0.10 ┘
+
+    Sem sharding, é uma busca só (sem threads).
+
+    Returns:
+        Uma lista de Documents por pergunta (mesma ordem), do mais parecido.
+    """
+    per_shard = fan_out(
+        lambda shard_store: _store_search(*shard_store, vectors, k, where),
+        load_shard_stores(),
     )
+    return [
+        [
+            doc for _, doc in itertools.islice(
+                heapq.merge(*(hits[i] for hits in per_shard), key=lambda hit: -hit[0]), k
+            )
+        ]
+        for i in range(len(vectors))
+    ]
+
 
+def _store_search(
+    shard: str,
+    store: Chroma,
+    vectors: list[list[float]],
+    k: int,
+    where: dict | None,
+) -> list[list[tuple[float, Document]]]:
+    """
+    (score, Document) de cada pergunta num shard, do maior score (score = -distância).
 
-def get_retriever(top_k: int = 5) -> VectorStoreRetriever:
+    Textos e metadados vêm na mesma consulta. Um chunk que aparece em
+    várias perguntas do lote vira UM Document, compartilhado.
+    """
+    if flat_index_enabled():
+        return flat_search(store, vectors, k, where, shard)
+    with stage_timer("vector_search"):
+        result = store._collection.query(
+            query_embeddings=vectors,
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+    docs_by_id: dict[str, Document] = {}
+    hits = []
+    for ids, texts, metadatas, distances in zip(
+        result["ids"], result["documents"], result["metadatas"], result["distances"]
+    ):
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            if chunk_id not in docs_by_id:
+                docs_by_id[chunk_id] = Document(
+                    id=chunk_id, page_content=text, metadata=metadata or {}
+                )
+        hits.append([
+            (-distance, docs_by_id[chunk_id]) for chunk_id, distance in zip(ids, distances)
+        ])
+    return hits
+
+
+def _dense_search(query: str, k: int, where: dict | None) -> list[Document]:
+    """Busca vetorial, com o embedding da pergunta e a busca medidos à parte."""
+    with stage_timer("embed_query"):
+        vector = get_embeddings().embed_query(query)
+    return vector_search([vector], k, where)[0]
+
+
+def _hybrid_search(query: str, k: int, where: dict | None) -> list[Document]:
+    """
+    Busca híbrida: vetorial (Chroma) + BM25, fundidos por RRF.
+
+    O BM25 não conhece os metadados: quando há filtro, os candidatos dele
+    são filtrados em Python (matches_where) depois de carregados. IDs que o
+    Chroma não tem (BM25 adiantado após uma ingestão interrompida) saem
+    ANTES da fusão — não ocupam vagas do top k.
+    """
+    fetch_k = max(settings.hybrid_fetch_k, k)
+    dense = _dense_search(query, fetch_k, where)
+    with stage_timer("bm25_search"):
+        sparse = get_bm25_index().search(query, k=fetch_k * 2 if where else fetch_k)
+
+    docs_by_id = {doc.id: doc for doc in dense}
+    missing = [chunk_id for chunk_id, _ in sparse if chunk_id not in docs_by_id]
+    if missing:
+        # O BM25 é global: o chunk pode estar em qualquer shard
+        for found in fan_out(
+            lambda shard_store: fetch_documents(shard_store[1], missing), load_shard_stores()
+        ):
+            docs_by_id.update(found)
+    sparse = [
+        (chunk_id, score) for chunk_id, score in sparse
+        if chunk_id in docs_by_id
+        and (not where or matches_where(docs_by_id[chunk_id].metadata, where))
+    ][:fetch_k]
+
+    scores: dict[str, float] = defaultdict(float)
+    rrf_k = settings.hybrid_rrf_k
+    for rank, doc in enumerate(dense, 1):
+        scores[doc.id] += settings.hybrid_dense_weight / (rrf_k + rank)
+    for rank, (chunk_id, _) in enumerate(sparse, 1):
+        scores[chunk_id] += settings.hybrid_sparse_weight / (rrf_k + rank)
+
+    top_ids = heapq.nlargest(k, scores, key=scores.__getitem__)
+    return [docs_by_id[chunk_id] for chunk_id in top_ids if chunk_id in docs_by_id]
+
+
+# ─── Retriever ───────────────────────────────────────────────────────────────
+
+class DocumentRetriever(BaseRetriever):
+    """
+    Retriever do projeto: interface LangChain por cima de search().
+
+    Entra nas chains como qualquer retriever (.invoke(query)). Os campos
+    são a configuração PADRÃO; cada chamada pode sobrescrevê-los sem
+    alterar o objeto (que pode ser compartilhado entre threads):
+
+        retriever.invoke("férias", k=3, where={"source_path": "a.md"})
+
+    Attributes:
+        k: Nº de chunks retornados.
+        search_type: "similarity", "hybrid" ou "mmr" (None = settings.retrieval_mode).
+        where: Filtro de metadados padrão.
+        rerank: Reordena com o cross-encoder (None = settings.rerank_enabled).
+    """
+
+    k: int = 5
+    search_type: str | None = None
+    where: dict | None = None
+    rerank: bool | None = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, **kwargs
+    ) -> list[Document]:
+        return search(
+            query,
+            kwargs.get("k", self.k),
+            search_type=kwargs.get("search_type", self.search_type),
+            where=kwargs.get("where", self.where),
+            rerank=kwargs.get("rerank", self.rerank),
+        )
+
+
+def get_retriever(
+    top_k: int = 5,
+    search_type: str | None = None,
+    where: dict | None = None,
+    rerank: bool | None = None,
+) -> DocumentRetriever:
     """
     Cria um retriever a partir do vector store existente.
 
     CONCEITO CHAVE: .as_retriever()
         Transforma qualquer VectorStore do LangChain em um Retriever.
         O retriever é o que conecta com as Chains (próximo módulo).
+        Aqui usamos um retriever próprio (DocumentRetriever) sobre a
+        função search(), que aceita parâmetros por chamada e reaproveita
+        resultados — mas a interface é a mesma.
 
     search_type="similarity":
         Busca por similaridade cosseno (padrão).
         Alternativas:
+        - "hybrid": vetorial + BM25 fundidos por RRF
         - "mmr": Maximal Marginal Relevance (diversifica resultados)
-        - "similarity_score_threshold": filtra por score mínimo
+        - "similarity_score_threshold": filtra por score mínimo (não suportado aqui)
 
     Args:
         top_k: Número de chunks a retornar por busca.
+        search_type: "similarity", "hybrid" ou "mmr". Padrão: settings.retrieval_mode
+        where: Filtro de metadados aplicado a todas as buscas. Além de
+               source_path, os chunks têm title, section, h1-h3,
+               file_type, modified e modified_ts (ver metadata.py).
+        rerank: Reordena os candidatos com o cross-encoder (rerank.py).
+                Padrão: settings.rerank_enabled
 
     Returns:
-        VectorStoreRetriever pronto para uso em chains.
+        Retriever pronto para uso em chains.
     """
-    store = load_vector_store()
-
-    return store.as_retriever(
-        search_type="similarity",
-        search_kwargs={"k": top_k},
-    )
+    return DocumentRetriever(k=top_k, search_type=search_type, where=where, rerank=rerank)
@@ -0,0 +1,166 @@
+"""
+Reformulação da pergunta — Busca com perguntas independentes do histórico.
+
+O PROBLEMA:
+    Numa conversa, perguntas de acompanhamento dependem do contexto:
+
+        👤 Quais são os benefícios da empresa?
+        👤 E o plano de saúde?              ← "e o" o quê? de quem?
+
+    O LLM entende (recebe o histórico), mas a BUSCA recebe só
+    "E o plano de saúde?" — e traz chunks ruins. Contexto ruim gera
+    respostas longas, vagas ou "não encontrei".
+
+A SOLUÇÃO — reformular antes de buscar:
+    Histórico + pergunta → LLM → pergunta independente:
+        "E o plano de saúde?" → "Como funciona o plano de saúde da empresa?"
+
+    Custa uma ida ao LLM, então evitamos pagar quando não precisa:
+    1. HEURÍSTICA: sem histórico, ou pergunta sem marcas de dependência
+       (pronomes, "e o...", perguntas muito curtas) → usa como está
+    2. MEMO: (resumo do histórico, pergunta) → reformulação já feita.
+       Repetir a mesma pergunta no mesmo ponto da conversa não chama
+       o LLM de novo.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+from src.config.settings import settings
+from src.langchain_rag.answer_cache import normalize_question
+from src.langchain_rag.concurrency import limit_llm_concurrency
+from src.langchain_rag.llm import get_llm
+from src.langchain_rag.metrics import registry
+
+_REWRITE_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Reescreva a última pergunta do usuário como uma pergunta independente, "
+        "que possa ser entendida sem o histórico da conversa. Substitua pronomes "
+        "e referências (\"isso\", \"ele\", \"e o...?\") pelo assunto a que se "
+        "referem. Responda SOMENTE com a pergunta reescrita, em português.",
+    ),
+    MessagesPlaceholder(variable_name="chat_history"),
+    ("human", "Pergunta: {question}\n\nPergunta independente:"),
+])
+
+# Só as últimas mensagens importam para resolver referências (prompt barato)
+_HISTORY_MESSAGES = 4
+
+# Início típico de pergunta de acompanhamento: "E o...", "Mas e...", "E quanto a..."
+_FOLLOW_UP_START = re.compile(r"^(e|mas|entao|então|tambem|também|e quanto|e sobre)\b", re.I)
+
+# Palavras que apontam para algo dito antes
+_REFERENCES = frozenset(
+    "isso isto aquilo esse essa esses essas este esta estes estas aquele aquela "
+    "ele ela eles elas dele dela deles delas disso nisso desse dessa nesse nessa "
+    "mesmo mesma anterior acima lo la los las".split()
+)
+
+# Perguntas com menos palavras que isto raramente são independentes ("e o VR?")
+_MIN_WORDS = 4
+
+REWRITES = registry.counter("rag_query_rewrite_total", "Reformulações de pergunta por resultado")
+
+
+def is_self_contained(question: str) -> bool:
+    """
+    Heurística barata: a pergunta se sustenta sem o histórico?
+
+    False quando começa como acompanhamento ("E o plano?"), usa
+    pronomes/demonstrativos ("como funciona isso?") ou é curta demais.
+    """
+    words = re.findall(r"\w+", question.lower())
+    if len(words) < _MIN_WORDS:
+        return False
+    if _FOLLOW_UP_START.match(question.strip()):
+        return False
+    return not any(word in _REFERENCES for word in words)
+
+
+def _history_digest(messages: list[BaseMessage]) -> str:
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(f"{message.type}\0{message.content}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class QueryRewriter:
+    """
+    Reformula perguntas de acompanhamento, com heurística e memo.
+
+    Uso:
+        rewriter = QueryRewriter()
+        rewriter.rewrite("E o plano de saúde?", memory.messages())
+        # → "Como funciona o plano de saúde da empresa?"
+
+    Args:
+        llm: Modelo das reformulações. Padrão: get_llm(temperature=0)
+        cache_size: Máximo de reformulações memorizadas (LRU).
+    """
+
+    def __init__(self, llm: BaseChatModel | None = None, cache_size: int | None = None):
+        self._llm = llm
+        self._chain = None
+        self.cache_size = cache_size or settings.query_rewrite_cache_size
+        self._memo: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_chain(self):
+        if self._chain is None:
+            llm = self._llm or get_llm(temperature=0.0)
+            self._chain = _REWRITE_PROMPT | limit_llm_concurrency(llm) | StrOutputParser()
+        return self._chain
+
+    def _lookup(self, question: str, history: list[BaseMessage]) -> tuple[tuple, str | None]:
+        """Decide se reformula. Retorna (chave do memo, resultado pronto ou None)."""
+        if not history or is_self_contained(question):
+            REWRITES.inc(result="skipped")
+            return (), question
+        key = (_history_digest(history[-_HISTORY_MESSAGES:]), normalize_question(question))
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                REWRITES.inc(result="cache_hit")
+                return key, cached
+        return key, None
+
+    def _store(self, key: tuple, rewritten: str, question: str) -> str:
+        # Resposta vazia ou multilinha: o LLM não seguiu a instrução — usa a original
+        rewritten = rewritten.strip().strip('"')
+        if not rewritten or "\n" in rewritten:
+            rewritten = question
+        REWRITES.inc(result="rewritten")
+        with self._lock:
+            self._memo[key] = rewritten
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.cache_size:
+                self._memo.popitem(last=False)
+        return rewritten
+
+    def _inputs(self, question: str, history: list[BaseMessage]) -> dict:
+        return {"question": question, "chat_history": history[-_HISTORY_MESSAGES:]}
+
+    def rewrite(self, question: str, history: list[BaseMessage]) -> str:
+        """Pergunta independente para a busca (ou a própria pergunta)."""
+        key, result = self._lookup(question, history)
+        if result is not None:
+            return result
+        rewritten = self._get_chain().invoke(self._inputs(question, history))
+        return self._store(key, rewritten, question)
+
+    async def arewrite(self, question: str, history: list[BaseMessage]) -> str:
+        """Versão assíncrona de rewrite()."""
+        key, result = self._lookup(question, history)
+        if result is not None:
+            return result
+        rewritten = await self._get_chain().ainvoke(self._inputs(question, history))
+        return self._store(key, rewritten, question)
@@ -0,0 +1,121 @@
+"""
+Sharding — O corpus dividido em várias collections, buscadas em paralelo.
+
+O PROBLEMA:
+    Todos os chunks de todos os arquivos vão para UMA collection
+    ("rag_documents"). Com o corpus crescendo, três custos crescem junto:
+    - construir o índice fica mais lento;
+    - uma reconstrução (--full, troca de modelo) refaz TUDO;
+    - cada consulta percorre um índice cada vez maior.
+
+A SOLUÇÃO — N collections (shards) independentes:
+
+                        ┌─▶ rag_documents-h00 ─▶ top k ─┐
+    pergunta ─▶ embed ──┼─▶ rag_documents-h01 ─▶ top k ─┼─▶ heap ─▶ top k
+                        └─▶ rag_documents-h02 ─▶ top k ─┘  (merge)
+                          (em paralelo, threads)
+
+    PARTICIONAMENTO (SHARD_BY):
+        hash       shard = sha256(caminho do arquivo) % VECTOR_SHARDS
+                   → shards de tamanho parecido
+        directory  shard = 1º diretório sob data/ ("rh/ferias.md" → "rh";
+                   arquivos na raiz → "_root")
+                   → um shard por área: reconstruir "rh" não toca "ti"
+        none       uma collection só (padrão)
+
+    Todos os chunks de um arquivo ficam no MESMO shard — o arquivo é a
+    unidade da ingestão incremental.
+
+    BUSCA: cada shard devolve o SEU top k, com score, num pool de threads
+    próprio. As N listas já vêm ordenadas: um heapq.merge as intercala e
+    os k primeiros são o top k global — o mesmo resultado de uma
+    collection só, lendo só k itens de cada lista.
+
+    RECONSTRUÇÃO POR SHARD: python scripts/ingest.py --shard rh --full
+    reconstrói só aquele shard; os outros seguem intactos.
+
+    O BM25 (busca híbrida) continua um índice único: scores BM25 de
+    shards diferentes não seriam comparáveis (o idf depende do corpus).
+"""
+
+import hashlib
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+from src.config.settings import settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+SHARD_STRATEGIES = ("none", "hash", "directory")
+
+# Shard dos arquivos direto em data/ (sem diretório) no modo "directory"
+ROOT_SHARD = "_root"
+
+# Pool só das buscas nos shards: search() pode estar rodando numa thread do
+# pool de I/O (concurrency.run_blocking) — usar o mesmo pool poderia travar
+_executor = ThreadPoolExecutor(max_workers=settings.shard_workers, thread_name_prefix="rag-shard")
+
+
+def sharding_enabled() -> bool:
+    """True se o corpus está dividido em shards (SHARD_BY != "none")."""
+    if settings.shard_by not in SHARD_STRATEGIES:
+        raise ValueError(
+            f"SHARD_BY inválido: {settings.shard_by!r} "
+            f"(use {', '.join(map(repr, SHARD_STRATEGIES))})"
+        )
+    return settings.shard_by != "none"
+
+
+def shard_of(source_path: str) -> str:
+    """
+    Shard de um arquivo ("" = sem sharding).
+
+    Args:
+        source_path: Caminho do arquivo relativo a data/ (metadata["source_path"]).
+    """
+    if not sharding_enabled():
+        return ""
+    if settings.shard_by == "hash":
+        digest = hashlib.sha256(source_path.encode("utf-8")).digest()
+        return f"h{int.from_bytes(digest[:8], 'big') % settings.vector_shards:02d}"
+    directory, _, rest = source_path.partition("/")
+    return directory if rest else ROOT_SHARD
+
+
+# Memo da lista de shards do modo "directory": (versão do catálogo, shards)
+_shards_memo: tuple[str, list[str]] = ("", [])
+_shards_lock = threading.Lock()
+
+
+def list_shards() -> list[str]:
+    """
+    Shards a consultar.
+
+    hash: todos os VECTOR_SHARDS (mesmo os vazios). directory: os que têm
+    arquivos no catálogo da ingestão (recalculado só quando ele muda).
+    Sem sharding: [""] (a collection única).
+    """
+    global _shards_memo
+    if not sharding_enabled():
+        return [""]
+    if settings.shard_by == "hash":
+        return [f"h{i:02d}" for i in range(settings.vector_shards)]
+
+    # Import tardio: indexing importa retrieval, que importa este módulo
+    from src.langchain_rag.indexing import load_catalog
+
+    catalog = load_catalog()
+    with _shards_lock:
+        if _shards_memo[0] != catalog.version or not catalog.version:
+            _shards_memo = (catalog.version, sorted({shard_of(path) for path in catalog.files}))
+        return _shards_memo[1]
+
+
+def fan_out(func: Callable[[T], R], items: list[T]) -> list[R]:
+    """func(item) para cada item, em paralelo no pool dos shards; resultados na ordem dos itens."""
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    return list(_executor.map(func, items))
@@ -0,0 +1,56 @@
+"""
+Tokens — Contagem de tokens para orçamentos de prompt.
+
+POR QUE TOKENS E NÃO CARACTERES:
+    O limite de contexto e o custo do LLM são medidos em TOKENS. A
+    relação caracteres/token varia muito: português com acentos, números,
+    códigos ("POL-123") e Markdown quebram em mais tokens que inglês
+    corrido. Orçar por caracteres erra para os dois lados.
+
+QUAL TOKENIZADOR:
+    Usamos o tokenizador do modelo de embeddings (já carregado junto com
+    o modelo, sem download extra). Ele não é idêntico ao do LLM do Groq,
+    mas tokenizadores de subpalavras dão contagens próximas — os
+    orçamentos (settings) já deixam folga para essa diferença.
+
+    As contagens ficam num cache LRU: o mesmo texto (ex: uma mensagem do
+    histórico) é contado a cada turno, mas tokenizado uma vez só.
+"""
+
+from functools import lru_cache
+
+from src.langchain_rag.embeddings import get_embedding_model
+
+
+def _tokenizer():
+    return get_embedding_model()._client.tokenizer
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Nº de tokens de um texto (sem tokens especiais como [CLS]/[SEP])."""
+    if not text:
+        return 0
+    return len(_tokenizer().encode(text, add_special_tokens=False, verbose=False))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Corta o texto para caber em `max_tokens` (preferindo limites de palavra).
+
+    Busca binária sobre o nº de palavras: O(log n) contagens, em vez de
+    remover palavra por palavra. Sem orçamento (max_tokens ≤ 0) → "".
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    words = text.split(" ")
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join([*words[:middle], "…"])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join([*words[:low], "…"])
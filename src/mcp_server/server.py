@@ -23,26 +23,57 @@ COMO FUNCIONA O TRANSPORT:
     - SSE (Server-Sent Events): O server roda como HTTP server
       e clientes conectam via rede. Útil para deploy remoto.
 
+FERRAMENTAS ASSÍNCRONAS:
+    As tools são `async def`. O FastMCP atende cada requisição numa
+    coroutine, então uma chamada lenta ao LLM não bloqueia as outras:
+    - Chroma/embeddings (bloqueantes) → pool de threads limitado (run_blocking)
+    - Groq → chain.ainvoke(), com limite de chamadas simultâneas
+    A vazão passa a crescer com o nº de clientes, em vez de serializar.
+
 TOOLS EXPOSTAS:
     1. search_documents — Busca semântica pura (sem LLM)
     2. ask_question — RAG completo (retrieval + LLM)
-    3. list_documents — Lista documentos indexados no vector store
+    3. ask_question_stream — RAG completo com a resposta em notificações
+       de progresso enquanto é gerada (fontes primeiro)
+    4. ask_questions — Várias perguntas de uma vez (busca em lote, LLM
+       em paralelo com limite de taxa), resultados em JSONL
+    5. list_documents — Lista documentos indexados (catálogo da ingestão,
+       com paginação e filtro por nome)
+    6. stats — Métricas de desempenho (tempo por etapa, tokens, caches)
+
+INICIALIZAÇÃO RÁPIDA (cold start):
+    Clientes MCP via stdio iniciam um processo novo a cada sessão. Se o
+    import deste módulo carregasse langchain, Chroma e torch, o handshake
+    `initialize` esperaria segundos. Por isso:
+    - Só o SDK do MCP e as configurações são importados no topo; o
+      pipeline RAG é importado na primeira tool (_load_rag, numa thread)
+    - Com MCP_PREWARM=true, uma thread em segundo plano já importa o
+      pipeline, carrega o modelo de embeddings, abre a collection e faz
+      uma busca de teste enquanto o cliente ainda está conectando
+    - O tempo de cada etapa vai para o stderr (o stdout é o canal do
+      protocolo) e aparece na tool `stats`
 
 Roda no terminal:
     python -m src.mcp_server.server           (stdio - para clientes MCP)
     mcp dev src/mcp_server/server.py          (inspector - para debug)
 """
 
+import asyncio
+import json
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Garante que o projeto raiz está no path para imports funcionarem
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from mcp.server.fastmcp import FastMCP
+# Mede o custo dos imports restantes (os únicos feitos antes do handshake)
+_IMPORT_START = time.perf_counter()
+
+from mcp.server.fastmcp import Context, FastMCP  # noqa: E402
 
-from src.langchain_rag.chain import create_rag_chain
-from src.langchain_rag.retrieval import get_retriever, load_vector_store
+from src.config.settings import settings  # noqa: E402
 
 # ─── Inicialização do servidor MCP ──────────────────────────────────────────
 
@@ -56,33 +87,127 @@ mcp = FastMCP(
 )
 
 # ─── Componentes reutilizados (lazy loading) ────────────────────────────────
-# Usamos variáveis de módulo para evitar recriar retriever/chain a cada chamada.
+# Usamos variáveis de módulo para evitar recriar a chain a cada chamada.
 # O FastMCP mantém o processo vivo, então só inicializamos uma vez.
+# O lock evita que duas chamadas simultâneas inicializem em dobro.
 
-_retriever = None
 _chain = None
+_streamer = None
+_init_lock = threading.Lock()
+_import_lock = threading.Lock()
+_rag_loaded = False
+
+# Tempo (s) de cada etapa da inicialização: import, modelo, collection...
+_startup_timings: dict[str, float] = {}
+
+# Intervalo mínimo entre notificações de progresso no streaming: agrupa
+# tokens em trechos, em vez de uma mensagem JSON-RPC por token
+_STREAM_FLUSH_SECONDS = 0.2
+
+
+def _record_startup(stage: str, start: float) -> None:
+    """Registra o tempo de uma etapa da inicialização (stderr + tool stats)."""
+    _startup_timings[stage] = round(time.perf_counter() - start, 3)
+    print(f"[startup] {stage}: {_startup_timings[stage]:.3f}s", file=sys.stderr, flush=True)
+
+
+def _load_rag() -> None:
+    """
+    Importa o pipeline RAG (langchain, Chroma, embeddings/torch).
+
+    Depois da primeira vez, os `from ... import` dentro das tools só
+    consultam sys.modules — custo desprezível.
+    """
+    global _rag_loaded
+    with _import_lock:
+        if _rag_loaded:
+            return
+        start = time.perf_counter()
+        import src.langchain_rag.chain  # noqa: F401 — puxa retrieval, embeddings, caches
+        import src.langchain_rag.concurrency  # noqa: F401
+
+        _record_startup("rag_imports", start)
+        _rag_loaded = True
 
 
-def _get_retriever():
-    """Retorna retriever com lazy loading (inicializa apenas na primeira chamada)."""
-    global _retriever
-    if _retriever is None:
-        _retriever = get_retriever(top_k=5)
-    return _retriever
+async def _ensure_rag() -> None:
+    """Garante o pipeline importado sem travar o event loop (import numa thread)."""
+    if not _rag_loaded:
+        await asyncio.to_thread(_load_rag)
 
 
 def _get_chain():
     """Retorna chain RAG com lazy loading."""
+    from src.langchain_rag.chain import create_rag_chain
+
     global _chain
-    if _chain is None:
-        _chain = create_rag_chain()
+    with _init_lock:
+        if _chain is None:
+            _chain = create_rag_chain()
     return _chain
 
 
+def _get_streamer():
+    """Retorna o RagStreamer (retrieval + geração separados) com lazy loading."""
+    from src.langchain_rag.chain import RagStreamer
+
+    global _streamer
+    with _init_lock:
+        if _streamer is None:
+            _streamer = RagStreamer()
+    return _streamer
+
+
+def _prewarm(started: float) -> None:
+    """
+    Aquece o servidor em segundo plano (MCP_PREWARM=true).
+
+    Roda numa thread daemon logo na inicialização: quando a primeira
+    tool chegar, o modelo já está carregado e a collection aberta.
+    Falhas aqui só são registradas — a tool tentará de novo e mostrará
+    o erro ao cliente.
+    """
+    try:
+        _load_rag()
+
+        from src.langchain_rag.embeddings import get_embeddings
+        from src.langchain_rag.retrieval import search
+
+        start = time.perf_counter()
+        get_embeddings().embed_query("aquecimento")
+        _record_startup("embedding_model", start)
+
+        start = time.perf_counter()
+        search("aquecimento", 1)  # abre o Chroma (e o BM25, no modo híbrido)
+        _record_startup("first_query", start)
+
+        if settings.rerank_enabled:
+            from src.langchain_rag.rerank import get_reranker
+
+            start = time.perf_counter()
+            get_reranker().load()
+            _record_startup("rerank_model", start)
+
+        if settings.groq_api_key:
+            start = time.perf_counter()
+            _get_chain()
+            _record_startup("rag_chain", start)
+        _record_startup("prewarm_total", started)
+    except Exception as e:
+        print(f"[startup] pré-aquecimento falhou: {e!r}", file=sys.stderr, flush=True)
+
+
 # ─── Tool 1: Busca semântica ────────────────────────────────────────────────
 
 @mcp.tool()
-def search_documents(query: str, top_k: int = 5) -> str:
+async def search_documents(
+    query: str,
+    top_k: int = 5,
+    search_type: str | None = None,
+    source: str | None = None,
+    rerank: bool | None = None,
+    where: dict | None = None,
+) -> str:
     """
     Busca documentos relevantes por similaridade semântica.
 
@@ -93,16 +218,37 @@ def search_documents(query: str, top_k: int = 5) -> str:
     Args:
         query: Texto da busca (ex: "política de férias").
         top_k: Número máximo de trechos a retornar (padrão: 5).
+        search_type: "similarity" (semântica), "hybrid" (semântica +
+                     palavras exatas, melhor para códigos e números) ou
+                     "mmr" (semântica diversificada, sem trechos repetidos).
+                     Padrão: configuração do servidor.
+        source: Restringe a busca a um documento (caminho relativo a data/,
+                ex: "politica-ferias-beneficios.md").
+        rerank: Reordena os candidatos com um cross-encoder (mais preciso,
+                um pouco mais lento). Padrão: configuração do servidor.
+        where: Filtro de metadados no formato do Chroma. Campos: title,
+               section, h1, h2, h3, file_type, modified ("AAAA-MM-DD"),
+               modified_ts (segundos) e source_path. Ex:
+               {"h2": "Benefícios"} ou {"modified_ts": {"$gte": 1735689600}}.
 
     Returns:
         Trechos encontrados formatados com fonte e conteúdo.
     """
-    retriever = _get_retriever()
-
-    # Atualiza top_k se diferente do padrão
-    retriever.search_kwargs["k"] = top_k
-
-    docs = retriever.invoke(query)
+    await _ensure_rag()
+    from src.langchain_rag.concurrency import run_blocking
+    from src.langchain_rag.retrieval import search
+
+    # Todos os parâmetros vão por chamada — nenhum estado compartilhado é
+    # alterado, então chamadas simultâneas com top_k diferentes não
+    # interferem entre si (e reaproveitam a mesma busca vetorial)
+    if source:
+        where = {"$and": [{"source_path": source}, where]} if where else {"source_path": source}
+    try:
+        docs = await run_blocking(
+            search, query, top_k, search_type=search_type, where=where, rerank=rerank
+        )
+    except ValueError as e:
+        return f"Erro: {e}"
 
     if not docs:
         return "Nenhum documento encontrado para essa busca."
@@ -122,7 +268,7 @@ def search_documents(query: str, top_k: int = 5) -> str:
 # ─── Tool 2: Pergunta com RAG ───────────────────────────────────────────────
 
 @mcp.tool()
-def ask_question(question: str) -> str:
+async def ask_question(question: str) -> str:
     """
     Faz uma pergunta sobre os documentos internos da empresa.
 
@@ -140,48 +286,219 @@ def ask_question(question: str) -> str:
     Returns:
         Resposta gerada pela IA com base nos documentos encontrados.
     """
-    chain = _get_chain()
-    return chain.invoke(question)
+    await _ensure_rag()
+    from src.langchain_rag.concurrency import run_blocking
+
+    chain = await run_blocking(_get_chain)
+    return await chain.ainvoke(question)
+
+
+# ─── Tool 3: Pergunta com RAG em streaming ──────────────────────────────────
+
+@mcp.tool()
+async def ask_question_stream(question: str, ctx: Context) -> str:
+    """
+    Faz uma pergunta sobre os documentos, enviando a resposta enquanto é gerada.
+
+    Igual a ask_question, mas o cliente recebe notificações durante a
+    geração: primeiro as fontes encontradas, depois trechos da resposta
+    (notificações de progresso). O retorno final é a resposta completa.
+    Útil para respostas longas: o primeiro trecho chega em vez de
+    esperar a geração inteira.
+
+    Com a resposta no cache, o retrieval ainda roda (costuma vir do cache
+    de buscas) para devolver as fontes: o formato não depende do cache.
+
+    Args:
+        question: Pergunta em linguagem natural.
+
+    Returns:
+        Resposta completa, seguida da lista de fontes.
+    """
+    await _ensure_rag()
+    from src.langchain_rag.answer_cache import get_answer_cache
+    from src.langchain_rag.concurrency import run_blocking
+    from src.langchain_rag.indexing import get_store_version
+
+    cached = None
+    if settings.answer_cache_enabled:
+        cached = await run_blocking(get_answer_cache().get, question)
+    # Versão lida antes do retrieval: o put descarta a resposta se uma
+    # ingestão terminar durante a geração
+    version = await run_blocking(get_store_version)
+
+    streamer = await run_blocking(_get_streamer)
+
+    # Retrieval UMA vez; fontes emitidas antes da geração começar
+    docs = await streamer.aretrieve(question)
+    sources = list(dict.fromkeys(Path(doc.metadata.get("source", "?")).name for doc in docs))
+    await ctx.info(f"Fontes: {', '.join(sources) or 'nenhuma'}")
+    if cached is not None:
+        await ctx.info("Resposta obtida do cache.")
+        return f"{cached}\n\nFontes: {', '.join(sources) or 'nenhuma'}"
+
+    tokens: list[str] = []
+    pending: list[str] = []
+    last_flush = time.monotonic()
+    async for token in streamer.astream(question, docs):
+        tokens.append(token)
+        pending.append(token)
+        if time.monotonic() - last_flush >= _STREAM_FLUSH_SECONDS:
+            await ctx.report_progress(progress=len(tokens), message="".join(pending))
+            pending.clear()
+            last_flush = time.monotonic()
+    if pending:
+        await ctx.report_progress(progress=len(tokens), message="".join(pending))
+
+    answer = "".join(tokens)
+    if settings.answer_cache_enabled:
+        await run_blocking(get_answer_cache().put, question, answer, version=version)
+    return f"{answer}\n\nFontes: {', '.join(sources) or 'nenhuma'}"
+
+
+# ─── Tool 4: Perguntas em lote ──────────────────────────────────────────────
+
+@mcp.tool()
+async def ask_questions(questions: list[str], ctx: Context, top_k: int = 5) -> str:
+    """
+    Responde várias perguntas de uma vez (ex: conjunto de regressão).
+
+    Mais rápido que chamar ask_question N vezes: as perguntas são
+    embeddadas e buscadas em lote, chunks repetidos são lidos uma vez
+    e as chamadas ao LLM rodam em paralelo (com limite de taxa).
+
+    Args:
+        questions: Lista de perguntas em linguagem natural.
+        top_k: Trechos usados por pergunta (padrão: 5).
+
+    Returns:
+        JSONL: uma linha por pergunta com "index", "question", "answer",
+        "sources", "error" e "timings" (ms), na ordem das perguntas.
+    """
+    await _ensure_rag()
+    from src.langchain_rag.batch import aanswer_batch
+
+    results = []
+    async for result in aanswer_batch(questions, top_k=top_k):
+        results.append(result)
+        await ctx.report_progress(progress=len(results), total=len(questions))
+    results.sort(key=lambda result: result["index"])
+    return "\n".join(json.dumps(result, ensure_ascii=False) for result in results)
 
 
-# ─── Tool 3: Listar documentos ──────────────────────────────────────────────
+# ─── Tool 5: Listar documentos ──────────────────────────────────────────────
 
 @mcp.tool()
-def list_documents() -> str:
+async def list_documents(offset: int = 0, limit: int = 50, contains: str | None = None) -> str:
     """
     Lista todos os documentos indexados no sistema.
 
     Mostra os nomes dos arquivos que foram carregados e podem ser
     consultados. Útil para saber quais informações estão disponíveis.
 
+    Args:
+        offset: Quantos documentos pular (paginação, padrão: 0).
+        limit: Máximo de documentos por página (padrão: 50).
+        contains: Filtra pelo caminho do arquivo (ex: "politica").
+
     Returns:
-        Lista de documentos com nomes dos arquivos.
+        Lista de documentos com nomes dos arquivos, nº de chunks e tamanho.
     """
-    store = load_vector_store()
-    collection = store._collection
+    await _ensure_rag()
+    from src.langchain_rag.concurrency import run_blocking
+
+    return await run_blocking(_list_documents, offset, limit, contains)
 
-    total = collection.count()
-    if total == 0:
+
+def _list_documents(offset: int = 0, limit: int = 50, contains: str | None = None) -> str:
+    """
+    Implementação síncrona de list_documents.
+
+    Lê o catálogo mantido pela ingestão (indexing.load_catalog), não o
+    Chroma: o custo não depende do nº de chunks e o arquivo só é relido
+    quando uma ingestão o altera.
+    """
+    from src.langchain_rag.indexing import load_catalog
+
+    catalog = load_catalog()
+    if not catalog.files:
         return (
             "Nenhum documento indexado. "
             "Execute 'python scripts/ingest.py' para indexar documentos."
         )
 
-    # Busca todos os metadados para extrair nomes dos arquivos
-    all_data = collection.get(include=["metadatas"])
-    sources = set()
-    for meta in all_data["metadatas"]:
-        source = meta.get("source", "desconhecido")
-        sources.add(Path(source).name)
+    sources = sorted(catalog.files)
+    if contains:
+        sources = [source for source in sources if contains.lower() in source.lower()]
+    start = max(offset, 0)
+    page = sources[start:start + max(limit, 0)]
+
+    totals = catalog.totals()
+    lines = [f"Documentos indexados ({totals['files']} arquivos, {totals['chunks']} chunks):\n"]
+    for source in page:
+        entry = catalog.files[source]
+        ingested = (
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.ingested_at))
+            if entry.ingested_at else "—"
+        )
+        lines.append(
+            f"  • {source} ({entry.chunks} chunks, {entry.size / 1024:.1f} KB, "
+            f"indexado em {ingested})"
+        )
 
-    lines = [f"Documentos indexados ({len(sources)} arquivos, {total} chunks):\n"]
-    for source in sorted(sources):
-        lines.append(f"  • {source}")
+    end = start + len(page)
+    if contains and not sources:
+        lines.append(f"  (nenhum documento contém \"{contains}\")")
+    elif not page:
+        lines.append(f"  (nenhum documento a partir de offset={start}; total: {len(sources)})")
+    elif end < len(sources):
+        lines.append(
+            f"\nMostrando {start + 1}–{end} de {len(sources)}. "
+            f"Use offset={end} para a próxima página."
+        )
+    elif start > 0:
+        lines.append(f"\nMostrando {start + 1}–{end} de {len(sources)} (última página).")
 
     return "\n".join(lines)
 
 
+# ─── Tool 6: Métricas ───────────────────────────────────────────────────────
+
+@mcp.tool()
+async def stats(format: str = "summary") -> str:
+    """
+    Métricas de desempenho do servidor desde que foi iniciado.
+
+    Mostra o tempo gasto em cada etapa do RAG (embedding da pergunta,
+    busca vetorial, BM25, formatação, prompt, LLM), tokens do LLM,
+    chunks recuperados por busca, acertos dos caches e o tempo de
+    inicialização do servidor (imports, modelo, primeira busca).
+
+    Args:
+        format: "summary" (JSON resumido, padrão) ou "prometheus"
+                (formato de exposição de texto do Prometheus).
+
+    Returns:
+        Métricas no formato pedido.
+    """
+    # Só o módulo de métricas (leve): ler contadores não deve puxar o
+    # pipeline inteiro. Etapas que ainda não rodaram simplesmente não aparecem.
+    from src.langchain_rag.metrics import STARTUP_SECONDS, registry
+
+    for stage, seconds in _startup_timings.items():
+        STARTUP_SECONDS.set(seconds, stage=stage)
+    if format == "prometheus":
+        return registry.render_prometheus()
+    return json.dumps(registry.snapshot(), indent=2, ensure_ascii=False)
+
+
 # ─── Entrypoint ─────────────────────────────────────────────────────────────
 
+_record_startup("server_import", _IMPORT_START)
+
 if __name__ == "__main__":
+    if settings.mcp_prewarm:
+        threading.Thread(
+            target=_prewarm, args=(time.perf_counter(),), name="rag-prewarm", daemon=True
+        ).start()
     mcp.run()
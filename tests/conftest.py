@@ -0,0 +1,113 @@
+"""
+Fixtures compartilhadas — embeddings e tokenizador falsos, diretórios temporários.
+
+Os testes rodam offline: nada do Hugging Face é baixado. Os caminhos do
+vector store e dos caches são lidos pelo Settings na importação, então
+apontam para um diretório temporário ANTES de importar src.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+_TMP = Path(tempfile.mkdtemp(prefix="rag-tests-"))
+os.environ["VECTOR_STORE_DIR"] = str(_TMP / "vector_store")
+os.environ["CACHE_DIR"] = str(_TMP / "cache")
+os.environ["VECTOR_BACKEND"] = "chroma"
+os.environ["SHARD_BY"] = "none"
+
+from collections.abc import Callable  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, BaseMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from pydantic import Field  # noqa: E402
+
+_DIMENSIONS = 64
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+
+def fake_vector(text: str) -> list[float]:
+    """Saco de palavras com hash: textos com palavras em comum ficam próximos."""
+    vector = np.zeros(_DIMENSIONS, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % _DIMENSIONS] += 1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+class FakeEmbeddings(Embeddings):
+    """Embeddings determinísticos, sem modelo."""
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [fake_vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return fake_vector(text)
+
+
+class FakeTokenizer:
+    """Um token por palavra ou sinal de pontuação; [CLS]/[SEP] como especiais."""
+
+    def encode(self, text: str, add_special_tokens: bool = True, **kwargs) -> list[int]:
+        tokens = [1] * len(_WORD.findall(text))
+        return [0, *tokens, 0] if add_special_tokens else tokens
+
+    def num_special_tokens_to_add(self, pair: bool = False) -> int:
+        return 2
+
+
+class RecordingChatModel(BaseChatModel):
+    """LLM falso: responde reply(texto da última mensagem) e guarda os prompts."""
+
+    reply: Callable[[str], str] = lambda text: "resposta"
+    prompts: list[list[BaseMessage]] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-recording"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.prompts.append(list(messages))
+        content = self.reply(str(messages[-1].content))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    """Troca o modelo de embeddings (e os stores abertos) por FakeEmbeddings."""
+    from src.langchain_rag import batch, retrieval
+
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(retrieval, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(batch, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(retrieval, "_registry", retrieval._StoreRegistry())
+    return embeddings
+
+
+@pytest.fixture
+def fake_tokenizer(monkeypatch):
+    """Tokenizador por palavras no chunker e na contagem de tokens do contexto."""
+    from src.langchain_rag import chunking, tokens
+
+    tokenizer = FakeTokenizer()
+    monkeypatch.setattr(chunking, "_tokenizer", lambda: tokenizer)
+    monkeypatch.setattr(tokens, "_tokenizer", lambda: tokenizer)
+    chunking.paragraph_tokens.cache_clear()
+    tokens.count_tokens.cache_clear()
+    yield tokenizer
+    chunking.paragraph_tokens.cache_clear()
+    tokens.count_tokens.cache_clear()
+
+
+@pytest.fixture
+def data_dir(tmp_path) -> Path:
+    """Diretório de documentos vazio (o data/ dos testes)."""
+    directory = tmp_path / "data"
+    directory.mkdir()
+    return directory
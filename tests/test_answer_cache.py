@@ -0,0 +1,150 @@
+"""Cache de respostas: match exato e semântico, TTL/LRU, versão e persistência."""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.langchain_rag import answer_cache
+from src.langchain_rag.answer_cache import AnswerCache, normalize_question, with_answer_cache
+
+from .conftest import FakeEmbeddings, fake_vector
+
+
+@pytest.fixture
+def store_version(monkeypatch):
+    """Versão do índice controlada pelo teste (store_version["v"] = ...)."""
+    state = {"v": "v1"}
+    monkeypatch.setattr(answer_cache, "get_store_version", lambda: state["v"])
+    return state
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio manual para o TTL (clock["now"] += segundos)."""
+    state = {"now": 1_000.0}
+    monkeypatch.setattr(answer_cache, "time", SimpleNamespace(time=lambda: state["now"]))
+    return state
+
+
+def _cache(**kwargs) -> AnswerCache:
+    return AnswerCache(FakeEmbeddings(), **kwargs)
+
+
+def _similarity(a: str, b: str) -> float:
+    """Cosseno exatamente como o cache calcula (matriz float32 @ vetor)."""
+    matrix = np.stack([np.asarray(fake_vector(normalize_question(a)), dtype=np.float32)])
+    vector = np.asarray(fake_vector(normalize_question(b)), dtype=np.float32)
+    return float((matrix @ vector)[0])
+
+
+_STORED = "quantos dias de férias eu tenho"
+_SIMILAR = "quantos dias de férias eu tenho direito"
+
+
+def test_exact_hit_ignores_case_spacing_and_punctuation(store_version):
+    cache = _cache()
+    assert cache.get(_STORED) is None
+    cache.put(_STORED, "30 dias")
+    assert cache.get("  Quantos  dias de FÉRIAS eu tenho?? ") == "30 dias"
+    assert cache.stats.exact_hits == 1 and cache.stats.misses == 1
+
+
+def test_semantic_hit_at_the_threshold(store_version):
+    score = _similarity(_STORED, _SIMILAR)
+    assert 0.5 < score < 1.0
+    cache = _cache(threshold=score)
+    cache.put(_STORED, "30 dias")
+    assert cache.get(_SIMILAR) == "30 dias"
+    assert cache.stats.semantic_hits == 1
+
+
+def test_semantic_miss_just_below_the_threshold(store_version):
+    score = _similarity(_STORED, _SIMILAR)
+    cache = _cache(threshold=float(np.nextafter(np.float32(score), np.float32(2))))
+    cache.put(_STORED, "30 dias")
+    assert cache.get(_SIMILAR) is None
+    assert cache.get("qual o valor do vale refeição") is None
+    assert cache.stats.semantic_hits == 0 and cache.stats.misses == 2
+
+
+def test_ttl_expires_entries(store_version, clock):
+    cache = _cache(ttl_seconds=60)
+    cache.put(_STORED, "30 dias")
+    clock["now"] += 59
+    assert cache.get(_STORED) == "30 dias"
+    clock["now"] += 2
+    assert cache.get(_STORED) is None
+
+
+def test_lru_evicts_the_least_recently_used(store_version):
+    cache = _cache(max_entries=2, threshold=1.1)  # só match exato
+    cache.put("pergunta a", "A")
+    cache.put("pergunta b", "B")
+    assert cache.get("pergunta a") == "A"  # "a" passa a ser a mais recente
+    cache.put("pergunta c", "C")
+    assert cache.get("pergunta b") is None
+    assert cache.get("pergunta a") == "A"
+    assert cache.get("pergunta c") == "C"
+
+
+def test_new_store_version_clears_the_cache(store_version):
+    cache = _cache()
+    cache.put(_STORED, "30 dias")
+    store_version["v"] = "v2"
+    assert cache.get(_STORED) is None
+    assert cache.stats.invalidations == 1
+
+
+def test_put_drops_answers_generated_before_an_ingest(store_version):
+    cache = _cache()
+    cache.put(_STORED, "resposta antiga", version="v1")
+    assert cache.get(_STORED) == "resposta antiga"
+    store_version["v"] = "v2"
+    cache.put(_STORED, "gerada com os documentos antigos", version="v1")
+    assert cache.get(_STORED) is None
+    assert cache.stats.stale_writes == 1
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_with_answer_cache_skips_writes_when_an_ingest_finishes_mid_answer(
+    store_version, use_async
+):
+    cache = _cache()
+    calls = []
+
+    def answer(question: str) -> str:
+        calls.append(question)
+        store_version["v"] = f"v{len(calls) + 1}"  # ingestão termina durante a geração
+        return "resposta"
+
+    chain = with_answer_cache(RunnableLambda(answer), cache)
+    for _ in range(2):
+        result = asyncio.run(chain.ainvoke(_STORED)) if use_async else chain.invoke(_STORED)
+        assert result == "resposta"
+    assert len(calls) == 2  # nada foi gravado: a 2ª chamada também gerou
+    assert cache.stats.stale_writes == 2
+
+    stable = RunnableLambda(lambda question: calls.append(question) or "ok")
+    chain = with_answer_cache(stable, cache)
+    assert chain.invoke(_STORED) == "ok"
+    assert chain.invoke(_STORED) == "ok"
+    assert len(calls) == 3  # versão estável: a 2ª veio do cache
+
+
+def test_json_round_trip(tmp_path, store_version):
+    path = tmp_path / "answers.json"
+    cache = _cache(path=path)
+    cache.put(_STORED, "30 dias")
+    cache.put("qual o valor do vale refeição", "R$ 40")
+    cache.save()
+
+    reloaded = _cache(path=path, threshold=_similarity(_STORED, _SIMILAR))
+    assert reloaded.get(_STORED) == "30 dias"
+    assert reloaded.get("Qual o valor do vale refeição?") == "R$ 40"
+    assert reloaded.get(_SIMILAR) == "30 dias"  # vetores sobrevivem à gravação
+
+    store_version["v"] = "v2"
+    assert _cache(path=path).get(_STORED) is None  # gravado com outra versão: descartado
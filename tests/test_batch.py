@@ -0,0 +1,147 @@
+"""Perguntas em lote: busca com um embedding só, ordem dos resultados e o ask.py --batch."""
+
+import asyncio
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.langchain_rag import batch
+from src.langchain_rag.batch import aanswer_batch, retrieve_batch
+from src.langchain_rag.indexing import index_documents
+from src.langchain_rag.retrieval import search
+
+from .conftest import RecordingChatModel
+
+_QUESTIONS = [
+    "quantos dias de férias eu tenho",
+    "como funciona o plano de saúde",
+    "posso trabalhar remoto",
+    "quantos dias de férias eu tenho",  # repetida: mesmos chunks, compartilhados
+]
+
+
+@pytest.fixture
+def corpus(data_dir, fake_embeddings, fake_tokenizer):
+    topics = {"ferias.md": "férias dias", "saude.md": "plano de saúde", "remoto.md": "remoto"}
+    for name, topic in topics.items():
+        # Parágrafos de tamanhos diferentes: scores distintos, sem empates no top k
+        (data_dir / name).write_text(
+            "\n\n".join(f"Sobre {topic}:" + " detalhe" * i + "." for i in range(4)),
+            encoding="utf-8",
+        )
+    index_documents(
+        data_dir, full=True, chunk_size=120, chunk_overlap=0, chunk_strategy="recursive", workers=1
+    )
+    return fake_embeddings
+
+
+def _ids(docs) -> list[str]:
+    return [doc.id for doc in docs]
+
+
+def test_batch_retrieval_matches_per_question_search(corpus, monkeypatch):
+    calls = []
+    embed_documents = corpus.embed_documents
+    monkeypatch.setattr(corpus, "embed_documents", lambda texts: calls.append(texts) or (
+        embed_documents(texts)
+    ))
+    batched = retrieve_batch(_QUESTIONS, 3, search_type="similarity")
+    assert calls == [_QUESTIONS]  # um embedding para o lote inteiro
+    assert [_ids(docs) for docs in batched] == [
+        _ids(search(question, 3, search_type="similarity", rerank=False)) for question in _QUESTIONS
+    ]
+    assert batched[0][0] is batched[3][0]  # chunk repetido: o mesmo Document
+
+
+def test_batch_retrieval_applies_where(corpus):
+    where = {"source_path": "saude.md"}
+    batched = retrieve_batch(_QUESTIONS[:2], 2, search_type="similarity", where=where)
+    assert all(doc.metadata["source_path"] == "saude.md" for docs in batched for doc in docs)
+    assert retrieve_batch([], 3, search_type="similarity") == []
+
+
+@pytest.mark.parametrize("search_type", ["hybrid", "mmr"])
+def test_hybrid_and_mmr_fall_back_to_search(corpus, monkeypatch, search_type):
+    monkeypatch.setattr(batch, "vector_search", lambda *args: pytest.fail("busca em lote"))
+    batched = retrieve_batch(_QUESTIONS, 3, search_type=search_type)
+    assert [_ids(docs) for docs in batched] == [
+        _ids(search(question, 3, search_type=search_type, rerank=False))
+        for question in _QUESTIONS
+    ]
+
+
+def test_default_search_type_comes_from_settings(corpus, monkeypatch):
+    from dataclasses import replace
+
+    monkeypatch.setattr(batch, "settings", replace(batch.settings, retrieval_mode="hybrid"))
+    used = []
+    monkeypatch.setattr(
+        batch, "search", lambda question, k, search_type, where: used.append(search_type) or []
+    )
+    retrieve_batch(_QUESTIONS[:2], 3)
+    assert used == ["hybrid", "hybrid"]
+
+
+async def _collect(questions, llm, **kwargs) -> list[dict]:
+    return [result async for result in aanswer_batch(
+        questions, top_k=2, search_type="similarity", llm=llm, requests_per_minute=0, **kwargs
+    )]
+
+
+def test_results_keep_the_input_order_by_index(corpus):
+    llm = RecordingChatModel(reply=lambda text: "resposta: " + text.rsplit("Pergunta:", 1)[-1])
+    results = asyncio.run(_collect(_QUESTIONS, llm))
+    assert sorted(result["index"] for result in results) == list(range(len(_QUESTIONS)))
+    for result in results:
+        assert result["question"] == _QUESTIONS[result["index"]]
+        assert result["question"] in result["answer"]
+        assert result["error"] is None and result["sources"]
+        assert set(result["timings"]) == {"retrieval_ms", "wait_ms", "llm_ms", "total_ms"}
+
+
+def test_one_failing_question_does_not_stop_the_batch(corpus):
+    def reply(text: str) -> str:
+        if "plano de saúde" in text.rsplit("Pergunta:", 1)[-1]:
+            raise RuntimeError("429 Too Many Requests")
+        return "ok"
+
+    results = asyncio.run(_collect(_QUESTIONS, RecordingChatModel(reply=reply)))
+    errors = {result["index"]: result["error"] for result in results}
+    assert errors[1] == "RuntimeError: 429 Too Many Requests"
+    assert all(errors[index] is None for index in (0, 2, 3))
+
+
+# ─── scripts/ask.py --batch ──────────────────────────────────────────────────
+
+def _ask_main(monkeypatch, *argv: str):
+    path = Path(__file__).parent.parent / "scripts" / "ask.py"
+    spec = importlib.util.spec_from_file_location("ask_script", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(sys, "argv", ["ask.py", *argv])
+    return module.main
+
+
+@pytest.mark.parametrize("line, message", [
+    ('{"question": ', "JSON inválido"),
+    ('{"id": 3}', 'esperado {"question": ...}'),
+])
+def test_malformed_batch_line_exits_with_its_location(tmp_path, monkeypatch, capsys, line, message):
+    questions = tmp_path / "perguntas.jsonl"
+    questions.write_text(json.dumps({"question": "férias"}) + "\n" + line + "\n", encoding="utf-8")
+    main = _ask_main(monkeypatch, "--batch", str(questions))
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    assert capsys.readouterr().err.startswith(f"{questions}:2: {message}")
+
+
+def test_missing_batch_file_exits_non_zero(tmp_path, monkeypatch, capsys):
+    main = _ask_main(monkeypatch, "--batch", str(tmp_path / "nao-existe.jsonl"))
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    assert "nao-existe.jsonl" in capsys.readouterr().err
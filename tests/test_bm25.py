@@ -0,0 +1,110 @@
+"""Índice BM25: tokenização, ranking, escrita incremental e estatísticas do corpus."""
+
+import math
+import threading
+import time
+
+import pytest
+
+from src.langchain_rag import bm25
+from src.langchain_rag.bm25 import BM25Index, get_bm25_index, tokenize
+
+
+@pytest.fixture
+def index(tmp_path) -> BM25Index:
+    return BM25Index(tmp_path / "bm25.sqlite")
+
+
+def _stats(index: BM25Index) -> tuple[int, int]:
+    return index._db.execute("SELECT docs, total_length FROM stats").fetchone()
+
+
+def _recomputed(index: BM25Index) -> tuple[int, int]:
+    return index._db.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+
+
+def test_tokenize_normalizes_accents_and_splits_codes():
+    assert tokenize("Férias da POL-123") == ["ferias", "pol-123", "pol", "123"]
+
+
+def test_exact_code_ranks_first(index):
+    index.add(
+        ["a", "b", "c"],
+        ["política POL-123 de férias", "política POL-124 de férias", "plano de saúde"],
+    )
+    results = index.search("POL-123", k=3)
+    assert results[0][0] == "a"
+    assert "c" not in {doc_id for doc_id, _ in results}
+
+
+def test_scores_match_bm25_formula(index):
+    index.add(["a", "b"], ["gato gato cachorro", "peixe"])
+    (doc_id, score), = index.search("gato", k=5)
+    idf = math.log(1 + (2 - 1 + 0.5) / (1 + 0.5))
+    average_length = (3 + 1) / 2
+    expected = idf * 2 * 2.2 / (2 + 1.2 * (1 - 0.75 + 0.75 * 3 / average_length))
+    assert doc_id == "a"
+    assert score == pytest.approx(expected)
+
+
+def test_add_is_idempotent(index):
+    index.add(["a"], ["férias remuneradas"])
+    index.add(["a", "a"], ["férias remuneradas", "férias remuneradas"])
+    assert _stats(index) == (1, 2)
+    assert index._db.execute("SELECT df FROM terms WHERE term = 'ferias'").fetchone() == (1,)
+
+
+def test_stats_follow_add_delete_reset(index):
+    index.add(["a", "b", "c"], ["alfa beta gama", "delta épsilon", "zeta"])
+    assert _stats(index) == _recomputed(index) == (3, 6)
+    index.delete(["b", "inexistente"])
+    assert _stats(index) == _recomputed(index) == (2, 4)
+    index.reset()
+    assert _stats(index) == (0, 0)
+    assert index.search("zeta") == []
+
+
+def test_delete_removes_postings_and_orphan_terms(index):
+    index.add(["a", "b"], ["férias coletivas", "férias"])
+    index.delete(["a"])
+    assert [doc_id for doc_id, _ in index.search("férias coletivas")] == ["b"]
+    assert index._db.execute("SELECT 1 FROM terms WHERE term = 'coletivas'").fetchone() is None
+
+
+def test_stats_row_is_created_for_existing_indexes(tmp_path):
+    path = tmp_path / "bm25.sqlite"
+    index = BM25Index(path)
+    index.add(["a", "b"], ["alfa beta", "gama"])
+    index._db.execute("DROP TABLE stats")
+    index._db.commit()
+
+    reopened = BM25Index(path)
+    assert _stats(reopened) == (2, 3)
+    assert _stats(BM25Index(path)) == (2, 3)  # reabrir de novo não duplica a linha
+
+
+def test_empty_query_or_index(index):
+    assert index.search("qualquer coisa") == []
+    index.add(["a"], ["texto"])
+    assert index.search("de para") == []  # só stopwords
+
+
+def test_singleton_is_opened_once_under_concurrency(monkeypatch, tmp_path):
+    opened = []
+
+    class SlowIndex(BM25Index):
+        def __init__(self):
+            opened.append(self)
+            time.sleep(0.05)  # janela para outra thread chegar na abertura
+            super().__init__(tmp_path / "bm25.sqlite")
+
+    monkeypatch.setattr(bm25, "BM25Index", SlowIndex)
+    monkeypatch.setattr(bm25, "_index", None)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_bm25_index())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 1
+    assert all(index is opened[0] for index in results)
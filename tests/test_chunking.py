@@ -0,0 +1,76 @@
+"""Chunker por estrutura: seções Markdown, tamanho em tokens, sobreposição."""
+
+import pytest
+from langchain_core.documents import Document
+
+from src.langchain_rag.chunking import chunk_text, split_markdown
+
+
+@pytest.fixture(autouse=True)
+def _tokenizer(fake_tokenizer):
+    return fake_tokenizer
+
+
+def _tokens(text: str, tokenizer) -> int:
+    return len(tokenizer.encode(text))  # com [CLS]/[SEP], como o modelo vê
+
+
+def _long_section(title: str, paragraphs: int, words: int = 12) -> str:
+    body = "\n\n".join(
+        " ".join(f"{title.lower()}{p}w{w}" for w in range(words)) + "." for p in range(paragraphs)
+    )
+    return f"## {title}\n\n{body}\n"
+
+
+def test_chunks_fit_window_and_are_literal_slices(fake_tokenizer):
+    text = "# Política\n\n" + _long_section("Férias", 12) + _long_section("Saúde", 9)
+    chunks = chunk_text(text, max_tokens=40, overlap_tokens=0)
+    assert len(chunks) > 2
+    for start, content in chunks:
+        assert text[start:start + len(content)] == content
+        assert _tokens(content, fake_tokenizer) <= 40
+
+
+def test_sibling_sections_start_new_chunks():
+    text = "# Manual\n\n## Férias\n\n30 dias.\n\n## Saúde\n\nPlano completo.\n"
+    contents = [content for _, content in chunk_text(text, max_tokens=200, overlap_tokens=0)]
+    assert contents == ["# Manual\n\n## Férias\n\n30 dias.", "## Saúde\n\nPlano completo."]
+
+
+def test_child_sections_join_their_parent_while_they_fit():
+    text = "## Benefícios\n\nResumo.\n\n### Saúde\n\nPlano.\n\n### Vale\n\nRefeição.\n"
+    assert len(chunk_text(text, max_tokens=200, overlap_tokens=0)) == 1
+    assert len(chunk_text(text, max_tokens=8, overlap_tokens=0)) > 1
+
+
+def test_overlap_stays_inside_the_section(fake_tokenizer):
+    text = _long_section("Férias", 8) + _long_section("Saúde", 1)
+    chunks = chunk_text(text, max_tokens=40, overlap_tokens=14)
+    ferias = [(start, content) for start, content in chunks if "férias" in content]
+    assert len(ferias) > 1
+    for (start, content), (next_start, _) in zip(ferias, ferias[1:]):
+        assert next_start < start + len(content)  # parágrafo repetido no próximo chunk
+    saude_start = text.index("## Saúde")
+    assert any(start == saude_start for start, _ in chunks)  # sem carregar fim de Férias
+
+
+def test_oversized_word_is_split():
+    text = "x" * 10 + " " + "-".join(["parte"] * 60)
+    chunks = chunk_text(text, max_tokens=20, overlap_tokens=0)
+    assert len(chunks) > 1
+    assert "".join(content for _, content in chunks).replace(" ", "") == text.replace(" ", "")
+
+
+def test_empty_text_has_no_chunks():
+    assert chunk_text("", max_tokens=50) == []
+    assert chunk_text("\n\n   \n", max_tokens=50) == []
+
+
+def test_split_markdown_keeps_metadata():
+    document = Document(page_content=_long_section("Férias", 6), metadata={"source_path": "a.md"})
+    chunks = split_markdown([document], max_tokens=40, overlap_tokens=0)
+    assert len(chunks) > 1
+    assert all(chunk.metadata["source_path"] == "a.md" for chunk in chunks)
+    assert [chunk.metadata["start_index"] for chunk in chunks] == sorted(
+        chunk.metadata["start_index"] for chunk in chunks
+    )
@@ -0,0 +1,83 @@
+"""Empacotamento do contexto: mescla de vizinhos, deduplicação e orçamento."""
+
+import pytest
+from langchain_core.documents import Document
+
+from src.langchain_rag.context import pack_context
+from src.langchain_rag.tokens import count_tokens
+
+_SOURCE = "alfa beta gama delta épsilon zeta eta teta iota capa lambda mi"
+
+
+@pytest.fixture(autouse=True)
+def _tokenizer(fake_tokenizer):
+    return fake_tokenizer
+
+
+def _chunk(text: str, source: str = "a.md", start: int | None = None) -> Document:
+    metadata = {"source_path": source}
+    if start is not None:
+        metadata["start_index"] = start
+    return Document(page_content=text, metadata=metadata)
+
+
+def _slice(start: int, end: int, source: str = "a.md") -> Document:
+    return _chunk(_SOURCE[start:end], source, start)
+
+
+def test_overlapping_neighbours_become_one_passage():
+    docs = [_slice(20, len(_SOURCE)), _slice(0, 30)]
+    (packed,) = pack_context(docs, max_tokens=100, dedup_threshold=1.1)
+    assert packed.page_content == _SOURCE
+    assert packed.metadata["start_index"] == 0
+
+
+def test_touching_neighbours_are_joined_with_the_gap():
+    docs = [_chunk("alfa beta", start=0), _chunk("gama delta", start=11)]
+    (packed,) = pack_context(docs, max_tokens=100, dedup_threshold=1.1)
+    assert packed.page_content == "alfa beta\n\ngama delta"
+
+
+def test_other_sources_and_distant_chunks_are_not_merged():
+    docs = [
+        _chunk("alfa beta", start=0),
+        _chunk("gama delta", source="b.md", start=10),
+        _chunk("teta iota", start=500),
+    ]
+    packed = pack_context(docs, max_tokens=100, dedup_threshold=1.1)
+    assert [doc.page_content for doc in packed] == ["alfa beta", "gama delta", "teta iota"]
+
+
+def test_near_duplicates_are_dropped():
+    aviso = "Este documento é confidencial e não deve ser compartilhado fora da empresa"
+    docs = [_chunk(aviso, "a.md"), _chunk(aviso + ".", "b.md"), _chunk("outro assunto", "c.md")]
+    packed = pack_context(docs, max_tokens=100, dedup_threshold=0.8)
+    assert [doc.metadata["source_path"] for doc in packed] == ["a.md", "c.md"]
+
+
+def test_budget_skips_what_does_not_fit_and_keeps_relevance_order():
+    docs = [
+        _chunk(" ".join(["primeiro"] * 10), "a.md"),
+        _chunk(" ".join(["segundo"] * 10), "b.md"),
+        _chunk(" ".join(["terceiro"] * 4), "c.md"),
+    ]
+    packed = pack_context(docs, max_tokens=15, dedup_threshold=1.1)
+    assert [doc.metadata["source_path"] for doc in packed] == ["a.md", "c.md"]
+    assert sum(count_tokens(doc.page_content) for doc in packed) <= 15
+
+
+def test_oversized_first_passage_is_truncated_not_dropped():
+    docs = [_chunk(" ".join(f"palavra{i}" for i in range(50)))]
+    (packed,) = pack_context(docs, max_tokens=10, dedup_threshold=1.1)
+    assert packed.page_content.endswith("…")
+    assert count_tokens(packed.page_content) <= 10
+
+
+def test_merged_passage_takes_the_best_rank():
+    docs = [
+        _chunk("outro arquivo", "b.md", start=0),
+        _slice(30, len(_SOURCE)),
+        _slice(0, 35),
+    ]
+    packed = pack_context(docs, max_tokens=100, dedup_threshold=1.1)
+    assert [doc.metadata["source_path"] for doc in packed] == ["b.md", "a.md"]
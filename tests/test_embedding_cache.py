@@ -0,0 +1,87 @@
+"""Cache de embeddings: LRU em memória + SQLite, chave (modelo, normalize, tipo, texto)."""
+
+import numpy as np
+import pytest
+
+from src.langchain_rag.embedding_cache import CachedEmbeddings
+
+from .conftest import FakeEmbeddings
+
+
+class _CountingEmbeddings(FakeEmbeddings):
+    """FakeEmbeddings que registra cada texto que chega ao "modelo"."""
+
+    def __init__(self):
+        self.documents: list[str] = []
+        self.queries: list[str] = []
+
+    def embed_documents(self, texts):
+        self.documents.extend(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def inner() -> _CountingEmbeddings:
+    return _CountingEmbeddings()
+
+
+def _cache(inner, tmp_path, **kwargs) -> CachedEmbeddings:
+    return CachedEmbeddings(inner, "fake-model", tmp_path / "embeddings.sqlite", **kwargs)
+
+
+_TEXTS = ["férias", "plano de saúde", "vale refeição"]
+
+
+def test_second_call_does_not_reach_the_model(inner, tmp_path):
+    cache = _cache(inner, tmp_path)
+    first = cache.embed_documents(_TEXTS)
+    second = cache.embed_documents(_TEXTS)
+    assert inner.documents == _TEXTS
+    np.testing.assert_allclose(second, first)
+    np.testing.assert_allclose(first, FakeEmbeddings().embed_documents(_TEXTS), rtol=1e-6)
+    assert (cache.stats.misses, cache.stats.memory_hits, cache.stats.disk_hits) == (3, 3, 0)
+
+
+def test_repeated_texts_in_one_call_are_computed_once(inner, tmp_path):
+    cache = _cache(inner, tmp_path)
+    vectors = cache.embed_documents(["férias", "férias", "saúde"])
+    assert inner.documents == ["férias", "saúde"]
+    assert vectors[0] == vectors[1]
+
+
+def test_fresh_instance_is_served_from_disk(inner, tmp_path):
+    expected = _cache(inner, tmp_path).embed_documents(_TEXTS)
+
+    reopened_inner = _CountingEmbeddings()
+    reopened = _cache(reopened_inner, tmp_path)
+    np.testing.assert_allclose(reopened.embed_documents(_TEXTS), expected)
+    assert reopened_inner.documents == []
+    assert (reopened.stats.disk_hits, reopened.stats.misses) == (3, 0)
+
+    reopened.embed_documents(_TEXTS)  # agora na memória
+    assert reopened.stats.memory_hits == 3
+
+
+def test_queries_documents_models_and_normalize_do_not_mix(inner, tmp_path):
+    _cache(inner, tmp_path).embed_documents(["férias"])
+    _cache(inner, tmp_path).embed_query("férias")
+    assert inner.queries == ["férias"]  # tipo diferente: miss
+
+    other_model = CachedEmbeddings(inner, "outro-modelo", tmp_path / "embeddings.sqlite")
+    other_model.embed_documents(["férias"])
+    _cache(inner, tmp_path, normalize=False).embed_documents(["férias"])
+    assert inner.documents == ["férias"] * 3
+
+
+def test_memory_tier_is_bounded(inner, tmp_path):
+    cache = _cache(inner, tmp_path, memory_size=2)
+    cache.embed_documents(_TEXTS)
+    assert len(cache._memory) == 2
+    cache.embed_documents(_TEXTS[:1])  # saiu da memória, mas está no disco
+    assert inner.documents == _TEXTS
+    assert cache.stats.disk_hits == 1
+    assert cache.stats.hit_rate == pytest.approx(1 / 4)
@@ -0,0 +1,67 @@
+"""Filtros `where` avaliados em Python (mesma sintaxe do Chroma)."""
+
+import pytest
+
+from src.langchain_rag.filters import matches_where, where_key
+
+_META = {
+    "source_path": "rh/ferias.md",
+    "title": "Política de Férias",
+    "h2": "Benefícios",
+    "modified": "2024-05-01",
+    "modified_ts": 1714521600,
+}
+
+
+@pytest.mark.parametrize("where, expected", [
+    (None, True),
+    ({}, True),
+    ({"title": "Política de Férias"}, True),
+    ({"title": "Outro"}, False),
+    ({"title": {"$eq": "Política de Férias"}}, True),
+    ({"title": {"$ne": "Política de Férias"}}, False),
+    ({"modified_ts": {"$gte": 1714521600}}, True),
+    ({"modified_ts": {"$gt": 1714521600}}, False),
+    ({"modified_ts": {"$lt": 1800000000, "$gt": 1700000000}}, True),  # todos os operadores
+    ({"modified_ts": {"$lte": 1700000000}}, False),
+    ({"h2": {"$in": ["Benefícios", "Saúde"]}}, True),
+    ({"h2": {"$in": ["Saúde"]}}, False),
+    ({"h2": {"$nin": ["Saúde"]}}, True),
+    ({"h3": {"$nin": ["Saúde"]}}, True),  # campo ausente não está na lista
+    ({"h3": {"$gt": 0}}, False),          # campo ausente não é maior que nada
+])
+def test_comparators(where, expected):
+    assert matches_where(_META, where) is expected
+
+
+@pytest.mark.parametrize("where, expected", [
+    ({"$and": [{"h2": "Benefícios"}, {"modified_ts": {"$gte": 1700000000}}]}, True),
+    ({"$and": [{"h2": "Benefícios"}, {"modified_ts": {"$gte": 1800000000}}]}, False),
+    ({"$or": [{"h2": "Saúde"}, {"title": "Política de Férias"}]}, True),
+    ({"$or": [{"h2": "Saúde"}, {"title": "Outro"}]}, False),
+    ({"$and": [{"$or": [{"h2": "Saúde"}, {"h2": "Benefícios"}]}, {"source_path": "rh/ferias.md"}]},
+     True),
+    ({"source_path": "rh/ferias.md", "h2": "Saúde"}, False),  # chaves no topo: E implícito
+])
+def test_logical_operators(where, expected):
+    assert matches_where(_META, where) is expected
+
+
+@pytest.mark.parametrize("where", [
+    {"modified": {"$gte": 1700000000}},      # str vs int
+    {"modified_ts": {"$lt": "2025-01-01"}},  # int vs str
+    {"h2": {"$gt": None}},
+])
+def test_mismatched_types_do_not_match(where):
+    assert matches_where(_META, where) is False
+
+
+def test_unknown_operator_is_rejected():
+    with pytest.raises(ValueError, match=r"\$regex"):
+        matches_where(_META, {"title": {"$regex": "Pol.*"}})
+
+
+def test_where_key_is_canonical():
+    assert where_key(None) == where_key({}) == "{}"
+    assert where_key({"a": 1, "b": {"$in": [1, 2]}}) == where_key({"b": {"$in": [1, 2]}, "a": 1})
+    assert where_key({"a": 1}) != where_key({"a": 2})
@@ -0,0 +1,127 @@
+"""Índice plano: códigos int8 com reavaliação em float32, ou força bruta exata."""
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+from langchain_chroma import Chroma
+
+from src.langchain_rag import flat_store
+from src.langchain_rag.flat_store import FlatIndex, build_flat_index
+
+_N, _D = 600, 32
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    return np.random.default_rng(0).normal(size=(_N, _D)).astype(np.float32)
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch, vectors, fake_embeddings) -> FlatIndex:
+    monkeypatch.setattr(flat_store, "_FLAT_DIR", tmp_path / "flat")
+    monkeypatch.setattr(flat_store, "_BLOCK_ROWS", 128)  # várias passadas por bloco
+    store = Chroma(
+        collection_name="flat-test",
+        embedding_function=fake_embeddings,
+        persist_directory=str(tmp_path / "chroma"),
+    )
+    store._collection.add(ids=[f"c{i:04d}" for i in range(_N)], embeddings=vectors.tolist())
+    return build_flat_index(store, version="v1")
+
+
+def _exact_top(vectors: np.ndarray, query: np.ndarray, k: int) -> list[str]:
+    matrix = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    return [f"c{i:04d}" for i in np.argsort(-scores, kind="stable")[:k]]
+
+
+def test_build_writes_sorted_ids_and_reopens(index, tmp_path):
+    assert len(index) == _N
+    assert list(index.ids) == sorted(index.ids)
+    reopened = FlatIndex.open(tmp_path / "flat")
+    assert reopened.version == "v1"
+    assert index.footprint()["codes"] >= _N * _D  # 1 byte por dimensão (+ cabeçalho .npy)
+    assert FlatIndex.open(tmp_path / "vazio") is None
+
+
+def test_rows_of_and_ids_at_round_trip(index):
+    wanted = ["c0005", "c0420", "inexistente", "c0099"]
+    rows = index.rows_of(wanted)
+    assert index.ids_at(rows) == ["c0005", "c0099", "c0420"]  # linhas em ordem crescente
+
+
+def test_int8_with_rescoring_matches_exact_top_k(index, vectors):
+    queries = np.random.default_rng(1).normal(size=(20, _D)).astype(np.float32)
+    results = index.search(queries, 10, rescore=100, exact=False)
+    recall = np.mean([
+        len(set(index.ids_at(rows)) & set(_exact_top(vectors, query, 10))) / 10
+        for query, (rows, _) in zip(queries, results)
+    ])
+    assert recall >= 0.95
+
+
+def test_rescoring_every_row_is_exact(index, vectors):
+    query = np.random.default_rng(2).normal(size=_D)
+    (rows, scores), = index.search(query, 10, rescore=_N, exact=False)
+    assert index.ids_at(rows) == _exact_top(vectors, query, 10)
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_rows_filter_restricts_results(index, vectors):
+    allowed = np.arange(0, _N, 7)
+    query = np.random.default_rng(3).normal(size=_D)
+    (rows, _), = index.search(query, 5, rows=allowed, rescore=len(allowed), exact=False)
+    assert set(rows) <= set(allowed)
+    expected = _exact_top(vectors[allowed], query, 5)
+    assert index.ids_at(rows) == [f"c{allowed[int(chunk_id[1:])]:04d}" for chunk_id in expected]
+
+
+def test_k_larger_than_candidates_and_empty_filter(index):
+    query = np.ones(_D)
+    (rows, _), = index.search(query, 50, rows=np.arange(3), exact=False)
+    assert sorted(rows) == [0, 1, 2]
+    (rows, scores), = index.search(query, 5, rows=np.empty(0, dtype=np.int64), exact=False)
+    assert len(rows) == len(scores) == 0
+
+
+# ─── Força bruta (VECTOR_BACKEND=numpy) ──────────────────────────────────────
+
+def test_exact_matches_brute_force(index, vectors):
+    queries = np.random.default_rng(4).normal(size=(15, _D)).astype(np.float32)
+    for query, (rows, scores) in zip(queries, index.search(queries, 8, exact=True)):
+        assert index.ids_at(rows) == _exact_top(vectors, query, 8)
+        assert np.all(np.diff(scores) <= 0)
+
+
+def test_exact_batch_equals_one_query_at_a_time(index):
+    queries = np.random.default_rng(5).normal(size=(6, _D)).astype(np.float32)
+    batched = index.search(queries, 5, exact=True)
+    for query, (rows, scores) in zip(queries, batched):
+        (single_rows, single_scores), = index.search(query, 5, exact=True)
+        assert list(rows) == list(single_rows)
+        np.testing.assert_allclose(scores, single_scores, rtol=1e-5)
+
+
+def test_exact_with_rows_filter(index, vectors):
+    allowed = np.arange(3, _N, 11)
+    query = np.random.default_rng(6).normal(size=_D)
+    (rows, _), = index.search(query, 4, rows=allowed, exact=True)
+    expected = _exact_top(vectors[allowed], query, 4)
+    assert index.ids_at(rows) == [f"c{allowed[int(chunk_id[1:])]:04d}" for chunk_id in expected]
+
+
+def test_exact_defaults_to_vector_backend(index, monkeypatch):
+    calls = []
+    exact = FlatIndex._exact
+    monkeypatch.setattr(
+        FlatIndex, "_exact", lambda self, *args: calls.append(args) or exact(self, *args)
+    )
+    query = np.ones(_D)
+    index.search(query, 3)
+    assert not calls  # VECTOR_BACKEND=chroma/int8: passada int8
+
+    numpy_backend = replace(flat_store.settings, vector_backend="numpy")
+    monkeypatch.setattr(flat_store, "settings", numpy_backend)
+    index.search(query, 3)
+    assert len(calls) == 1
@@ -0,0 +1,87 @@
+"""Memória de conversa: janela em tokens, resumo incremental e truncamento."""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.langchain_rag.history import ConversationMemory
+from src.langchain_rag.tokens import count_tokens
+
+from .conftest import RecordingChatModel
+
+
+@pytest.fixture(autouse=True)
+def _tokenizer(fake_tokenizer):
+    return fake_tokenizer
+
+
+@pytest.fixture
+def llm() -> RecordingChatModel:
+    """Resumidor falso: "resumo N" (N = nº de chamadas até agora)."""
+    model = RecordingChatModel()
+    model.reply = lambda text: f"resumo {len(model.prompts)}"
+    return model
+
+
+def _turn(i: int, answer_words: int = 10) -> tuple[str, str]:
+    return f"pergunta {i} sobre férias", " ".join([f"resposta{i}"] * answer_words)
+
+
+def _memory(llm, **kwargs) -> ConversationMemory:
+    options = {"max_tokens": 60, "keep_turns": 3, "summary_max_tokens": 15}
+    return ConversationMemory(llm=llm, **(options | kwargs))
+
+
+def test_recent_turns_stay_literal_until_the_window_fills(llm):
+    memory = _memory(llm)
+    for i in range(3):
+        memory.add_turn(*_turn(i))
+    assert not llm.prompts and memory.summarized_turns == 0
+    messages = memory.messages()
+    assert [type(message) for message in messages] == [HumanMessage, AIMessage] * 3
+    assert messages[0].content == "pergunta 0 sobre férias"
+
+
+def test_evicted_turns_are_summarized_incrementally(llm):
+    memory = _memory(llm)
+    for i in range(5):
+        memory.add_turn(*_turn(i))
+
+    assert memory.summarized_turns == 2
+    assert len(llm.prompts) == 2  # um resumo por turno que saiu da janela
+    first, second = (prompt[-1].content for prompt in llm.prompts)
+    assert "pergunta 0" in first and "pergunta 1" not in first
+    # O 2º resumo parte do 1º + só o turno novo (nunca a conversa inteira)
+    assert "resumo 1" in second and "pergunta 1" in second and "pergunta 0" not in second
+
+    messages = memory.messages()
+    assert isinstance(messages[0], SystemMessage) and messages[0].content.endswith("resumo 2")
+    assert [m.content for m in messages[1::2]] == [f"pergunta {i} sobre férias" for i in (2, 3, 4)]
+    assert len(memory) == 5  # histórico completo preservado
+
+
+def test_large_turns_shrink_the_window(llm):
+    memory = _memory(llm)
+    memory.add_turn(*_turn(0))
+    memory.add_turn(*_turn(1, answer_words=30))  # 2 turnos = 48 tokens > 45 de janela
+    assert memory.summarized_turns == 1
+
+
+def test_messages_stay_within_the_budget(llm):
+    llm.reply = lambda text: " ".join(["resumo", "longo"] * 40)  # teto do resumo é aplicado
+    memory = _memory(llm)
+    for i, words in enumerate([10, 3, 25, 40, 1, 200, 12, 5, 60]):
+        memory.add_turn(*_turn(i, answer_words=words))
+        assert memory.prompt_tokens() <= memory.max_tokens
+        if memory.summary:  # prefixo + resumo dentro do teto do resumo
+            assert count_tokens(memory.messages()[0].content) <= memory.summary_max_tokens
+
+
+def test_oversized_last_turn_is_truncated_only_in_the_prompt(llm):
+    memory = _memory(llm)
+    question, answer = _turn(0, answer_words=200)
+    memory.add_turn(question, answer)
+    human, ai = memory.messages()
+    assert human.content == question
+    assert ai.content.endswith("…")
+    assert count_tokens(human.content) + count_tokens(ai.content) <= 60 - 15
+    assert memory.turns[0] == (question, answer)
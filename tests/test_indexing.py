@@ -0,0 +1,171 @@
+"""Ingestão incremental: manifesto, IDs por conteúdo, remoções e reconstrução."""
+
+import json
+import os
+
+import pytest
+
+from src.langchain_rag import indexing
+from src.langchain_rag.bm25 import get_bm25_index
+from src.langchain_rag.indexing import IngestManifest, index_documents, load_catalog
+from src.langchain_rag.retrieval import get_chunk_ids, load_vector_store
+
+# Chunks pequenos: cada documento vira vários chunks
+_CHUNKING = {"chunk_size": 120, "chunk_overlap": 0, "chunk_strategy": "recursive", "workers": 1}
+
+
+def _paragraphs(topic: str, count: int = 4) -> str:
+    return "\n\n".join(
+        f"Parágrafo {i} sobre {topic}: regra número {i} da política de {topic}."
+        for i in range(count)
+    )
+
+
+def _write(data_dir, name: str, text: str) -> None:
+    path = data_dir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _index(data_dir, **kwargs):
+    return index_documents(data_dir, **{**_CHUNKING, **kwargs})
+
+
+def _chroma_ids() -> set[str]:
+    return set(load_vector_store()._collection.get(include=[])["ids"])
+
+
+def _bm25_ids() -> set[str]:
+    return {row[0] for row in get_bm25_index()._db.execute("SELECT id FROM docs")}
+
+
+def _assert_consistent() -> IngestManifest:
+    """Chroma, BM25 e manifesto descrevem o mesmo conjunto de chunks."""
+    manifest = IngestManifest.load()
+    chroma_ids = _chroma_ids()
+    assert chroma_ids == _bm25_ids()
+    assert len(chroma_ids) == manifest.totals()["chunks"]
+    for source_path in manifest.files:
+        assert len(get_chunk_ids(load_vector_store(), source_path)) == (
+            manifest.files[source_path].chunks
+        )
+    return manifest
+
+
+@pytest.fixture
+def corpus(data_dir, fake_embeddings):
+    _write(data_dir, "ferias.md", "# Férias\n\n" + _paragraphs("férias"))
+    _write(data_dir, "beneficios.md", "# Benefícios\n\n" + _paragraphs("benefícios"))
+    _write(data_dir, "rh/remoto.md", "# Remoto\n\n" + _paragraphs("trabalho remoto"))
+    report = _index(data_dir, full=True)
+    assert report.full_rebuild
+    return data_dir
+
+
+def test_first_run_indexes_every_file(corpus):
+    manifest = _assert_consistent()
+    assert set(manifest.files) == {"ferias.md", "beneficios.md", "rh/remoto.md"}
+    assert all(entry.chunks > 1 for entry in manifest.files.values())
+
+
+def test_unchanged_run_embeds_nothing(corpus):
+    before = _chroma_ids()
+    report = _index(corpus)
+    assert not report.full_rebuild
+    assert report.files_unchanged == 3
+    assert report.chunks_embedded == report.chunks_deleted == 0
+    assert _chroma_ids() == before
+
+
+def test_touched_file_with_same_content_is_not_reembedded(corpus):
+    path = corpus / "ferias.md"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    report = _index(corpus)
+    assert report.files_unchanged == 3
+    assert report.files_changed == 0
+    assert report.chunks_embedded == 0
+    assert IngestManifest.load().files["ferias.md"].mtime_ns == stat.st_mtime_ns + 10**9
+
+
+def test_added_file_embeds_only_its_chunks(corpus):
+    before = _chroma_ids()
+    _write(corpus, "novo.md", "# Novo\n\n" + _paragraphs("reembolso"))
+    report = _index(corpus)
+    manifest = _assert_consistent()
+    assert report.files_added == 1
+    assert report.chunks_embedded == manifest.files["novo.md"].chunks
+    assert before < _chroma_ids()
+
+
+def test_edited_file_replaces_only_changed_chunks(corpus):
+    before = set(get_chunk_ids(load_vector_store(), "ferias.md"))
+    text = (corpus / "ferias.md").read_text(encoding="utf-8")
+    edited = text.replace("regra número 3", "regra alterada 3")
+    _write(corpus, "ferias.md", edited)
+    report = _index(corpus)
+    after = set(get_chunk_ids(load_vector_store(), "ferias.md"))
+    _assert_consistent()
+    assert report.files_changed == 1
+    assert report.chunks_embedded == len(after - before) >= 1
+    assert report.chunks_deleted == len(before - after) >= 1
+    assert before & after  # parágrafos intocados mantêm o ID (e o embedding)
+    assert not (before - after) & _bm25_ids()
+
+
+def test_deleted_file_removes_its_chunks(corpus):
+    removed = set(get_chunk_ids(load_vector_store(), "rh/remoto.md"))
+    (corpus / "rh" / "remoto.md").unlink()
+    report = _index(corpus)
+    manifest = _assert_consistent()
+    assert report.files_deleted == 1
+    assert report.chunks_deleted == len(removed)
+    assert "rh/remoto.md" not in manifest.files
+    assert not removed & (_chroma_ids() | _bm25_ids())
+
+
+def test_config_change_rebuilds_everything(corpus):
+    before = _chroma_ids()
+    report = _index(corpus, chunk_size=80)
+    manifest = _assert_consistent()
+    assert report.full_rebuild
+    assert manifest.config["chunk_size"] == 80
+    assert _chroma_ids() != before
+    assert not (before - _chroma_ids()) & _bm25_ids()
+
+
+def test_version_changes_only_with_content(corpus):
+    version = IngestManifest.load().version
+    _index(corpus)
+    assert IngestManifest.load().version == version
+    _write(corpus, "ferias.md", "# Férias\n\nTexto novo.")
+    _index(corpus)
+    assert IngestManifest.load().version != version
+
+
+# ─── Catálogo (load_catalog) ─────────────────────────────────────────────────
+
+def test_catalog_is_memoized_until_the_manifest_changes(corpus):
+    catalog = load_catalog()
+    assert sorted(catalog.files) == ["beneficios.md", "ferias.md", "rh/remoto.md"]
+    assert load_catalog() is catalog  # sem mudança: não relê o arquivo
+
+    _write(corpus, "novo.md", "# Novo\n\n" + _paragraphs("novidades"))
+    _index(corpus)
+    assert "novo.md" in load_catalog().files
+    assert load_catalog().version != catalog.version
+
+
+def test_catalog_sees_a_manifest_written_by_another_process(corpus):
+    catalog = load_catalog()
+    # Outro processo regrava o manifesto (mesma troca atômica do save)
+    path = indexing._MANIFEST_PATH
+    data = json.loads(path.read_text(encoding="utf-8"))
+    del data["files"]["ferias.md"]
+    tmp_path = path.with_suffix(".other")
+    tmp_path.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+    reloaded = load_catalog()
+    assert reloaded is not catalog
+    assert sorted(reloaded.files) == ["beneficios.md", "rh/remoto.md"]
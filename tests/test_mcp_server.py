@@ -0,0 +1,134 @@
+"""Tools do servidor MCP (sem cliente MCP: as funções são chamadas direto)."""
+
+import asyncio
+import json
+
+import pytest
+from langchain_core.documents import Document
+
+from src.langchain_rag import answer_cache, indexing
+from src.langchain_rag.answer_cache import AnswerCache
+from src.langchain_rag.indexing import FileEntry, IngestManifest
+from src.mcp_server import server
+
+from .conftest import FakeEmbeddings
+from .test_metrics import assert_valid_exposition
+
+
+class _FakeContext:
+    def __init__(self):
+        self.infos: list[str] = []
+        self.progress: list[str] = []
+
+    async def info(self, message: str) -> None:
+        self.infos.append(message)
+
+    async def report_progress(self, progress, message=None, **kwargs) -> None:
+        self.progress.append(message)
+
+
+class _FakeStreamer:
+    def __init__(self):
+        self.generated = 0
+
+    async def aretrieve(self, question):
+        return [
+            Document(page_content="30 dias", metadata={"source": "data/politica-ferias.md"}),
+            Document(page_content="abono", metadata={"source": "data/politica-ferias.md"}),
+        ]
+
+    async def astream(self, question, docs):
+        self.generated += 1
+        for token in ["Você tem ", "30 dias."]:
+            yield token
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    monkeypatch.setattr(answer_cache, "get_store_version", lambda: "v1")
+    monkeypatch.setattr(indexing, "get_store_version", lambda shard=None: "v1")
+    monkeypatch.setattr(answer_cache, "_cache", AnswerCache(FakeEmbeddings()))
+    streamer = _FakeStreamer()
+    monkeypatch.setattr(server, "_streamer", streamer)
+    return streamer
+
+
+def test_stream_returns_sources_on_cache_hits_too(streaming):
+    question = "Quantos dias de férias eu tenho?"
+    first_ctx, second_ctx = _FakeContext(), _FakeContext()
+    miss = asyncio.run(server.ask_question_stream(question, first_ctx))
+    hit = asyncio.run(server.ask_question_stream(question, second_ctx))
+
+    assert miss == hit == "Você tem 30 dias.\n\nFontes: politica-ferias.md"
+    assert streaming.generated == 1
+    assert "Fontes: politica-ferias.md" in second_ctx.infos
+    assert "Resposta obtida do cache." in second_ctx.infos
+    assert answer_cache._cache.get(question) == "Você tem 30 dias."  # cache guarda só a resposta
+
+
+def test_stats_renders_startup_timings_without_loading_rag(monkeypatch):
+    async def fail():
+        raise AssertionError("stats não deve importar o pipeline RAG")
+
+    monkeypatch.setattr(server, "_ensure_rag", fail)
+    monkeypatch.setitem(server._startup_timings, "server_import", 0.123)
+    text = asyncio.run(server.stats("prometheus"))
+    types = assert_valid_exposition(text)
+    assert types["rag_startup_seconds"] == "gauge"
+    assert 'rag_startup_seconds{stage="server_import"} 0.123' in text.splitlines()
+
+    summary = json.loads(asyncio.run(server.stats()))
+    assert summary["rag_startup_seconds"]["stage=server_import"] == 0.123
+
+
+# ─── list_documents ──────────────────────────────────────────────────────────
+
+@pytest.fixture
+def catalog(monkeypatch):
+    files = {
+        f"{folder}/doc-{i:02d}.md": FileEntry(
+            mtime_ns=0, size=2048, sha256=str(i), chunks=3, ingested_at=0.0
+        )
+        for i, folder in enumerate(["rh"] * 6 + ["ti"] * 4)
+    }
+    manifest = IngestManifest(files=files)
+    monkeypatch.setattr(indexing, "load_catalog", lambda: manifest)
+    return manifest
+
+
+def _listed(text: str) -> list[str]:
+    return [line.split(" (")[0].removeprefix("  • ") for line in text.splitlines() if "•" in line]
+
+
+def test_list_documents_pages(catalog):
+    first = server._list_documents(offset=0, limit=4)
+    assert first.startswith("Documentos indexados (10 arquivos, 30 chunks)")
+    assert _listed(first) == [f"rh/doc-{i:02d}.md" for i in range(4)]
+    assert "Mostrando 1–4 de 10. Use offset=4 para a próxima página." in first
+
+    middle = server._list_documents(offset=4, limit=4)
+    assert _listed(middle) == ["rh/doc-04.md", "rh/doc-05.md", "ti/doc-06.md", "ti/doc-07.md"]
+    assert "Use offset=8" in middle
+
+    last = server._list_documents(offset=8, limit=4)
+    assert _listed(last) == ["ti/doc-08.md", "ti/doc-09.md"]
+    assert "Mostrando 9–10 de 10 (última página)." in last
+    assert "próxima página" not in last
+
+
+def test_list_documents_boundaries(catalog):
+    everything = server._list_documents(limit=10)
+    assert len(_listed(everything)) == 10 and "Mostrando" not in everything
+
+    beyond = server._list_documents(offset=10, limit=5)
+    assert _listed(beyond) == []
+    assert "nenhum documento a partir de offset=10; total: 10" in beyond
+    assert _listed(server._list_documents(offset=-3, limit=1)) == ["rh/doc-00.md"]
+    assert _listed(server._list_documents(limit=0)) == []
+
+
+def test_list_documents_contains_filters_before_paging(catalog):
+    text = server._list_documents(limit=3, contains="TI/")
+    assert _listed(text) == ["ti/doc-06.md", "ti/doc-07.md", "ti/doc-08.md"]
+    assert "Mostrando 1–3 de 4. Use offset=3" in text
+    assert 'nenhum documento contém "financeiro"' in server._list_documents(contains="financeiro")
@@ -0,0 +1,74 @@
+"""Metadados estruturados dos chunks: título, seção, h1-h3 e datas."""
+
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from src.langchain_rag.metadata import enrich_chunks
+
+_TEXT = """# Política de Férias
+
+Introdução geral.
+
+## Benefícios
+
+Resumo dos benefícios.
+
+### Saúde
+
+- Plano de saúde completo.
+
+```
+# não é cabeçalho
+```
+
+## Férias
+
+30 dias por ano.
+"""
+
+_MTIME_NS = int(datetime(2024, 5, 1, 12, tzinfo=timezone.utc).timestamp() * 1e9)
+
+
+def _chunks(text: str, *starts_of: str) -> list[Document]:
+    return [
+        Document(page_content=text[text.index(s):], metadata={"start_index": text.index(s)})
+        for s in starts_of
+    ]
+
+
+def test_sections_follow_the_header_path():
+    chunks = _chunks(_TEXT, "Introdução", "## Benefícios", "- Plano", "```", "30 dias")
+    enrich_chunks(chunks, _TEXT, Path("rh/politica-ferias.md"), _MTIME_NS)
+    intro, beneficios, saude, fence, ferias = (chunk.metadata for chunk in chunks)
+
+    assert intro["section"] == "Política de Férias"
+    assert beneficios["section"] == "Política de Férias > Benefícios"  # começa no cabeçalho
+    assert saude["section"] == "Política de Férias > Benefícios > Saúde"
+    assert (saude["h1"], saude["h2"], saude["h3"]) == ("Política de Férias", "Benefícios", "Saúde")
+    assert fence["section"] == saude["section"]  # "# " dentro de bloco de código não conta
+    assert ferias["section"] == "Política de Férias > Férias"
+    assert "h3" not in ferias
+
+
+def test_title_type_and_dates():
+    (chunk,) = _chunks(_TEXT, "30 dias")
+    enrich_chunks([chunk], _TEXT, Path("rh/politica-ferias.MD"), _MTIME_NS)
+    assert chunk.metadata["title"] == "Política de Férias"
+    assert chunk.metadata["file_type"] == "md"
+    assert chunk.metadata["modified"] == "2024-05-01"
+    assert chunk.metadata["modified_ts"] == int(_MTIME_NS / 1e9)
+    assert chunk.metadata["start_index"] == _TEXT.index("30 dias")  # preservado
+
+
+def test_without_h1_the_title_comes_from_the_file_name():
+    text = "Texto sem cabeçalho.\n\n### Detalhe\n\nMais texto.\n"
+    chunks = _chunks(text, "Texto", "Mais")
+    enrich_chunks(chunks, text, Path("manual_de-ti.md"), os.stat(__file__).st_mtime_ns)
+    first, second = (chunk.metadata for chunk in chunks)
+    assert first["title"] == "manual de ti"
+    assert first["section"] == "" and "h1" not in first
+    assert second["section"] == "Detalhe"  # nível pulado não cria h1/h2
+    assert second["h3"] == "Detalhe" and "h1" not in second and "h2" not in second
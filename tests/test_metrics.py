@@ -0,0 +1,98 @@
+"""Métricas: contadores, gauges, histogramas e o formato do Prometheus."""
+
+import re
+
+import pytest
+
+from src.langchain_rag.metrics import MetricsRegistry
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$')
+
+
+def assert_valid_exposition(text: str) -> dict[str, str]:
+    """Cada amostra pertence a uma família declarada antes com # TYPE. Retorna os tipos."""
+    types: dict[str, str] = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name not in types, f"família repetida: {name}"
+            types[name] = kind
+        elif line.startswith("# HELP ") or not line:
+            continue
+        else:
+            match = _SAMPLE.match(line)
+            assert match, f"linha inválida: {line!r}"
+            name = match.group(1)
+            family = re.sub(r"_(bucket|sum|count)$", "", name)
+            assert name in types or types.get(family) == "histogram", f"sem # TYPE: {line!r}"
+            float(match.group(3))
+    return types
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+def test_counter_accumulates_per_label_set(registry):
+    requests = registry.counter("rag_requests_total", "Chamadas")
+    requests.inc(chain="rag", status="ok")
+    requests.inc(2, status="ok", chain="rag")  # ordem dos labels não importa
+    requests.inc(chain="rag", status="error")
+    assert requests.snapshot() == {"chain=rag,status=error": 1, "chain=rag,status=ok": 3}
+    assert registry.counter("rag_requests_total", "outro texto") is requests
+    assert requests.render() == [
+        "# HELP rag_requests_total Chamadas",
+        "# TYPE rag_requests_total counter",
+        'rag_requests_total{chain="rag",status="error"} 1',
+        'rag_requests_total{chain="rag",status="ok"} 3',
+    ]
+
+
+def test_gauge_keeps_the_last_value(registry):
+    startup = registry.gauge("rag_startup_seconds", "Inicialização")
+    startup.set(1.5, stage="rag_imports")
+    startup.set(0.25, stage="rag_imports")
+    assert startup.render()[1:] == [
+        "# TYPE rag_startup_seconds gauge",
+        'rag_startup_seconds{stage="rag_imports"} 0.25',
+    ]
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive(registry):
+    latency = registry.histogram("rag_stage_duration_seconds", "Etapas", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 1.0, 3.0):  # limite exato cai no próprio bucket (le)
+        latency.observe(value, stage="llm")
+    lines = latency.render()
+    assert lines[2:] == [
+        'rag_stage_duration_seconds_bucket{stage="llm",le="0.1"} 2',
+        'rag_stage_duration_seconds_bucket{stage="llm",le="1"} 4',
+        'rag_stage_duration_seconds_bucket{stage="llm",le="+Inf"} 5',
+        'rag_stage_duration_seconds_sum{stage="llm"} 4.65',
+        'rag_stage_duration_seconds_count{stage="llm"} 5',
+    ]
+    summary = latency.snapshot()["stage=llm"]
+    assert summary == {"count": 5, "mean": 0.93, "p50_le": 1.0, "p95_le": float("inf")}
+
+
+def test_render_prometheus_is_valid_exposition(registry):
+    registry.counter("rag_requests_total", "Chamadas").inc(chain="rag", status="ok")
+    registry.gauge("rag_startup_seconds", "Inicialização").set(0.5, stage="server_import")
+    registry.histogram("rag_retrieved_chunks", "Chunks", buckets=(1, 5)).observe(3)
+    registry.histogram("rag_empty_seconds", "Sem observações")
+    registry.register_collector("cache", lambda: {"answer_cache": {"exact_hits": 2, "misses": 1}})
+
+    text = registry.render_prometheus()
+    assert text.endswith("\n")
+    assert assert_valid_exposition(text) == {
+        "rag_requests_total": "counter",
+        "rag_startup_seconds": "gauge",
+        "rag_retrieved_chunks": "histogram",
+        "rag_empty_seconds": "histogram",
+        "rag_answer_cache_total": "counter",
+    }
+    assert 'rag_answer_cache_total{event="exact_hits"} 2' in text.splitlines()
+
+    snapshot = registry.snapshot()
+    assert snapshot["answer_cache"] == {"exact_hits": 2, "misses": 1}
+    assert snapshot["rag_startup_seconds"] == {"stage=server_import": 0.5}
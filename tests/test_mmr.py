@@ -0,0 +1,69 @@
+"""MMR vetorizado: relevância × diversidade."""
+
+import numpy as np
+
+from src.langchain_rag.mmr import mmr_select
+
+
+def _reference(query, candidates, k, lambda_mult):
+    """MMR ingênuo (um loop por candidato), para comparar com a versão vetorizada."""
+    def cosine(a, b):
+        return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+    selected = []
+    while len(selected) < min(k, len(candidates)):
+        best, best_score = None, -np.inf
+        for i, candidate in enumerate(candidates):
+            if i in selected:
+                continue
+            relevance = cosine(query, candidate)
+            if selected:
+                redundancy = max(cosine(candidate, candidates[j]) for j in selected)
+                score = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+            else:
+                score = relevance
+            if score > best_score:
+                best, best_score = i, score
+        selected.append(best)
+    return selected
+
+
+def test_duplicates_give_way_to_diverse_results():
+    query = np.array([1.0, 0.0, 0.0])
+    candidates = np.array([
+        [1.0, 0.1, 0.0],
+        [1.0, 0.1, 0.0],   # cópia do primeiro
+        [1.0, 0.1, 0.001],  # quase cópia
+        [0.6, 0.0, 0.8],   # menos relevante, mas diferente
+    ])
+    assert mmr_select(query, candidates, 2, lambda_mult=0.5) == [0, 3]
+
+
+def test_lambda_one_is_plain_similarity_order():
+    rng = np.random.default_rng(0)
+    query, candidates = rng.normal(size=8), rng.normal(size=(20, 8))
+    relevance = candidates @ query / np.linalg.norm(candidates, axis=1)
+    assert mmr_select(query, candidates, 5, lambda_mult=1.0) == list(np.argsort(-relevance)[:5])
+
+
+def test_matches_naive_implementation():
+    rng = np.random.default_rng(42)
+    for lambda_mult in (0.0, 0.3, 0.5, 0.9):
+        query, candidates = rng.normal(size=16), rng.normal(size=(30, 16))
+        assert mmr_select(query, candidates, 8, lambda_mult) == _reference(
+            query, candidates, 8, lambda_mult
+        )
+
+
+def test_greedy_prefix_property():
+    rng = np.random.default_rng(7)
+    query, candidates = rng.normal(size=8), rng.normal(size=(25, 8))
+    assert mmr_select(query, candidates, 10)[:4] == mmr_select(query, candidates, 4)
+
+
+def test_edge_cases():
+    query = np.ones(4)
+    assert mmr_select(query, np.empty((0, 4)), 3) == []
+    assert mmr_select(query, np.eye(4), 0) == []
+    assert sorted(mmr_select(query, np.eye(4), 10)) == [0, 1, 2, 3]
+    assert mmr_select(query, np.zeros((2, 4)), 2) == [0, 1]  # vetores nulos não dão NaN
@@ -0,0 +1,88 @@
+"""Reranking: ordem do cross-encoder, cache de scores e orçamento de latência."""
+
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+from src.langchain_rag import rerank
+from src.langchain_rag.rerank import CrossEncoderReranker
+
+
+class _StubCrossEncoder:
+    """Cross-encoder falso: score fixo por texto; cada lote "custa" 50 ms."""
+
+    def __init__(self, scores: dict[str, float], clock: dict):
+        self.scores = scores
+        self.clock = clock
+        self.batches: list[list[tuple[str, str]]] = []
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        assert batch_size == len(pairs)
+        self.batches.append(list(pairs))
+        self.clock["now"] += 0.05
+        return [self.scores[text] for _, text in pairs]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    state = {"now": 0.0}
+    monkeypatch.setattr(rerank, "time", SimpleNamespace(perf_counter=lambda: state["now"]))
+    return state
+
+
+def _docs(n: int) -> list[Document]:
+    return [Document(id=f"c{i}", page_content=f"texto {i}") for i in range(n)]
+
+
+def _reranker(clock, scores, **kwargs) -> tuple[CrossEncoderReranker, _StubCrossEncoder]:
+    reranker = CrossEncoderReranker(model_name="stub", **{"batch_size": 2, **kwargs})
+    reranker._model = model = _StubCrossEncoder(scores, clock)
+    return reranker, model
+
+
+_SCORES = {f"texto {i}": score for i, score in enumerate([0.1, 0.9, 0.3, 0.7, 0.5, 0.2])}
+
+
+def test_cross_encoder_scores_set_the_order(clock):
+    reranker, model = _reranker(clock, _SCORES, budget_ms=10_000)
+    docs = reranker.rerank("férias", _docs(6), k=3)
+    assert [doc.id for doc in docs] == ["c1", "c3", "c4"]
+    assert [len(batch) for batch in model.batches] == [2, 2, 2]  # em lotes de batch_size
+    assert all(query == "férias" for batch in model.batches for query, _ in batch)
+
+
+def test_second_call_is_served_from_the_cache(clock):
+    reranker, model = _reranker(clock, _SCORES, budget_ms=10_000)
+    first = reranker.rerank("férias", _docs(6), k=3)
+    second = reranker.rerank("férias", _docs(6), k=5)
+    assert len(model.batches) == 3  # nenhuma passada nova
+    assert [doc.id for doc in second][:3] == [doc.id for doc in first]
+
+    reranker.rerank("plano de saúde", _docs(2), k=1)  # outra pergunta: outra chave
+    assert len(model.batches) == 4
+
+
+def test_budget_exhausted_falls_back_to_the_original_order(clock):
+    reranker, model = _reranker(clock, _SCORES, budget_ms=60)
+    docs = _docs(6)
+    assert reranker.rerank("férias", docs, k=3) == docs[:3]
+    assert len(model.batches) == 2  # o 3º lote já passaria do orçamento
+
+    # Os scores calculados antes do estouro ficaram no cache
+    reranker.budget_ms = 10_000
+    assert [doc.id for doc in reranker.rerank("férias", docs, k=3)] == ["c1", "c3", "c4"]
+    assert len(model.batches) == 3
+
+
+def test_ties_keep_the_bi_encoder_order_and_small_inputs_skip_the_model(clock):
+    reranker, model = _reranker(clock, {f"texto {i}": 1.0 for i in range(4)}, budget_ms=10_000)
+    assert [doc.id for doc in reranker.rerank("férias", _docs(4), k=4)] == ["c0", "c1", "c2", "c3"]
+    assert reranker.rerank("férias", _docs(1), k=3) == _docs(1)
+    assert len(model.batches) == 2
+
+
+def test_score_cache_is_bounded(clock):
+    reranker, model = _reranker(clock, _SCORES, budget_ms=10_000, cache_size=4)
+    reranker.rerank("férias", _docs(6), k=3)
+    assert len(reranker._scores) == 4
@@ -0,0 +1,229 @@
+"""Busca: fusão híbrida (RRF), cache de resultados e registro de stores."""
+
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from src.langchain_rag import indexing, retrieval
+from src.langchain_rag.metrics import SEARCH_CACHE
+
+
+def _doc(chunk_id: str, **metadata) -> Document:
+    return Document(id=chunk_id, page_content=f"texto {chunk_id}", metadata=metadata)
+
+
+class _FakeBM25:
+    def __init__(self, hits: list[tuple[str, float]]):
+        self.hits = hits
+
+    def search(self, query: str, k: int = 10) -> list[tuple[str, float]]:
+        return self.hits[:k]
+
+
+def _hybrid_setup(monkeypatch, dense: list[Document], sparse: list[str], stored: list[Document]):
+    by_id = {doc.id: doc for doc in stored}
+    monkeypatch.setattr(retrieval, "_dense_search", lambda query, k, where: dense[:k])
+    monkeypatch.setattr(
+        retrieval, "get_bm25_index",
+        lambda: _FakeBM25([(chunk_id, 10.0 - i) for i, chunk_id in enumerate(sparse)]),
+    )
+    monkeypatch.setattr(retrieval, "load_shard_stores", lambda: [("", None)])
+    monkeypatch.setattr(
+        retrieval, "fetch_documents",
+        lambda store, ids: {chunk_id: by_id[chunk_id] for chunk_id in ids if chunk_id in by_id},
+    )
+
+
+def test_hybrid_ignores_bm25_ids_missing_from_chroma(monkeypatch):
+    # BM25 à frente do Chroma (ingestão interrompida): "fantasma*" não existem
+    dense = [_doc("a"), _doc("b")]
+    _hybrid_setup(
+        monkeypatch, dense, ["fantasma1", "fantasma2", "fantasma3", "c"], stored=[_doc("c")]
+    )
+    docs = retrieval._hybrid_search("consulta", 3, None)
+    assert sorted(doc.id for doc in docs) == ["a", "b", "c"]  # k resultados, sem vagas perdidas
+
+
+def test_hybrid_applies_where_to_bm25_candidates(monkeypatch):
+    dense = [_doc("a", title="RH")]
+    _hybrid_setup(
+        monkeypatch, dense, ["b", "c"], stored=[_doc("b", title="TI"), _doc("c", title="RH")]
+    )
+    docs = retrieval._hybrid_search("consulta", 5, {"title": "RH"})
+    assert [doc.id for doc in docs] == ["a", "c"]
+
+
+# ─── Cache de resultados (search) ────────────────────────────────────────────
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Backends de busca falsos que contam as chamadas; versão do índice controlada."""
+    state = {"version": "v1", "calls": [], "hook": None, "error": None}
+
+    def fake(search_type):
+        def run(query, k, where, *rest):
+            state["calls"].append((search_type, query, k, where))
+            if state["hook"] is not None:
+                state["hook"]()
+            if state["error"] is not None:
+                raise state["error"]
+            return [_doc(f"{search_type}-{query}-{i}") for i in range(k)]
+        return run
+
+    monkeypatch.setattr(retrieval, "_search_cache", retrieval._SearchCache(64))
+    monkeypatch.setattr(indexing, "get_store_version", lambda shard=None: state["version"])
+    monkeypatch.setattr(retrieval, "_dense_search", fake("similarity"))
+    monkeypatch.setattr(retrieval, "_hybrid_search", fake("hybrid"))
+    return state
+
+
+def test_cache_key_includes_where_search_type_and_version(backend):
+    retrieval.search("férias", 3, search_type="similarity", rerank=False)
+    retrieval.search("férias", 3, search_type="similarity", rerank=False)
+    assert len(backend["calls"]) == 1
+
+    retrieval.search("férias", 3, search_type="similarity", where={"title": "RH"}, rerank=False)
+    retrieval.search("férias", 3, search_type="hybrid", rerank=False)
+    assert len(backend["calls"]) == 3
+
+    backend["version"] = "v2"  # nova ingestão
+    retrieval.search("férias", 3, search_type="similarity", rerank=False)
+    assert len(backend["calls"]) == 4
+
+
+def test_smaller_k_is_a_slice_of_the_cached_result(backend):
+    first = retrieval.search("férias", 2, search_type="similarity", rerank=False)
+    top = retrieval.search("férias", 5, search_type="similarity", rerank=False)
+    assert len(backend["calls"]) == 1
+    assert backend["calls"][0][2] == retrieval.settings.search_max_k  # sempre o máximo
+    assert [doc.id for doc in first] == [doc.id for doc in top[:2]]
+    assert len(top) == 5
+
+    top[0].metadata["alterado"] = True  # cópias: o cache não é afetado
+    assert "alterado" not in retrieval.search("férias", 1, rerank=False)[0].metadata
+
+
+def _concurrent_search(backend, callers: int) -> tuple[list, list]:
+    """Dispara `callers` buscas iguais enquanto a primeira está em andamento."""
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        assert release.wait(5)
+
+    backend["hook"] = slow
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(retrieval.search("férias", 3, search_type="similarity", rerank=False))
+        except RuntimeError as error:
+            errors.append(error)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    assert started.wait(5)
+    shared = SEARCH_CACHE.snapshot().get("result=shared", 0)
+    followers = [threading.Thread(target=call) for _ in range(callers - 1)]
+    for thread in followers:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while SEARCH_CACHE.snapshot().get("result=shared", 0) < shared + callers - 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+        assert not thread.is_alive()  # ninguém fica preso esperando o líder
+    return results, errors
+
+
+def test_concurrent_callers_share_one_backend_call(backend):
+    results, errors = _concurrent_search(backend, callers=8)
+    assert not errors
+    assert len(backend["calls"]) == 1
+    assert len(results) == 8
+    assert all([doc.id for doc in docs] == [doc.id for doc in results[0]] for docs in results)
+
+
+def test_failing_leader_releases_followers(backend):
+    backend["error"] = RuntimeError("Chroma indisponível")
+    results, errors = _concurrent_search(backend, callers=4)
+    assert not results and len(errors) == 4  # seguidores recebem o erro do líder
+    assert len(backend["calls"]) == 1
+
+    # O erro não fica em cache: a próxima chamada tenta de novo
+    backend["hook"] = backend["error"] = None
+    assert len(retrieval.search("férias", 3, search_type="similarity", rerank=False)) == 3
+    assert len(backend["calls"]) == 2
+
+
+# ─── Registro de stores ──────────────────────────────────────────────────────
+
+class _FakeChroma:
+    """Chroma falso: registra aberturas e limpezas do cache de System."""
+
+    opened: list[tuple[str, str]] = []
+    cleared = 0
+
+    def __init__(self, persist_directory, embedding_function, collection_name):
+        self.key = (persist_directory, collection_name)
+        _FakeChroma.opened.append(self.key)
+        self._client = self
+
+    def clear_system_cache(self):
+        _FakeChroma.cleared += 1
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    version = {"v": "v1"}
+    _FakeChroma.opened, _FakeChroma.cleared = [], 0
+    monkeypatch.setattr(retrieval, "Chroma", _FakeChroma)
+    monkeypatch.setattr(retrieval, "get_embeddings", lambda: None)
+    monkeypatch.setattr(indexing, "get_store_version", lambda shard=None: version["v"])
+    return retrieval._StoreRegistry(), version
+
+
+def test_registry_shares_one_store_per_collection(registry):
+    stores, _ = registry
+    first = stores.get("/dados", "rag_documents")
+    assert stores.get("/dados", "rag_documents") is first
+    other = stores.get("/dados", "rag_documents-h01")
+    assert other is not first
+    assert stores.get("/outro", "rag_documents") is not first
+    assert _FakeChroma.opened == [
+        ("/dados", "rag_documents"), ("/dados", "rag_documents-h01"), ("/outro", "rag_documents"),
+    ]
+
+
+def test_registry_reopens_once_after_the_version_changes(registry):
+    stores, version = registry
+    first = stores.get("/dados", "rag_documents")
+    shard = stores.get("/dados", "rag_documents-h01")
+
+    version["v"] = "v2"  # outro processo rodou o ingest.py
+    reopened = stores.get("/dados", "rag_documents")
+    assert reopened is not first
+    assert stores.get("/dados", "rag_documents") is reopened
+    assert _FakeChroma.cleared == 1  # System limpo uma vez para todos os shards
+    assert stores.get("/dados", "rag_documents-h01") is not shard
+    assert len(_FakeChroma.opened) == 4
+    assert _FakeChroma.cleared == 1
+
+
+def test_registry_opens_once_under_concurrency(registry):
+    stores, _ = registry
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(stores.get("/dados", "rag_documents")))
+        for _ in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(_FakeChroma.opened) == 1
+    assert all(store is results[0] for store in results)
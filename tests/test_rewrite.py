@@ -0,0 +1,91 @@
+"""Reformulação de perguntas de acompanhamento: heurística e memo."""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.langchain_rag.rewrite import QueryRewriter, is_self_contained
+
+from .conftest import RecordingChatModel
+
+_HISTORY = [
+    HumanMessage(content="Quais são os benefícios da empresa?"),
+    AIMessage(content="Vale refeição, plano de saúde e auxílio creche."),
+]
+_REWRITTEN = "Como funciona o plano de saúde da empresa?"
+
+
+@pytest.mark.parametrize("question", [
+    "Quantos dias de férias eu tenho por ano?",
+    "Qual é a política de trabalho remoto da empresa?",
+])
+def test_self_contained_questions(question):
+    assert is_self_contained(question)
+
+
+@pytest.mark.parametrize("question", [
+    "E o plano de saúde?",            # começa como acompanhamento
+    "Mas quanto custa por mês?",
+    "Como funciona isso na prática?",  # pronome/demonstrativo
+    "Qual o valor dele?",
+    "E o VR?",                         # curta demais
+])
+def test_follow_up_questions(question):
+    assert not is_self_contained(question)
+
+
+@pytest.fixture
+def llm() -> RecordingChatModel:
+    return RecordingChatModel(reply=lambda text: _REWRITTEN)
+
+
+def test_self_contained_question_skips_the_llm(llm):
+    rewriter = QueryRewriter(llm=llm)
+    question = "Quantos dias de férias eu tenho por ano?"
+    assert rewriter.rewrite(question, _HISTORY) == question
+    assert rewriter.rewrite("E o plano de saúde?", []) == "E o plano de saúde?"  # sem histórico
+    assert not llm.prompts
+
+
+def test_follow_up_is_rewritten_with_the_history(llm):
+    rewriter = QueryRewriter(llm=llm)
+    assert rewriter.rewrite("E o plano de saúde?", _HISTORY) == _REWRITTEN
+    (prompt,) = llm.prompts
+    assert [m.content for m in prompt[1:3]] == [m.content for m in _HISTORY]
+    assert "E o plano de saúde?" in prompt[-1].content
+
+
+def test_repeated_follow_up_hits_the_memo(llm):
+    rewriter = QueryRewriter(llm=llm)
+    rewriter.rewrite("E o plano de saúde?", _HISTORY)
+    assert rewriter.rewrite("  e o plano de SAÚDE ", _HISTORY) == _REWRITTEN  # normalizada
+    assert asyncio.run(rewriter.arewrite("E o plano de saúde?", _HISTORY)) == _REWRITTEN
+    assert len(llm.prompts) == 1
+
+
+def test_memo_key_uses_only_the_last_four_messages(llm):
+    rewriter = QueryRewriter(llm=llm)
+    older = [HumanMessage(content="Oi"), AIMessage(content="Olá!")]
+    recent = [*_HISTORY, HumanMessage(content="E o VR?"), AIMessage(content="R$ 40 por dia.")]
+    rewriter.rewrite("E o plano de saúde?", older + recent)
+    rewriter.rewrite("E o plano de saúde?", [HumanMessage(content="outra")] + recent)
+    assert len(llm.prompts) == 1  # só mudou o que fica fora das 4 últimas
+
+    changed = [*recent[:-1], AIMessage(content="R$ 45 por dia.")]
+    rewriter.rewrite("E o plano de saúde?", changed)
+    assert len(llm.prompts) == 2
+
+
+def test_unusable_llm_output_falls_back_to_the_question():
+    llm = RecordingChatModel(reply=lambda text: "Claro! Aqui está:\nComo funciona o plano?")
+    rewriter = QueryRewriter(llm=llm)
+    assert rewriter.rewrite("E o plano de saúde?", _HISTORY) == "E o plano de saúde?"
+
+
+def test_memo_is_bounded(llm):
+    rewriter = QueryRewriter(llm=llm, cache_size=2)
+    for topic in ("saúde", "creche", "VR"):
+        rewriter.rewrite(f"E o plano de {topic}?", _HISTORY)
+    rewriter.rewrite("E o plano de saúde?", _HISTORY)  # o mais antigo saiu do memo
+    assert len(llm.prompts) == 4
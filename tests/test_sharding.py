@@ -0,0 +1,141 @@
+"""Sharding: partição por hash/diretório, merge dos top k e reconstrução por shard."""
+
+from dataclasses import replace
+
+import chromadb
+import pytest
+from langchain_core.documents import Document
+
+from src.config.settings import settings
+from src.langchain_rag import indexing, retrieval, sharding
+from src.langchain_rag.sharding import ROOT_SHARD, list_shards, shard_of
+
+
+@pytest.fixture
+def shard_settings(monkeypatch):
+    """Troca o Settings (congelado) visto pelos módulos que decidem os shards."""
+
+    def apply(**overrides):
+        patched = replace(settings, **overrides)
+        monkeypatch.setattr(sharding, "settings", patched)
+        monkeypatch.setattr(indexing, "settings", patched)
+        return patched
+
+    return apply
+
+
+# ─── Partição ────────────────────────────────────────────────────────────────
+
+def test_no_sharding_uses_the_single_collection(shard_settings):
+    shard_settings(shard_by="none")
+    assert shard_of("rh/ferias.md") == ""
+    assert list_shards() == [""]
+
+
+def test_hash_shards_are_stable_and_in_range(shard_settings):
+    shard_settings(shard_by="hash", vector_shards=4)
+    paths = [f"docs/arquivo-{i}.md" for i in range(200)]
+    shards = [shard_of(path) for path in paths]
+    assert shards == [shard_of(path) for path in paths]
+    assert set(shards) == set(list_shards()) == {"h00", "h01", "h02", "h03"}
+    assert min(shards.count(shard) for shard in set(shards)) > 20  # tamanhos parecidos
+
+
+def test_directory_shards_follow_the_top_level_directory(shard_settings):
+    shard_settings(shard_by="directory")
+    assert shard_of("rh/ferias.md") == "rh"
+    assert shard_of("rh/2024/ferias.md") == "rh"
+    assert shard_of("leia-me.md") == ROOT_SHARD
+
+
+def test_invalid_strategy_is_rejected(shard_settings):
+    shard_settings(shard_by="aleatorio")
+    with pytest.raises(ValueError, match="SHARD_BY"):
+        shard_of("a.md")
+
+
+def test_collection_names_follow_chroma_rules():
+    assert retrieval._collection_name("") == "rag_documents"
+    assert retrieval._collection_name("h03") == "rag_documents-h03"
+    assert retrieval._collection_name("_root") == "rag_documents-_root"
+    odd = retrieval._collection_name("Políticas de RH!")
+    assert odd.startswith("rag_documents-Pol") and odd[-1].isalnum()
+    assert odd != retrieval._collection_name("Políticas de RH?")
+
+
+# ─── Merge dos top k ─────────────────────────────────────────────────────────
+
+def test_vector_search_merges_shards_by_score(monkeypatch):
+    def doc(chunk_id):
+        return Document(id=chunk_id, page_content=chunk_id)
+
+    per_shard = {
+        "h00": [[(0.91, doc("a1")), (0.72, doc("a2")), (0.40, doc("a3"))], []],
+        "h01": [[(0.88, doc("b1")), (0.85, doc("b2")), (0.31, doc("b3"))], [(0.5, doc("b9"))]],
+        "h02": [[(0.50, doc("c1"))], [(0.7, doc("c9")), (0.1, doc("c8"))]],
+    }
+    monkeypatch.setattr(
+        retrieval, "load_shard_stores", lambda: [(shard, None) for shard in per_shard]
+    )
+    monkeypatch.setattr(
+        retrieval, "_store_search",
+        lambda shard, store, vectors, k, where: [hits[:k] for hits in per_shard[shard]],
+    )
+    first, second = retrieval.vector_search([[0.0], [0.0]], 4)
+    assert [d.id for d in first] == ["a1", "b1", "b2", "a2"]
+    assert [d.id for d in second] == ["c9", "b9", "c8"]
+
+
+# ─── Ingestão por shard ──────────────────────────────────────────────────────
+
+_CHUNKING = {"chunk_size": 120, "chunk_overlap": 0, "chunk_strategy": "recursive", "workers": 1}
+
+
+def _write(data_dir, name, topic):
+    path = data_dir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        "\n\n".join(f"Parágrafo {i} sobre {topic}, regra {i}." for i in range(3)),
+        encoding="utf-8",
+    )
+
+
+def _collections() -> set[str]:
+    client = chromadb.PersistentClient(str(settings.vector_store_dir))
+    return {collection.name for collection in client.list_collections()}
+
+
+def test_directory_shards_rebuild_independently(data_dir, fake_embeddings, shard_settings):
+    _write(data_dir, "rh/ferias.md", "férias")
+    _write(data_dir, "ti/senhas.md", "senhas")
+    _write(data_dir, "leia-me.md", "boas-vindas")
+
+    shard_settings(shard_by="none")
+    indexing.index_documents(data_dir, full=True, **_CHUNKING)
+    assert "rag_documents" in _collections()
+
+    shard_settings(shard_by="directory")
+    report = indexing.index_documents(data_dir, **_CHUNKING)
+    assert report.full_rebuild  # mudar SHARD_BY muda a config do índice
+    assert set(report.shards) == {"rh", "ti", ROOT_SHARD}
+    assert report.chunks_total == sum(report.shards.values())
+    # A collection única do esquema anterior foi apagada
+    assert {name for name in _collections() if name.startswith("rag_documents")} == {
+        "rag_documents-rh", "rag_documents-ti", "rag_documents-_root"
+    }
+
+    versions = dict(indexing.IngestManifest.load().shards)
+    ti_ids = set(retrieval.get_chunk_ids(retrieval.load_vector_store("ti"), "ti/senhas.md"))
+    rebuilt = indexing.index_documents(data_dir, full=True, shard="rh", **_CHUNKING)
+    assert rebuilt.files_added == 1 and rebuilt.files_unchanged == 0
+    assert rebuilt.shards == report.shards
+    assert indexing.IngestManifest.load().shards == versions  # mesmo conteúdo, mesma versão
+    assert set(retrieval.get_chunk_ids(retrieval.load_vector_store("ti"), "ti/senhas.md")) == ti_ids
+
+    docs = retrieval.vector_search([fake_embeddings.embed_query("senhas regra")], 2)[0]
+    assert docs[0].metadata["source_path"] == "ti/senhas.md"
+
+    with pytest.raises(ValueError):
+        indexing.index_documents(data_dir, shard="rh", chunk_size=80, **{
+            key: value for key, value in _CHUNKING.items() if key != "chunk_size"
+        })
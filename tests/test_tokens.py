@@ -0,0 +1,40 @@
+"""Contagem e truncamento por tokens."""
+
+import pytest
+
+from src.langchain_rag.tokens import count_tokens, truncate_to_tokens
+
+
+@pytest.fixture(autouse=True)
+def _tokenizer(fake_tokenizer):
+    return fake_tokenizer
+
+
+_TEXT = "um dois três quatro cinco seis"  # 6 tokens
+
+
+def test_count_tokens_excludes_special_tokens():
+    assert count_tokens(_TEXT) == 6
+    assert count_tokens("") == 0
+
+
+def test_exact_fit_is_unchanged():
+    assert truncate_to_tokens(_TEXT, 6) == _TEXT
+    assert truncate_to_tokens(_TEXT, 100) == _TEXT
+
+
+def test_one_over_is_cut_at_a_word_boundary():
+    truncated = truncate_to_tokens(_TEXT, 5)
+    assert truncated == "um dois três quatro …"
+    assert count_tokens(truncated) == 5
+
+
+@pytest.mark.parametrize("max_tokens", [0, -3])
+def test_no_budget_gives_empty_text(max_tokens):
+    assert truncate_to_tokens(_TEXT, max_tokens) == ""
+    assert truncate_to_tokens("", max_tokens) == ""
+
+
+def test_first_word_too_long_leaves_only_the_ellipsis():
+    assert truncate_to_tokens("POL-123-ABC restante", 1) == "…"
+    assert truncate_to_tokens(_TEXT, 1) == "…"